@@ -0,0 +1,251 @@
+"""
+DESCRIPTION
+
+Groups many cohorts (for example one csv file per course section) in one go
+
+Cohorts come from a manifest (JSON file) or from every csv file in a directory. Each one is
+loaded, assigned and written to its own output file in a process pool, and a summary with the
+time taken and the number of unassigned people of every cohort is printed and saved as JSON.
+A cohort that fails (missing file, wrong column name, ...) is reported in the summary with its
+error, the others are not affected
+
+Manifest format (every key of "defaults" can be set per cohort, see BATCH_DEFAULTS):
+{
+    "defaults": {"minTeamSize": 3, "maxTeamSize": 5},
+    "cohorts": [
+        {"inputCSVfilename": "sectionA.csv"},
+        {"inputCSVfilename": "sectionB.csv", "interestColumnName": "Projects", "maxTeamsPerProject": 2}
+    ]
+}
+
+Run from the terminal, for example:
+py ./batch.py manifest.json --workers 4
+py ./batch.py sections/ --output-directory results
+"""
+
+import argparse, json, os, time, traceback
+from concurrent.futures import ProcessPoolExecutor
+import combined as C
+
+BATCH_DEFAULTS = {
+    "interestColumnName": "Interested?",
+    "leaderColumnName": "Leader?",
+    "nameColumnName": "Name",
+    "minTeamSize": 2,
+    "maxTeamSize": 3,
+    "maxTeamsPerProject": 1,
+    "leadersPerTeam": 1,
+    "outputColumns": ["Name"],
+    "engine": "sparse",
+    "reader": "stream",
+    "solver": "greedy",
+    "timeLimit": 10,
+    "restarts": 8,
+    "seed": 0
+}
+
+BATCH_COLUMNS = ["name","status","studentCount","sadPlayerCount","unluckyProjectCount","seconds"]
+
+def makeBatchJob(cohort,defaults=None,outputDirectory=None):
+    """
+    INPUT
+    cohort: dict with at least inputCSVfilename, other keys override defaults and BATCH_DEFAULTS
+    outputDirectory: where outputFilename goes when the cohort does not set it (next to the input otherwise)
+
+    OUTPUT
+    dict with every key of BATCH_DEFAULTS plus name, inputCSVfilename and outputFilename
+    """
+    job = dict(BATCH_DEFAULTS)
+    job.update(defaults or {})
+    job.update(cohort)
+
+    baseName = os.path.splitext(os.path.basename(job["inputCSVfilename"]))[0]
+    job.setdefault("name",baseName)
+
+    if "outputFilename" not in job:
+        directory = outputDirectory if outputDirectory is not None else os.path.dirname(job["inputCSVfilename"])
+        job["outputFilename"] = os.path.join(directory,baseName + "Result.csv")
+
+    return job
+
+def readBatchManifest(manifestFilename,outputDirectory=None):
+    """
+    OUTPUT
+    list of jobs from makeBatchJob(), relative file names are relative to the manifest
+    """
+    with open(manifestFilename,"r") as file:
+        manifest = json.load(file)
+
+    manifestDirectory = os.path.dirname(manifestFilename)
+    jobs = []
+    for cohort in manifest["cohorts"]:
+        cohort = dict(cohort)
+        for key in ("inputCSVfilename","outputFilename"):
+            if key in cohort:
+                cohort[key] = os.path.join(manifestDirectory,cohort[key])
+        jobs.append(makeBatchJob(cohort,manifest.get("defaults"),outputDirectory))
+
+    return jobs
+
+def findBatchJobs(directory,defaults=None,outputDirectory=None):
+    """
+    OUTPUT
+    one job from makeBatchJob() for every csv file in directory (sorted by name), result files are skipped
+    """
+    return [
+        makeBatchJob({"inputCSVfilename": os.path.join(directory,fileName)},defaults,outputDirectory)
+        for fileName in sorted(os.listdir(directory))
+        if fileName.endswith(".csv") and not fileName.endswith("Result.csv")
+    ]
+
+def runBatchJob(job):
+    """
+    Loads, assigns and writes one cohort. Any error is caught and returned so it only fails this cohort
+
+    OUTPUT
+    dict with the keys of BATCH_COLUMNS, outputFilename, stageSeconds and error (None if it worked)
+    """
+    stats = C.RunStats()
+    result = {
+        "name": job["name"],
+        "status": "ok",
+        "outputFilename": job["outputFilename"],
+        "studentCount": None,
+        "sadPlayerCount": None,
+        "unluckyProjectCount": None,
+        "error": None
+    }
+    startTime = time.perf_counter()
+
+    try:
+        with C.loadCohort(
+            job["inputCSVfilename"],job["interestColumnName"],job["leaderColumnName"],job["nameColumnName"],
+            job["outputColumns"],job["engine"],stats,job["reader"]
+        ) as cohort:
+            assignment, _ = C.assignCohort(
+                cohort,job["minTeamSize"],job["maxTeamSize"],job["maxTeamsPerProject"],job["leadersPerTeam"],
+                job["solver"],job["timeLimit"],job["restarts"],job["seed"],stats
+            )
+
+            with C.timeStage(stats,"createCSVfile"):
+                C.createCSVfile(
+                    job["outputFilename"],assignment,cohort.records,cohort.projectNames,
+                    cohort.headerNameToColumnIndex,job["outputColumns"],assignment.getSadList()
+                )
+
+            result["studentCount"] = cohort.studentCount
+            result["sadPlayerCount"] = assignment.sadPlayerCount
+            result["unluckyProjectCount"] = len(assignment.unluckyProjects)
+    except Exception as error:
+        result["status"] = "error"
+        result["error"] = "".join(traceback.format_exception_only(type(error),error)).strip()
+
+    result["seconds"] = time.perf_counter() - startTime
+    result["stageSeconds"] = stats.stageSeconds
+    return result
+
+def runBatch(jobs,workers=None):
+    """
+    INPUT
+    jobs: list of jobs from makeBatchJob()
+    workers: number of processes, None uses every core, 0 runs the jobs one after another in this process
+
+    OUTPUT
+    list of results of runBatchJob() in the same order as jobs. A job whose worker process dies
+    is reported as an error as well
+    """
+    if workers == 0:
+        return [runBatchJob(job) for job in jobs]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(runBatchJob,job) for job in jobs]
+
+        for job,future in zip(jobs,futures):
+            try:
+                results.append(future.result())
+            except Exception as error:
+                results.append({
+                    "name": job["name"],"status": "error","outputFilename": job["outputFilename"],
+                    "studentCount": None,"sadPlayerCount": None,"unluckyProjectCount": None,
+                    "error": repr(error),"seconds": None,"stageSeconds": {}
+                })
+
+    return results
+
+def summarizeBatch(results,seconds):
+    """
+    OUTPUT
+    dict with totals over every cohort and the results themselves
+    """
+    finished = [result for result in results if result["status"] == "ok"]
+    return {
+        "cohortCount": len(results),
+        "failedCount": len(results) - len(finished),
+        "studentCount": sum(result["studentCount"] for result in finished),
+        "sadPlayerCount": sum(result["sadPlayerCount"] for result in finished),
+        "seconds": seconds,
+        "cohorts": results
+    }
+
+def formatBatchTable(results):
+    """
+    OUTPUT (string)
+    results as a table with one row per cohort and the columns of BATCH_COLUMNS, errors below it
+    """
+    def formatValue(result,column):
+        value = result[column]
+        if value is None:
+            return "-"
+        return f"{value:.3f}" if column == "seconds" else str(value)
+
+    rows = [BATCH_COLUMNS] + [[formatValue(result,column) for column in BATCH_COLUMNS] for result in results]
+    columnWidths = [max(len(row[columnIndex]) for row in rows) for columnIndex in range(len(BATCH_COLUMNS))]
+
+    lines = ["  ".join(value.rjust(width) for value,width in zip(row,columnWidths)) for row in rows]
+    lines += [f"{result['name']}: {result['error']}" for result in results if result["error"] is not None]
+    return "\n".join(lines)
+
+def runBatchFromPath(path,workers=None,outputDirectory=None,summaryFilename=None,defaults=None):
+    """
+    INPUT
+    path: manifest (JSON file) or directory of csv files
+    summaryFilename: if given, the result of summarizeBatch() is saved there as JSON
+
+    OUTPUT
+    result of summarizeBatch()
+    """
+    if outputDirectory is not None:
+        os.makedirs(outputDirectory,exist_ok=True)
+
+    if os.path.isdir(path):
+        jobs = findBatchJobs(path,defaults,outputDirectory)
+    else:
+        jobs = readBatchManifest(path,outputDirectory)
+
+    startTime = time.perf_counter()
+    summary = summarizeBatch(runBatch(jobs,workers),time.perf_counter() - startTime)
+
+    print(formatBatchTable(summary["cohorts"]))
+    print(
+        f"\n{summary['cohortCount']} cohorts ({summary['failedCount']} failed), "
+        f"{summary['sadPlayerCount']} of {summary['studentCount']} people unassigned, {summary['seconds']:.2f}s"
+    )
+
+    if summaryFilename is not None:
+        with open(summaryFilename,"w") as file:
+            json.dump(summary,file,indent=2)
+
+    return summary
+
+def parseArguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Group every cohort of a manifest or directory")
+    parser.add_argument("path",help="manifest (JSON file) or directory of csv files")
+    parser.add_argument("--workers",type=int,default=None,help="processes to use, 0 runs in this process")
+    parser.add_argument("--output-directory",default=None,help="where result files go (next to the inputs if not set)")
+    parser.add_argument("--summary",default="batchSummary.json",help="JSON file to save the summary to")
+    return parser.parse_args(arguments)
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    runBatchFromPath(arguments.path,arguments.workers,arguments.output_directory,arguments.summary)
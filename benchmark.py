@@ -0,0 +1,270 @@
+"""
+DESCRIPTION
+
+Benchmarks for the data structures used in combined.py on synthetic cohorts
+(no CSV file required)
+
+runScalingBenchmark() writes generated cohorts to CSV files and runs them through the
+same stages as combined.run(), recording wall time and peak memory of every stage.
+Results are saved as JSON so runs of different versions can be compared
+
+To change the size of the cohorts, scroll to #USER-INPUT and change the values
+"""
+
+import csv, json, os, platform, random, sys, time, tracemalloc
+import combined as C
+
+def generateSparseCohort(studentCount,projectCount,preferencesNum,leaderChance,seed=0):
+    """
+    INPUT
+    studentCount,projectCount: self-explanatory
+    preferencesNum: number of unique projects every student picks
+    leaderChance: chance that a picked project is picked as a leader
+    seed: seed of the random generator so results can be reproduced
+
+    OUTPUT
+    SparsePreferences with the same values addStudents() would produce
+    """
+    generator = random.Random(seed)
+    preferences = C.SparsePreferences(projectCount)
+
+    for _ in range(studentCount):
+        projectValues = {}
+        for projectIndex in generator.sample(range(projectCount),preferencesNum):
+            projectValues[projectIndex] = C.LEADER if generator.random() < leaderChance else C.MEMBER
+        preferences.addRow(projectValues)
+
+    return preferences
+
+def getDenseMemorySize(studentCount,projectCount):
+    """
+    OUTPUT
+    number of bytes the 2d list from addStudents() uses for the given cohort.
+    Only one row is built, building all of them at 100k x 5k would need several GB
+    """
+    row = [0] * projectCount
+
+    return sys.getsizeof([None] * studentCount) + studentCount * sys.getsizeof(row)
+
+def compareSparseMemory(studentCount,projectCount,preferencesNum,leaderChance,seed=0):
+    """
+    OUTPUT (tuple)
+    (denseBytes, sparseBytes) memory used by the dense 2d list and by SparsePreferences
+    """
+    sparse = generateSparseCohort(studentCount,projectCount,preferencesNum,leaderChance,seed)
+
+    denseBytes = getDenseMemorySize(studentCount,projectCount)
+    sparseBytes = sparse.getMemorySize()
+
+    return denseBytes, sparseBytes
+
+def writeCohortCSV(fileName,studentCount,projectCount,preferencesNum,leaderChance,seed=0):
+    """
+    Writes a generated cohort as a csv file in the same format as a Google Form export
+    (columns Timestamp, Name, Email, Interested?, Leader?, projects separated by semicolons)
+    """
+    generator = random.Random(seed)
+    projectNames = [f"Project{projectIndex}" for projectIndex in range(projectCount)]
+
+    with open(fileName,"w",newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Timestamp","Name","Email","Interested?","Leader?"])
+
+        for studentIndex in range(studentCount):
+            interestProjects = []
+            leaderProjects = []
+            for projectIndex in generator.sample(range(projectCount),min(preferencesNum,projectCount)):
+                if generator.random() < leaderChance:
+                    leaderProjects.append(projectNames[projectIndex])
+                else:
+                    interestProjects.append(projectNames[projectIndex])
+
+            writer.writerow([
+                f"2022/11/10 {studentIndex}",f"Student{studentIndex}",f"student{studentIndex}@example.com",
+                ";".join(interestProjects),";".join(leaderProjects)
+            ])
+
+def measureStage(stages,stageName,function,*args):
+    """
+    Calls function(*args) and stores under stages[stageName] its peak traced memory if tracemalloc
+    is running, its wall time otherwise (tracing makes everything several times slower)
+
+    OUTPUT
+    return value of function
+    """
+    stage = stages.setdefault(stageName,{})
+
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        startMemory = tracemalloc.get_traced_memory()[0]
+        result = function(*args)
+        stage["peakBytes"] = tracemalloc.get_traced_memory()[1] - startMemory
+    else:
+        startTime = time.perf_counter()
+        result = function(*args)
+        stage["seconds"] = time.perf_counter() - startTime
+
+    return result
+
+def runPipelineStages(stages,inputFileName,outputFileName,outputColumns,minTeamSize,maxTeamSize,
+    maxTeamsPerProject,leadersPerTeam,engine
+):
+    """
+    Runs the stages of combined.run() on inputFileName, measuring each one with measureStage()
+
+    OUTPUT
+    number of unassigned people
+    """
+    headerNameToColumnIndex, records = measureStage(
+        stages,"parse",C.readStudentRecords,inputFileName,"Interested?","Leader?",["Name"] + outputColumns,False
+    )
+
+    preferences, _, _, projectNames = measureStage(
+        stages,"encode",C.encodeStudentRecords,records,headerNameToColumnIndex,"Interested?","Leader?","Name"
+    )
+
+    if engine == "numpy":
+        preferences = measureStage(stages,"convert",preferences.toArray)
+        summary = measureStage(stages,"summary",C.summarizePreferencesArray,preferences)
+    else:
+        if engine == "python":
+            preferences = measureStage(stages,"convert",preferences.toDense)
+        summary = measureStage(stages,"summary",C.summarizePreferences,preferences)
+
+    interestIndex = measureStage(stages,"interestIndex",C.makeInterestIndex,preferences)
+
+    _, teamsAssigned, sadPlayerCount, sadList = measureStage(
+        stages,"assignment",C.assignPlayersToProjects,summary,None,len(records),
+        minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex
+    )
+
+    measureStage(
+        stages,"csvWrite",C.createCSVfile,outputFileName,teamsAssigned,records,projectNames,
+        headerNameToColumnIndex,outputColumns,sadList
+    )
+    return sadPlayerCount
+
+def runPipelineBenchmark(studentCount,projectCount,preferencesNum,leaderChance,minTeamSize,maxTeamSize,
+    maxTeamsPerProject,leadersPerTeam,engine="sparse",seed=0,traceMemory=True,directory="."
+):
+    """
+    Runs one generated cohort through the stages of combined.run()
+
+    INPUT
+    engine: see combined.loadCohort(), "sparse" is the only one that fits 10^6 students x 10^4 projects
+    traceMemory: run the stages a second time with tracemalloc to record their peak memory
+    directory: where the temporary input and output csv files are written
+
+    OUTPUT
+    dict with the cohort size and, under "stages", seconds (and peakBytes) of
+    parse, encode (project discovery + matrix build), summary, interestIndex, assignment and csvWrite
+    """
+    inputFileName = os.path.join(directory,f"benchmarkInput{studentCount}x{projectCount}.csv")
+    outputFileName = os.path.join(directory,f"benchmarkOutput{studentCount}x{projectCount}.csv")
+    outputColumns = ["Name","Email"]
+
+    writeCohortCSV(inputFileName,studentCount,projectCount,preferencesNum,leaderChance,seed)
+    stages = {}
+
+    try:
+        sadPlayerCount = runPipelineStages(
+            stages,inputFileName,outputFileName,outputColumns,minTeamSize,maxTeamSize,
+            maxTeamsPerProject,leadersPerTeam,engine
+        )
+
+        if traceMemory:
+            tracemalloc.start()
+            try:
+                runPipelineStages(
+                    stages,inputFileName,outputFileName,outputColumns,minTeamSize,maxTeamSize,
+                    maxTeamsPerProject,leadersPerTeam,engine
+                )
+            finally:
+                tracemalloc.stop()
+    finally:
+        for fileName in (inputFileName,outputFileName):
+            if os.path.exists(fileName):
+                os.remove(fileName)
+
+    return {
+        "studentCount": studentCount,
+        "projectCount": projectCount,
+        "engine": engine,
+        "sadPlayerCount": sadPlayerCount,
+        "stages": stages,
+        "totalSeconds": sum(stage["seconds"] for stage in stages.values())
+    }
+
+def runScalingBenchmark(cohortSizes,preferencesNum,leaderChance,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam,engine="sparse",seed=0,traceMemory=True,outputFileName=None,label=""
+):
+    """
+    INPUT
+    cohortSizes: list of (studentCount, projectCount)
+    outputFileName: if given, the results are saved there as JSON
+    label: stored with the results to tell versions apart (for example a git commit)
+
+    OUTPUT
+    dict with information about the machine and the result of runPipelineBenchmark() for every size
+    """
+    results = {
+        "label": label,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "runs": []
+    }
+
+    for studentCount,projectCount in cohortSizes:
+        result = runPipelineBenchmark(
+            studentCount,projectCount,preferencesNum,leaderChance,minTeamSize,maxTeamSize,
+            maxTeamsPerProject,leadersPerTeam,engine,seed,traceMemory
+        )
+        results["runs"].append(result)
+        print(f"{studentCount} students, {projectCount} projects: {result['totalSeconds']:.2f}s")
+
+        if outputFileName is not None:
+            with open(outputFileName,"w") as file:
+                json.dump(results,file,indent=2)
+
+    return results
+
+
+# USER INPUT
+
+STUDENT_COUNT = 100000
+PROJECT_COUNT = 5000
+PREFERENCES_NUM = 5
+LEADER_CHANCE = 0.2
+SEED = 0
+
+RUN_MEMORY_COMPARISON = True
+
+# (students, projects) of every cohort in the scaling benchmark
+COHORT_SIZES = [(100,10),(1000,100),(10000,1000),(100000,1000),(1000000,10000)]
+MIN_TEAM_SIZE = 4
+MAX_TEAM_SIZE = 6
+MAX_TEAMS_PER_PROJECT = 2
+LEADERS_PER_TEAM = 1
+ENGINE = "sparse"
+TRACE_MEMORY = True
+BENCHMARK_OUTPUT_FILENAME = "benchmarkResults.json"
+BENCHMARK_LABEL = ""
+
+RUN_SCALING_BENCHMARK = False
+
+if RUN_MEMORY_COMPARISON and __name__ == "__main__":
+    denseBytes, sparseBytes = compareSparseMemory(
+        STUDENT_COUNT,PROJECT_COUNT,PREFERENCES_NUM,LEADER_CHANCE,SEED
+    )
+
+    print(f"\n{STUDENT_COUNT} students, {PROJECT_COUNT} projects, {PREFERENCES_NUM} preferences each")
+    print(f"dense list: {denseBytes / 2**20:.1f} MB")
+    print(f"sparse: {sparseBytes / 2**20:.1f} MB")
+    print(f"ratio: {denseBytes / sparseBytes:.0f}x")
+
+if RUN_SCALING_BENCHMARK and __name__ == "__main__":
+    runScalingBenchmark(
+        COHORT_SIZES,PREFERENCES_NUM,LEADER_CHANCE,MIN_TEAM_SIZE,MAX_TEAM_SIZE,MAX_TEAMS_PER_PROJECT,
+        LEADERS_PER_TEAM,ENGINE,SEED,TRACE_MEMORY,BENCHMARK_OUTPUT_FILENAME,BENCHMARK_LABEL
+    )
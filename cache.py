@@ -0,0 +1,511 @@
+"""
+DESCRIPTION
+
+On-disk cache of parsed cohorts so a csv file that has not changed is not read and encoded again
+
+A cache file holds everything combined.loadCohort() builds (the preference arrays, summary,
+interest index, project names) plus every column of every row, so any OUTPUT_COLUMNS can be
+written without the csv file. Files are named after a hash of the csv contents and the
+interest/leader/name column names and are memory-mapped when loaded: only the small parts
+(project names, summary) are decoded up front, rows are decoded when they are used. The file stays
+mapped until the cohort is closed (cohort.close() or a with block)
+
+Layout of a cache file: CACHE_MAGIC, the length of the metadata (8 bytes), the metadata as
+JSON, then the arrays listed in the metadata, each starting at a multiple of 8 bytes
+
+The teams of a run can be cached too (result files): they are named after the cohort cache key and
+the constraints and solver settings of the run, and hold the arrays of a combined.TeamAssignment in the
+same layout. A result is only used together with its cohort cache file, which has every column needed
+to write the output csv, so a hit skips parsing, encoding and assigning
+
+When the cache directory holds more than maxCacheBytes, the least recently used files are removed
+"""
+
+import hashlib, json, mmap, os, struct
+from array import array
+import combined as C
+
+CACHE_MAGIC = b"GRPCACH1"
+CACHE_SUFFIX = ".cohort"
+RESULT_MAGIC = b"GRPRSLT1"
+RESULT_SUFFIX = ".result"
+HASH_CHUNK_SIZE = 2**20
+
+def getFileHash(fileName):
+    """
+    OUTPUT
+    hex digest of the contents of the file
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(fileName,"rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE),b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def getCacheKey(fileHash,interestColumnName,leaderColumnName,nameColumnName):
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([fileHash,interestColumnName,leaderColumnName,nameColumnName]).encode())
+    return digest.hexdigest()
+
+def getResultKey(cacheKey,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit,restarts,seed,
+    decompose
+):
+    """
+    OUTPUT
+    hex digest of the cohort cache key and everything that changes the teams of combined.assignCohort()
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(json.dumps([
+        cacheKey,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit,restarts,seed,decompose
+    ]).encode())
+    return digest.hexdigest()
+
+def getCachedFileHash(cacheDirectory,fileName):
+    """
+    Hashing a large file takes a while, so the hash is remembered together with the size and
+    modification time of the file and only computed again when one of them changes
+    """
+    hashIndexFileName = os.path.join(cacheDirectory,"fileHashes.json")
+    fileStat = os.stat(fileName)
+    fileId = [fileStat.st_size,fileStat.st_mtime_ns]
+
+    try:
+        with open(hashIndexFileName,"r") as file:
+            hashIndex = json.load(file)
+    except (OSError,ValueError):
+        hashIndex = {}
+
+    entry = hashIndex.get(os.path.abspath(fileName))
+    if entry is not None and entry[:2] == fileId:
+        return entry[2]
+
+    fileHash = getFileHash(fileName)
+    hashIndex[os.path.abspath(fileName)] = fileId + [fileHash]
+    with open(hashIndexFileName,"w") as file:
+        json.dump(hashIndex,file)
+
+    return fileHash
+
+class CachedColumn:
+    """
+    Read-only view of one text column of a cache file, column[rowIndex] decodes a single value
+    (the name column stands in for the studentNames list of the cohort)
+    """
+    def __init__(self,starts,blob):
+        self.starts = starts
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.starts) - 1
+
+    def __getitem__(self,rowIndex):
+        return str(self.blob[self.starts[rowIndex]:self.starts[rowIndex + 1]],"utf-8")
+
+class CachedRecords:
+    """
+    Read-only rows of a cache file, records[rowIndex][columnIndex] works like on the list of records
+    from combined.readStudentRecords() (columnIndex as in the headerNameToColumnIndex of the cache).
+    close() (or leaving a with block) unmaps the cache file, which the preferences and interestIndex
+    of the cohort are read from too, so none of them can be used after that
+    """
+    def __init__(self,columns,sectionFile):
+        self.columns = columns
+        self.sectionFile = sectionFile
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self,rowIndex):
+        return CachedRow(self.columns,rowIndex)
+
+    def close(self):
+        self.sectionFile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exceptionInfo):
+        self.close()
+
+class CachedRow:
+    def __init__(self,columns,rowIndex):
+        self.columns = columns
+        self.rowIndex = rowIndex
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __getitem__(self,columnIndex):
+        return self.columns[columnIndex][self.rowIndex]
+
+class CachedInterestIndex:
+    """
+    interestIndex read from a cache file, the lists of a project are made the first time it is used
+    (pickles as a plain list so it can be sent to worker processes)
+    """
+    def __init__(self,memberStarts,memberStudents,leaderStarts,leaderStudents):
+        self.memberStarts = memberStarts
+        self.memberStudents = memberStudents
+        self.leaderStarts = leaderStarts
+        self.leaderStudents = leaderStudents
+        self.projects = [None] * (len(memberStarts) - 1)
+
+    def __len__(self):
+        return len(self.projects)
+
+    def __getitem__(self,projectIndex):
+        if self.projects[projectIndex] is None:
+            self.projects[projectIndex] = (
+                self.memberStudents[self.memberStarts[projectIndex]:self.memberStarts[projectIndex + 1]].tolist(),
+                self.leaderStudents[self.leaderStarts[projectIndex]:self.leaderStarts[projectIndex + 1]].tolist()
+            )
+        return self.projects[projectIndex]
+
+    def __iter__(self):
+        return (self[projectIndex] for projectIndex in range(len(self)))
+
+    def __eq__(self,other):
+        return list(self) == list(other)
+
+    def __reduce__(self):
+        return (list,(list(self),))
+
+def encodeTextColumn(values):
+    """
+    OUTPUT (tuple)
+    starts: array of byte offsets of every value in blob (one extra at the end)
+    blob: utf-8 encoded values one after the other
+    """
+    encodedValues = [value.encode("utf-8") for value in values]
+    blob = b"".join(encodedValues)
+
+    # 4 byte offsets are enough unless the column holds more than 2GB of text
+    starts = array("i" if len(blob) < 2**31 else "q",[0])
+    position = 0
+    for encodedValue in encodedValues:
+        position += len(encodedValue)
+        starts.append(position)
+    return starts, blob
+
+def makeInterestArrays(interestIndex,channel):
+    """
+    OUTPUT (tuple)
+    starts, students: interestIndex[projectIndex][channel] is students[starts[projectIndex]:starts[projectIndex + 1]]
+    """
+    starts = array("q",[0])
+    students = array("i")
+    for projectStudents in interestIndex:
+        students.extend(projectStudents[channel])
+        starts.append(len(students))
+    return starts, students
+
+def writeCohortCache(cacheFileName,inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName):
+    """
+    Reads and encodes the csv file the same way combined.loadCohort() does and writes the result,
+    with every column of the file, to cacheFileName
+    """
+    rows = C.streamFileRows(inputCSVfilename)
+    headerNames = next(rows)
+    headerNameToColumnIndex = C.getHeaderNameToColumnIndex([headerNames])
+    records = [tuple(row) + ("",) * (len(headerNames) - len(row)) for row in rows]
+
+    preferences, _, _, projectNames = C.encodeStudentRecords(
+        records,headerNameToColumnIndex,interestColumnName,leaderColumnName,nameColumnName
+    )
+    summary = C.summarizePreferences(preferences)
+    interestIndex = C.makeInterestIndex(preferences)
+
+    memberStarts, memberStudents = makeInterestArrays(interestIndex,0)
+    leaderStarts, leaderStudents = makeInterestArrays(interestIndex,1)
+
+    sections = [
+        ("rowStarts",preferences.rowStarts),
+        ("projectIndices",preferences.projectIndices),
+        ("values",preferences.values),
+        ("summary",array("q",[value for projectSummary in summary for value in projectSummary])),
+        ("memberStarts",memberStarts),
+        ("memberStudents",memberStudents),
+        ("leaderStarts",leaderStarts),
+        ("leaderStudents",leaderStudents)
+    ]
+    for columnIndex in range(len(headerNames)):
+        starts, blob = encodeTextColumn([record[columnIndex] for record in records])
+        sections.append((f"columnStarts{columnIndex}",starts))
+        sections.append((f"columnBlob{columnIndex}",array("B",blob)))
+
+    writeSectionFile(cacheFileName,CACHE_MAGIC,{
+        "headerNames": headerNames,
+        "columnNames": [interestColumnName,leaderColumnName,nameColumnName],
+        "projectNames": projectNames
+    },sections)
+
+def writeSectionFile(fileName,magic,metadata,sections):
+    """
+    Writes magic, the length of the metadata, metadata (with the position of every section added)
+    as JSON and the arrays of sections (list of (sectionName, array)) to fileName
+    """
+    # offsets are relative to the end of the metadata
+    sectionInfo = {}
+    position = 0
+    for sectionName,values in sections:
+        position += -position % 8
+        sectionInfo[sectionName] = [position,len(values),values.typecode]
+        position += len(values) * values.itemsize
+
+    metadata = json.dumps(dict(metadata,sections=sectionInfo)).encode("utf-8")
+    metadata += b" " * (-(len(magic) + 8 + len(metadata)) % 8)
+
+    temporaryFileName = fileName + ".tmp"
+    with open(temporaryFileName,"wb") as file:
+        file.write(magic)
+        file.write(struct.pack("<Q",len(metadata)))
+        file.write(metadata)
+
+        position = 0
+        for sectionName,values in sections:
+            file.write(b"\0" * (sectionInfo[sectionName][0] - position))
+            values.tofile(file)
+            position = sectionInfo[sectionName][0] + len(values) * values.itemsize
+
+    # a half written cache file is never visible under its real name
+    os.replace(temporaryFileName,fileName)
+
+class SectionFile:
+    """
+    Memory-mapped file written by writeSectionFile(), metadata is the dict given to it. close() (or leaving
+    a with block) unmaps the file, the sections from getSection() can't be used after that
+    """
+    def __init__(self,fileName,magic):
+        self.fileName = fileName
+        with open(fileName,"rb") as file:
+            self.mappedFile = mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ)
+
+        if self.mappedFile[:len(magic)] != magic:
+            self.mappedFile.close()
+            raise ValueError(f"{fileName} is not a {'cohort' if magic == CACHE_MAGIC else 'result'} cache file")
+
+        metadataLength = struct.unpack_from("<Q",self.mappedFile,len(magic))[0]
+        self.dataStart = len(magic) + 8 + metadataLength
+        self.metadata = json.loads(self.mappedFile[len(magic) + 8:self.dataStart])
+        self.buffer = memoryview(self.mappedFile)
+        # every view handed out is released on close(), the file can't be unmapped while one is in use
+        self.sections = []
+
+    def getSection(self,sectionName):
+        """
+        OUTPUT
+        the array of a section as a memoryview of the mapped file
+        """
+        offset, length, typecode = self.metadata["sections"][sectionName]
+        start = self.dataStart + offset
+        section = self.buffer[start:start + length * array(typecode).itemsize].cast(typecode)
+        self.sections.append(section)
+        return section
+
+    def close(self):
+        for section in self.sections:
+            section.release()
+        self.sections = []
+        self.buffer.release()
+        self.mappedFile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exceptionInfo):
+        self.close()
+
+def readCohortCache(cacheFileName):
+    """
+    Memory-maps a file written by writeCohortCache()
+
+    OUTPUT
+    cohort: combined.Cohort like combined.loadCohort() makes ("sparse" engine). preferences, interestIndex,
+    records and studentNames are views of the mapped file (cohort.close() unmaps it), headerNameToColumnIndex
+    covers every column of the csv file
+    """
+    sectionFile = SectionFile(cacheFileName,CACHE_MAGIC)
+    metadata = sectionFile.metadata
+    getSection = sectionFile.getSection
+
+    projectNames = metadata["projectNames"]
+    preferences = C.SparsePreferences(len(projectNames))
+    preferences.rowStarts = getSection("rowStarts")
+    preferences.projectIndices = getSection("projectIndices")
+    preferences.values = getSection("values")
+
+    summaryValues = getSection("summary").tolist()
+    summary = [summaryValues[position:position + 3] for position in range(0,len(summaryValues),3)]
+
+    interestIndex = CachedInterestIndex(
+        getSection("memberStarts"),getSection("memberStudents"),getSection("leaderStarts"),getSection("leaderStudents")
+    )
+
+    columns = [
+        CachedColumn(getSection(f"columnStarts{columnIndex}"),getSection(f"columnBlob{columnIndex}"))
+        for columnIndex in range(len(metadata["headerNames"]))
+    ]
+    headerNameToColumnIndex = C.getHeaderNameToColumnIndex([metadata["headerNames"]])
+    projectNameToIndex = {projectName: projectIndex for projectIndex,projectName in enumerate(projectNames)}
+
+    return C.Cohort(
+        headerNameToColumnIndex,CachedRecords(columns,sectionFile),preferences,
+        columns[headerNameToColumnIndex[metadata["columnNames"][2]]],projectNames,projectNameToIndex,
+        summary,interestIndex
+    )
+
+def writeResultCache(resultFileName,assignment,solverInfo):
+    """
+    Writes the arrays of a combined.TeamAssignment and the solverInfo of combined.assignCohort() to resultFileName
+    """
+    writeSectionFile(
+        resultFileName,RESULT_MAGIC,{"solverInfo": solverInfo},
+        [(slotName,getattr(assignment,slotName)) for slotName in C.TeamAssignment.__slots__]
+    )
+
+def readResultCache(resultFileName):
+    """
+    OUTPUT (tuple)
+    assignment, solverInfo: as given to writeResultCache(), the arrays are copied out of the file
+    """
+    with SectionFile(resultFileName,RESULT_MAGIC) as sectionFile:
+        assignment = C.TeamAssignment(0)
+        for slotName in C.TeamAssignment.__slots__:
+            values = array(sectionFile.metadata["sections"][slotName][2])
+            values.frombytes(sectionFile.getSection(slotName).cast("B"))
+            setattr(assignment,slotName,values)
+
+        return assignment, sectionFile.metadata["solverInfo"]
+
+def getResultFileName(cacheDirectory,fileHash,resultKey):
+    # the csv hash comes first so invalidateResults() can find the results of a file by name
+    return os.path.join(cacheDirectory,f"{fileHash}.{resultKey}{RESULT_SUFFIX}")
+
+def invalidateResults(cacheDirectory,inputCSVfilename=None):
+    """
+    Removes the cached results of inputCSVfilename (as it is now), or every cached result if it is None.
+    Cohort cache files are kept
+
+    OUTPUT
+    number of result files removed
+    """
+    if not os.path.isdir(cacheDirectory):
+        return 0
+
+    prefix = "" if inputCSVfilename is None else getCachedFileHash(cacheDirectory,inputCSVfilename) + "."
+    removedCount = 0
+    for fileName in os.listdir(cacheDirectory):
+        if fileName.startswith(prefix) and fileName.endswith(RESULT_SUFFIX):
+            os.remove(os.path.join(cacheDirectory,fileName))
+            removedCount += 1
+    return removedCount
+
+def evictCache(cacheDirectory,maxCacheBytes,*keepFileNames):
+    """
+    Removes the least recently used cohort and result files until the directory holds at most maxCacheBytes
+    (keepFileNames are never removed)
+    """
+    cacheFiles = []
+    for fileName in os.listdir(cacheDirectory):
+        if fileName.endswith((CACHE_SUFFIX,RESULT_SUFFIX)):
+            fileStat = os.stat(os.path.join(cacheDirectory,fileName))
+            cacheFiles.append((fileStat.st_mtime_ns,fileStat.st_size,os.path.join(cacheDirectory,fileName)))
+
+    totalBytes = sum(size for _,size,_ in cacheFiles)
+    for _,size,fileName in sorted(cacheFiles):
+        if totalBytes <= maxCacheBytes:
+            break
+        if fileName in keepFileNames:
+            continue
+        try:
+            os.remove(fileName)
+            totalBytes -= size
+        except OSError:
+            # still mapped by another process on some systems, try again next time
+            pass
+
+def loadCohortCached(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,
+    cacheDirectory="cohortCache",maxCacheBytes=2**30,stats=None
+):
+    """
+    Same result as combined.loadCohort() with the "sparse" engine, read from cacheDirectory when the csv file
+    was loaded before with the same interest/leader/name columns. The preferences stay a view of the mapped
+    file, there is no dense engine: converting them would cost O(people * projects) time and memory on every hit
+
+    INPUT
+    maxCacheBytes: most bytes of cache files kept in cacheDirectory
+    stats: optional combined.RunStats, gets the cacheHits/cacheMisses counters
+    """
+    os.makedirs(cacheDirectory,exist_ok=True)
+
+    with C.timeStage(stats,"readCohortCache"):
+        cacheKey = getCacheKey(
+            getCachedFileHash(cacheDirectory,inputCSVfilename),interestColumnName,leaderColumnName,nameColumnName
+        )
+        cacheFileName = os.path.join(cacheDirectory,cacheKey + CACHE_SUFFIX)
+        cacheHit = os.path.exists(cacheFileName)
+
+        if cacheHit:
+            # the modification time tells evictCache() which files were used last
+            os.utime(cacheFileName)
+        else:
+            writeCohortCache(cacheFileName,inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName)
+            evictCache(cacheDirectory,maxCacheBytes,cacheFileName)
+
+        cohort = readCohortCache(cacheFileName)
+
+    if stats is not None:
+        stats.addCount("cacheHits" if cacheHit else "cacheMisses")
+
+    return cohort
+
+def assignCohortCached(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,minTeamSize,maxTeamSize,
+    maxTeamsPerProject,leadersPerTeam,solver="greedy",timeLimit=10,restarts=8,seed=0,decompose=False,
+    cacheDirectory="cohortCache",maxCacheBytes=2**30,stats=None
+):
+    """
+    Same result as combined.loadCohort() followed by combined.assignCohort(). When the csv file was
+    assigned before with the same columns, constraints and solver settings, the cohort is memory-mapped
+    from its cache file and the teams are read from the result file, nothing is parsed or assigned
+
+    INPUT
+    stats: optional combined.RunStats, gets the resultCacheHits/resultCacheMisses counters
+    (and the counters of loadCohortCached() and combined.assignCohort() on a miss)
+
+    OUTPUT (tuple)
+    cohort, assignment, solverInfo: see combined.loadCohort() and combined.assignCohort()
+    """
+    os.makedirs(cacheDirectory,exist_ok=True)
+
+    with C.timeStage(stats,"readResultCache"):
+        fileHash = getCachedFileHash(cacheDirectory,inputCSVfilename)
+        cacheKey = getCacheKey(fileHash,interestColumnName,leaderColumnName,nameColumnName)
+        cacheFileName = os.path.join(cacheDirectory,cacheKey + CACHE_SUFFIX)
+        resultFileName = getResultFileName(cacheDirectory,fileHash,getResultKey(
+            cacheKey,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit,restarts,seed,decompose
+        ))
+        # the output csv is written from the cohort cache file, so a result is only used with it
+        resultHit = os.path.exists(resultFileName) and os.path.exists(cacheFileName)
+
+        if resultHit:
+            os.utime(resultFileName)
+            os.utime(cacheFileName)
+            cohort = readCohortCache(cacheFileName)
+            assignment, solverInfo = readResultCache(resultFileName)
+
+    if stats is not None:
+        stats.addCount("resultCacheHits" if resultHit else "resultCacheMisses")
+
+    if not resultHit:
+        cohort = loadCohortCached(
+            inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,cacheDirectory,maxCacheBytes,stats
+        )
+        assignment, solverInfo = C.assignCohort(
+            cohort,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit,restarts,seed,stats,decompose
+        )
+
+        with C.timeStage(stats,"writeResultCache"):
+            writeResultCache(resultFileName,assignment,solverInfo)
+            evictCache(cacheDirectory,maxCacheBytes,resultFileName,cacheFileName)
+
+    return cohort, assignment, solverInfo
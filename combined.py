@@ -1,4 +1,253 @@
-import csv
+import contextlib, cProfile, csv, heapq, json, mmap, os, time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from operator import itemgetter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# values stored in every preference cell, small enough to fit in an int8
+NO_INTEREST = 0
+MEMBER = 1
+LEADER = 2
+
+# bytes buffered before createCSVfile() writes to disk, and most unassigned rows it formats at once
+OUTPUT_BUFFER_SIZE = 2**20
+OUTPUT_CHUNK_ROWS = 1000
+
+class SparsePreferences:
+    """
+    CSR-style preference storage that only keeps the projects each student stated.
+    Student i owns projectIndices[rowStarts[i]:rowStarts[i+1]] (sorted) and the matching values.
+    preferences[studentIndex][projectIndex] works the same way as on the 2d list from addStudents()
+    """
+    __slots__ = ("projectCount","rowStarts","projectIndices","values")
+
+    def __init__(self,projectCount):
+        self.projectCount = projectCount
+        self.rowStarts = array("q",[0])
+        self.projectIndices = array("i")
+        self.values = array("b")
+
+    def addRow(self,projectValues):
+        """
+        projectValues: dict mapping projectIndex to value for one student, zero values are skipped
+        """
+        for projectIndex in sorted(projectValues):
+            if projectValues[projectIndex] != 0:
+                self.projectIndices.append(projectIndex)
+                self.values.append(projectValues[projectIndex])
+        self.rowStarts.append(len(self.projectIndices))
+
+    def getRow(self,studentIndex):
+        """
+        OUTPUT
+        list of (projectIndex,value) tuples for every project the student stated
+        """
+        start = self.rowStarts[studentIndex]
+        end = self.rowStarts[studentIndex + 1]
+        return list(zip(self.projectIndices[start:end],self.values[start:end]))
+
+    def getValue(self,studentIndex,projectIndex):
+        start = self.rowStarts[studentIndex]
+        end = self.rowStarts[studentIndex + 1]
+        position = bisect_left(self.projectIndices,projectIndex,start,end)
+
+        if position < end and self.projectIndices[position] == projectIndex:
+            return self.values[position]
+        return 0
+
+    def toDense(self):
+        """
+        OUTPUT
+        same 2d list that addStudents() would have made
+        """
+        dense = []
+        for studentIndex in range(len(self)):
+            row = [0] * self.projectCount
+            for projectIndex,value in self.getRow(studentIndex):
+                row[projectIndex] = value
+            dense.append(row)
+        return dense
+
+    def toArray(self):
+        """
+        OUTPUT
+        same numpy array that addStudentsArray() would have made (requires numpy)
+        """
+        preferences = np.zeros((len(self),self.projectCount),dtype=np.int8)
+
+        rowLengths = np.diff(np.frombuffer(self.rowStarts,dtype=np.int64))
+        studentIndices = np.repeat(np.arange(len(self)),rowLengths)
+        projectIndices = np.frombuffer(self.projectIndices,dtype=np.int32)
+
+        preferences[studentIndices,projectIndices] = np.frombuffer(self.values,dtype=np.int8)
+        return preferences
+
+    def getMemorySize(self):
+        """
+        OUTPUT
+        number of bytes used by the arrays holding the preferences
+        """
+        return sum(
+            len(column) * column.itemsize for column in (self.rowStarts,self.projectIndices,self.values)
+        )
+
+    def __len__(self):
+        return len(self.rowStarts) - 1
+
+    def __getitem__(self,studentIndex):
+        return SparseRow(self,studentIndex)
+
+class SparseRow:
+    """
+    Read-only view of one student in SparsePreferences, behaves like a row of the 2d list
+    """
+    __slots__ = ("preferences","studentIndex")
+
+    def __init__(self,preferences,studentIndex):
+        self.preferences = preferences
+        self.studentIndex = studentIndex
+
+    def __len__(self):
+        return self.preferences.projectCount
+
+    def __getitem__(self,projectIndex):
+        return self.preferences.getValue(self.studentIndex,projectIndex)
+
+class Cohort:
+    """
+    Everything loadCohort() builds from a csv file
+
+    headerNameToColumnIndex, records: kept columns of every row, see readStudentRecords() and
+    readMappedStudentRecords()
+    preferences: see encodeStudentRecords(), converted for the engine
+    studentNames: name of every person, in row order
+    projectNames: name of every project, in project index order
+    projectNameToIndex: dict mapping project names to their index
+    summary: see summarizePreferences()
+    interestIndex: see makeInterestIndex()
+    close() (or leaving a with block) closes the file the records are read from, if they are memory-mapped
+    """
+    __slots__ = (
+        "headerNameToColumnIndex","records","preferences","studentNames","projectNames","projectNameToIndex",
+        "summary","interestIndex"
+    )
+
+    def __init__(self,headerNameToColumnIndex,records,preferences,studentNames,projectNames,projectNameToIndex,
+        summary,interestIndex
+    ):
+        self.headerNameToColumnIndex = headerNameToColumnIndex
+        self.records = records
+        self.preferences = preferences
+        self.studentNames = studentNames
+        self.projectNames = projectNames
+        self.projectNameToIndex = projectNameToIndex
+        self.summary = summary
+        self.interestIndex = interestIndex
+
+    @property
+    def studentCount(self):
+        return len(self.studentNames)
+
+    @property
+    def projectCount(self):
+        return len(self.projectNames)
+
+    def close(self):
+        if hasattr(self.records,"close"):
+            self.records.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exceptionInfo):
+        self.close()
+
+class TeamAssignment:
+    """
+    Teams of one assignment as flat integer arrays instead of a dict of lists of lists.
+    Team t works on project teamProjects[t] and is made of teamMembers[teamStarts[t]:teamStarts[t+1]]
+    (leaders first). studentTeams[i] is the team of person i, -1 if they are unassigned.
+    projectOrder has the projects in the order of the teamsAssigned dict the assignment was made from
+    (including projects left with no team), the teams of every project are stored in that order
+    """
+    __slots__ = ("projectOrder","teamProjects","teamStarts","teamMembers","studentTeams","unluckyProjects")
+
+    def __init__(self,studentCount):
+        self.projectOrder = array("i")
+        self.teamProjects = array("i")
+        self.teamStarts = array("q",[0])
+        self.teamMembers = array("i")
+        self.studentTeams = array("i",[-1]) * studentCount
+        self.unluckyProjects = array("i")
+
+    @classmethod
+    def fromTeamsAssigned(cls,teamsAssigned,unluckyProjects,studentCount):
+        """
+        INPUT
+        teamsAssigned, unluckyProjects: results of assignPlayersToProjects() (or any other solver)
+        """
+        assignment = cls(studentCount)
+        assignment.unluckyProjects.extend(unluckyProjects)
+
+        for projectIndex,teams in teamsAssigned.items():
+            assignment.projectOrder.append(projectIndex)
+            for team in teams:
+                teamIndex = len(assignment.teamProjects)
+                assignment.teamProjects.append(projectIndex)
+                assignment.teamMembers.extend(team)
+                assignment.teamStarts.append(len(assignment.teamMembers))
+                for studentIndex in team:
+                    assignment.studentTeams[studentIndex] = teamIndex
+
+        return assignment
+
+    def __eq__(self,other):
+        return isinstance(other,TeamAssignment) and all(
+            getattr(self,slot) == getattr(other,slot) for slot in TeamAssignment.__slots__
+        )
+
+    @property
+    def teamCount(self):
+        return len(self.teamProjects)
+
+    @property
+    def sadPlayerCount(self):
+        return self.studentTeams.count(-1)
+
+    def getTeam(self,teamIndex):
+        return self.teamMembers[self.teamStarts[teamIndex]:self.teamStarts[teamIndex + 1]].tolist()
+
+    def getProjectTeams(self):
+        """
+        OUTPUT
+        generator of (projectIndex, list of teams) in the order of projectOrder, like teamsAssigned.items()
+        """
+        teamIndex = 0
+        for projectIndex in self.projectOrder:
+            teams = []
+            while teamIndex < len(self.teamProjects) and self.teamProjects[teamIndex] == projectIndex:
+                teams.append(self.getTeam(teamIndex))
+                teamIndex += 1
+            yield projectIndex, teams
+
+    def getTeamsAssigned(self):
+        """
+        OUTPUT
+        same dict as teamsAssigned from assignPlayersToProjects()
+        """
+        return dict(self.getProjectTeams())
+
+    def getSadList(self):
+        """
+        OUTPUT
+        ascending list of the people that are not in a team
+        """
+        return [studentIndex for studentIndex,teamIndex in enumerate(self.studentTeams) if teamIndex < 0]
 
 def getFileMatrix(fileName):
     """
@@ -17,6 +266,22 @@ def getFileMatrix(fileName):
         
         return matrix
 
+def decodeFileLine(line):
+    """
+    OUTPUT
+    line of a file opened in binary mode as text, with "\r\n" and "\r" turned into "\n" like
+    open(fileName,"r") does, so values that span several lines are the same for every reader
+    """
+    return str(line,"utf-8").replace("\r\n","\n").replace("\r","\n")
+
+def streamFileRows(fileName):
+    """
+    Generator version of getFileMatrix(), yields one row of the csv file at a time
+    """
+    with open(fileName,"r") as csvfile:
+        for row in csv.reader(csvfile):
+            yield row
+
 def getHeaderNameToColumnIndex(matrix):
     """
     INPUT:
@@ -63,6 +328,145 @@ def convertToProperCSV(inputMatrixMinusHeaders,headerNameToColumnIndex,interestC
             inputMatrixMinusHeaders[rowIndex][interestColumnIndex] = separateBySemicolons(interestInfo)
             inputMatrixMinusHeaders[rowIndex][leaderColumnIndex] = separateBySemicolons(leaderInfo)
 
+def streamStudentRecords(fileName,interestColumnName,leaderColumnName,columnNames,normalize=True):
+    """
+    INPUT
+    fileName: name of csv file
+    columnNames: names of other columns to keep (interest and leader columns are always kept)
+    normalize: if False, interest/leader values are kept as written (encodeStudentRecords() splits them itself)
+
+    OUTPUT (generator)
+    first yields headerNameToColumnIndex for the kept columns, then one tuple per student containing
+    only the kept columns. Interest/leader values are separated by semicolons like convertToProperCSV()
+    """
+    rows = streamFileRows(fileName)
+    sourceHeaderNameToColumnIndex = getHeaderNameToColumnIndex([next(rows)])
+
+    keptColumnNames = list(dict.fromkeys([interestColumnName,leaderColumnName] + list(columnNames)))
+    sourceColumnIndices = [sourceHeaderNameToColumnIndex[columnName] for columnName in keptColumnNames]
+
+    yield getHeaderNameToColumnIndex([keptColumnNames])
+
+    for row in rows:
+        record = [row[columnIndex] for columnIndex in sourceColumnIndices]
+
+        if not normalize:
+            yield tuple(record)
+            continue
+
+        interestInfo = record[0]
+        leaderInfo = record[1]
+
+        if len(interestInfo.split(";")) == 1 or len(leaderInfo.split(";")) == 1:
+            record[0] = separateBySemicolons(interestInfo)
+            record[1] = separateBySemicolons(leaderInfo)
+
+        yield tuple(record)
+
+def readStudentRecords(fileName,interestColumnName,leaderColumnName,columnNames,normalize=True):
+    """
+    OUTPUT (tuple)
+    headerNameToColumnIndex: dict mapping kept column names to their index in each record
+    records: list of records from streamStudentRecords(), can be used in place of inputMatrixMinusHeaders
+    """
+    records = streamStudentRecords(fileName,interestColumnName,leaderColumnName,columnNames,normalize)
+    headerNameToColumnIndex = next(records)
+    return headerNameToColumnIndex, list(records)
+
+class MappedRecords:
+    """
+    Rows of a memory-mapped csv file from readMappedStudentRecords(). Only the kept columns are stored
+    (keptRecords, indexed with keptHeaderNameToColumnIndex), any other column is parsed from the file
+    when it is used. records[rowIndex][columnIndex] takes column indices of the whole file.
+    close() (or leaving a with block) unmaps the file, columns that were not kept can't be read after that
+    """
+    def __init__(self,mappedFile,rowOffsets,keptRecords,keptHeaderNameToColumnIndex,keptColumnIndices):
+        self.mappedFile = mappedFile
+        self.rowOffsets = rowOffsets
+        self.keptRecords = keptRecords
+        self.keptHeaderNameToColumnIndex = keptHeaderNameToColumnIndex
+        self.keptPositions = {columnIndex: position for position,columnIndex in enumerate(keptColumnIndices)}
+
+    def __len__(self):
+        return len(self.keptRecords)
+
+    def __getitem__(self,rowIndex):
+        return MappedRow(self,rowIndex)
+
+    def close(self):
+        self.mappedFile.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exceptionInfo):
+        self.close()
+
+    def getFileRow(self,rowIndex):
+        """
+        OUTPUT
+        every column of the row, parsed from the bytes between its offset and the next one
+        """
+        rowText = decodeFileLine(self.mappedFile[self.rowOffsets[rowIndex]:self.rowOffsets[rowIndex + 1]])
+        return next(csv.reader(rowText.splitlines(keepends=True)))
+
+class MappedRow:
+    """
+    One row of MappedRecords, the whole row is parsed (once) only if a column that was not kept is used
+    """
+    def __init__(self,records,rowIndex):
+        self.records = records
+        self.rowIndex = rowIndex
+        self.fileRow = None
+
+    def __getitem__(self,columnIndex):
+        position = self.records.keptPositions.get(columnIndex)
+        if position is not None:
+            return self.records.keptRecords[self.rowIndex][position]
+
+        if self.fileRow is None:
+            self.fileRow = self.records.getFileRow(self.rowIndex)
+        return self.fileRow[columnIndex]
+
+def readMappedStudentRecords(fileName,interestColumnName,leaderColumnName,columnNames):
+    """
+    Reads a csv file through a memory map, keeping only the given columns and the byte offset of every row
+
+    INPUT
+    columnNames: names of other columns to keep (interest and leader columns are always kept)
+
+    OUTPUT (tuple)
+    headerNameToColumnIndex: dict mapping every column name of the file to its index
+    records: MappedRecords, records.keptRecords holds the kept columns (raw, not normalized) of every row
+    """
+    with open(fileName,"rb") as file:
+        mappedFile = mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ)
+
+    def readLines():
+        for line in iter(mappedFile.readline,b""):
+            yield decodeFileLine(line)
+
+    # csv.reader only asks for the lines of one row at a time, so the position before each row is its offset
+    reader = csv.reader(readLines())
+    headerNameToColumnIndex = getHeaderNameToColumnIndex([next(reader)])
+
+    keptColumnNames = list(dict.fromkeys([interestColumnName,leaderColumnName] + list(columnNames)))
+    keptColumnIndices = [headerNameToColumnIndex[columnName] for columnName in keptColumnNames]
+    getKeptColumns = itemgetter(*keptColumnIndices) if len(keptColumnIndices) > 1 else (
+        lambda row: (row[keptColumnIndices[0]],)
+    )
+
+    rowOffsets = array("q",[mappedFile.tell()])
+    keptRecords = []
+    for row in reader:
+        keptRecords.append(getKeptColumns(row))
+        rowOffsets.append(mappedFile.tell())
+
+    records = MappedRecords(
+        mappedFile,rowOffsets,keptRecords,getHeaderNameToColumnIndex([keptColumnNames]),keptColumnIndices
+    )
+    return headerNameToColumnIndex, records
+
 def findAllProjects(inputMatrixMinusHeaders,headerNameToColumnIndex,interestColumnName,leaderColumnName):
     """
     INPUT:
@@ -117,29 +521,89 @@ def makeProjectAssociations(projectNames):
     
     return (projectNameToIndex,indexToProjectName)
 
-def getLeaderValue(inputMatrixMinusHeaders):
+def splitProjectCells(interestInfo,leaderInfo):
     """
-    Finds leader value in order to differentiate between students and leaders. Leader
-    value is guaranteed to be greater than the total number of students. Minimum value
-    is 10.
+    OUTPUT (tuple)
+    (interestProjects, leaderProjects): lists of stripped project names in each cell, same result as
+    convertToProperCSV() followed by splitting on semicolons
     """
-    totalStudents = len(inputMatrixMinusHeaders)
-    leaderValue = 10
+    if ";" in interestInfo and ";" in leaderInfo:
+        separator = ";"
+    else:
+        separator = ","
+        interestInfo = interestInfo.replace(";",",")
+        leaderInfo = leaderInfo.replace(";",",")
 
-    while leaderValue < totalStudents:
-        leaderValue *= 10
-    
-    return leaderValue
+    interestProjects = [name.strip() for name in interestInfo.split(separator)] if interestInfo != '' else []
+    leaderProjects = [name.strip() for name in leaderInfo.split(separator)] if leaderInfo != '' else []
+
+    return interestProjects, leaderProjects
+
+def encodeStudentRecords(records,headerNameToColumnIndex,interestColumnName,leaderColumnName,nameColumnName):
+    """
+    Single pass replacement for convertToProperCSV(), findAllProjects(), makeProjectAssociations() and
+    addStudents(). Every interest/leader cell is split once, projects get an id the first time their
+    name appears and are renumbered in sorted order at the end so results don't depend on row order
+
+    INPUT
+    records: rows of the csv file without the header (2d list, or records from streamStudentRecords())
+
+    OUTPUT (tuple)
+    preferences: SparsePreferences, use toDense() or toArray() for the other engines
+    studentNames: list of student names, in row order
+    projectNameToIndex: same dict makeProjectAssociations() returns
+    projectNames: list of project names, in project index order
+    """
+    nameColumnIndex = headerNameToColumnIndex[nameColumnName]
+    interestColumnIndex = headerNameToColumnIndex[interestColumnName]
+    leaderColumnIndex = headerNameToColumnIndex[leaderColumnName]
+
+    studentNames = []
+    firstSeenProjectIds = {}
+
+    rowStarts = array("q",[0])
+    projectIds = array("i")
+    values = array("b")
+
+    for record in records:
+        studentNames.append(record[nameColumnIndex])
+
+        interestProjects, leaderProjects = splitProjectCells(record[interestColumnIndex],record[leaderColumnIndex])
+
+        projectValues = {}
+        for projectName in interestProjects:
+            projectValues[firstSeenProjectIds.setdefault(projectName,len(firstSeenProjectIds))] = MEMBER
+        for projectName in leaderProjects:
+            projectValues[firstSeenProjectIds.setdefault(projectName,len(firstSeenProjectIds))] = LEADER
+
+        projectIds.extend(projectValues.keys())
+        values.extend(projectValues.values())
+        rowStarts.append(len(projectIds))
+
+    projectNames = sorted(firstSeenProjectIds)
+    projectNameToIndex = {projectName: projectIndex for projectIndex,projectName in enumerate(projectNames)}
+
+    firstSeenToSorted = array("i",[0] * len(firstSeenProjectIds))
+    for projectName,projectId in firstSeenProjectIds.items():
+        firstSeenToSorted[projectId] = projectNameToIndex[projectName]
+
+    preferences = SparsePreferences(len(projectNameToIndex))
+    for studentIndex in range(len(rowStarts) - 1):
+        start = rowStarts[studentIndex]
+        end = rowStarts[studentIndex + 1]
+        preferences.addRow({
+            firstSeenToSorted[projectIds[position]]: values[position] for position in range(start,end)
+        })
+
+    return preferences, studentNames, projectNameToIndex, projectNames
 
 def addStudents(inputMatrixMinusHeaders,projectNamesToColumnIndex,headerNameToColumnIndex,
-    leaderValue,interestColumnName,leaderColumnName,nameColumnName
+    interestColumnName,leaderColumnName,nameColumnName
 ):
     """
-    INPUT
-    leaderValue: value added to interested leaders for a certain project (to differentiate between normal students)
     OUTPUT
     preferences: 2d list where each student represents a student and each column represents a project.
-    0 = no interest, 1 = interest, leaderValue + 1 = interested in leading project
+    NO_INTEREST (0) = no interest, MEMBER (1) = interest, LEADER (2) = interested in leading project
     studentRowIndexToStudentName: Dict mapping student names to the corresponding row index in preferences matrix
     """
     studentRowIndexToStudentName = {}
@@ -171,33 +635,161 @@ def addStudents(inputMatrixMinusHeaders,projectNamesToColumnIndex,headerNameToCo
             leaderProjectsList = []
 
         for studentProject in interestProjectsList:
-            personSummary[projectNamesToColumnIndex[studentProject]] = 1
+            personSummary[projectNamesToColumnIndex[studentProject]] = MEMBER
         
         for leaderProject in leaderProjectsList:
-            personSummary[projectNamesToColumnIndex[leaderProject]] = leaderValue + 1
+            personSummary[projectNamesToColumnIndex[leaderProject]] = LEADER
 
         preferences.append(personSummary)
     
     return preferences, studentRowIndexToStudentName
 
+def addStudentsArray(inputMatrixMinusHeaders,projectNamesToColumnIndex,headerNameToColumnIndex,
+    interestColumnName,leaderColumnName,nameColumnName
+):
+    """
+    Same as addStudents() but preferences is built as a single numpy int8 array (requires numpy)
+    OUTPUT
+    preferences: 2d numpy array, rows are students and columns are projects
+    studentRowIndexToStudentName: Dict mapping row index in preferences to student names
+    """
+    studentRowIndexToStudentName = {}
+
+    totalProjects = len(projectNamesToColumnIndex.keys())
+
+    nameColumnIndex = headerNameToColumnIndex[nameColumnName]
+    interestColumnIndex = headerNameToColumnIndex[interestColumnName]
+    leaderColumnIndex = headerNameToColumnIndex[leaderColumnName]
+
+    interestRows, interestColumns = [], []
+    leaderRows, leaderColumns = [], []
+
+    for studentIndex,studentRow in enumerate(inputMatrixMinusHeaders):
+        studentRowIndexToStudentName[studentIndex] = studentRow[nameColumnIndex]
+
+        interestProjects = studentRow[interestColumnIndex]
+        leaderProjects = studentRow[leaderColumnIndex]
+
+        if interestProjects != '':
+            for studentProject in interestProjects.split(";"):
+                interestRows.append(studentIndex)
+                interestColumns.append(projectNamesToColumnIndex[studentProject])
+
+        if leaderProjects != '':
+            for leaderProject in leaderProjects.split(";"):
+                leaderRows.append(studentIndex)
+                leaderColumns.append(projectNamesToColumnIndex[leaderProject])
+
+    preferences = np.zeros((len(inputMatrixMinusHeaders),totalProjects),dtype=np.int8)
+
+    # leaders are written last so that they override plain interest, same as addStudents()
+    preferences[interestRows,interestColumns] = MEMBER
+    preferences[leaderRows,leaderColumns] = LEADER
+
+    return preferences, studentRowIndexToStudentName
+
+def addStudentsSparse(inputMatrixMinusHeaders,projectNamesToColumnIndex,headerNameToColumnIndex,
+    interestColumnName,leaderColumnName,nameColumnName
+):
+    """
+    Same as addStudents() but preferences is stored as SparsePreferences, so memory grows with the
+    number of stated preferences instead of students * projects
+    """
+    studentRowIndexToStudentName = {}
+
+    nameColumnIndex = headerNameToColumnIndex[nameColumnName]
+    interestColumnIndex = headerNameToColumnIndex[interestColumnName]
+    leaderColumnIndex = headerNameToColumnIndex[leaderColumnName]
+
+    preferences = SparsePreferences(len(projectNamesToColumnIndex.keys()))
+
+    for studentIndex,studentRow in enumerate(inputMatrixMinusHeaders):
+        studentRowIndexToStudentName[studentIndex] = studentRow[nameColumnIndex]
+
+        interestProjects = studentRow[interestColumnIndex]
+        leaderProjects = studentRow[leaderColumnIndex]
+
+        projectValues = {}
+
+        if interestProjects != '':
+            for studentProject in interestProjects.split(";"):
+                projectValues[projectNamesToColumnIndex[studentProject]] = MEMBER
+
+        if leaderProjects != '':
+            for leaderProject in leaderProjects.split(";"):
+                projectValues[projectNamesToColumnIndex[leaderProject]] = LEADER
+
+        preferences.addRow(projectValues)
+
+    return preferences, studentRowIndexToStudentName
+
+def getSummaryKey(projectSummary):
+    """
+    Projects with the fewest interested leaders come first, ties are broken by the total
+    number of interested people
+    """
+    return (projectSummary[1],projectSummary[1] + projectSummary[2])
+
 def summarizePreferences(preferences):
     """
     OUTPUT
-    summary: sorted list of tuples where each tuple contains projectNumber and the total interest in project.
-    List is stored by total interest.
+    summary: sorted list where each element is [projectNumber, leaderCount, memberCount]
+    leaderCount: number of people interested in leading the project
+    memberCount: number of people only interested in being a member of the project
+    List is sorted with getSummaryKey()
     """
+    if isinstance(preferences,SparsePreferences):
+        return summarizeSparsePreferences(preferences)
+
     summary = []
 
     for projectNum in range(len(preferences[0])):
-        projectSummary = [projectNum,0]
+        projectSummary = [projectNum,0,0]
         for studentNum in range(len(preferences)):
-            if preferences[studentNum][projectNum] > 0:
-                projectSummary[1] += preferences[studentNum][projectNum]
+            if preferences[studentNum][projectNum] == LEADER:
+                projectSummary[1] += 1
+            elif preferences[studentNum][projectNum] == MEMBER:
+                projectSummary[2] += 1
         summary.append(projectSummary)
     
-    summary.sort(key = lambda x: x[1])
+    summary.sort(key = getSummaryKey)
     return summary
 
+def summarizeSparsePreferences(preferences):
+    """
+    Same as summarizePreferences() but only visits stated preferences of SparsePreferences
+    """
+    leaderCounts = [0] * preferences.projectCount
+    memberCounts = [0] * preferences.projectCount
+
+    for projectIndex,value in zip(preferences.projectIndices,preferences.values):
+        if value == LEADER:
+            leaderCounts[projectIndex] += 1
+        elif value == MEMBER:
+            memberCounts[projectIndex] += 1
+
+    summary = [
+        [projectNum,leaderCounts[projectNum],memberCounts[projectNum]]
+        for projectNum in range(preferences.projectCount)
+    ]
+    summary.sort(key = getSummaryKey)
+    return summary
+
+def summarizePreferencesArray(preferences):
+    """
+    Same as summarizePreferences() but for a numpy preference array made by addStudentsArray().
+    Counts are computed with column reductions and ordered with a stable lexsort so ties
+    keep the same order as summarizePreferences()
+    """
+    leaderCounts = (preferences == LEADER).sum(axis=0)
+    memberCounts = (preferences == MEMBER).sum(axis=0)
+    order = np.lexsort((leaderCounts + memberCounts,leaderCounts))
+
+    return [
+        [int(projectNum),int(leaderCounts[projectNum]),int(memberCounts[projectNum])]
+        for projectNum in order
+    ]
+
 def findBestSplit(count,minSize,maxSize):
     """
     INPUT:
@@ -229,8 +821,111 @@ def findBestSplit(count,minSize,maxSize):
 
     return (bestSize,bestRemainder)
 
-def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leaderValue,leadersPerTeam=1):
+def makeInterestIndex(preferences):
+    """
+    INPUT
+    preferences: 2d list, numpy array or SparsePreferences made by one of the addStudents functions
+    OUTPUT
+    interestIndex: list where interestIndex[projectIndex] is a tuple (students, leaders) of the row indices
+    interested in the project as a MEMBER or as a LEADER, both ascending
+    """
+    if isinstance(preferences,SparsePreferences):
+        projectCount = preferences.projectCount
+    elif len(preferences) > 0:
+        projectCount = len(preferences[0])
+    else:
+        projectCount = 0
+
+    interestIndex = [([],[]) for _ in range(projectCount)]
+
+    if isinstance(preferences,SparsePreferences):
+        for studentIndex in range(len(preferences)):
+            for projectIndex,value in preferences.getRow(studentIndex):
+                if value == MEMBER:
+                    interestIndex[projectIndex][0].append(studentIndex)
+                elif value == LEADER:
+                    interestIndex[projectIndex][1].append(studentIndex)
+
+    elif np is not None and isinstance(preferences,np.ndarray):
+        # np.nonzero walks the array row by row, so students stay ascending within every project
+        for channel,code in ((0,MEMBER),(1,LEADER)):
+            studentIndices, projectIndices = np.nonzero(preferences == code)
+            for studentIndex,projectIndex in zip(studentIndices.tolist(),projectIndices.tolist()):
+                interestIndex[projectIndex][channel].append(studentIndex)
+
+    else:
+        for studentIndex,row in enumerate(preferences):
+            for projectIndex,value in enumerate(row):
+                if value == MEMBER:
+                    interestIndex[projectIndex][0].append(studentIndex)
+                elif value == LEADER:
+                    interestIndex[projectIndex][1].append(studentIndex)
+
+    return interestIndex
+
+def makeProjectTeams(studentsReady,leadersReady,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam):
+    """
+    INPUT
+    studentsReady, leadersReady: available people interested in the project as member/leader
+
+    OUTPUT (tuple)
+    teamsCreated: list of teams (leaders first) for the project, at most maxTeamsPerProject
+    teamsDropped: number of teams left out because of maxTeamsPerProject
+    teamsReleased: 1 if the last team was too small and its people were left available, 0 otherwise
     """
+    # find best combo
+    groupMin, remainder = findBestSplit(
+        len(studentsReady)+len(leadersReady),
+        minTeamSize,
+        maxTeamSize
+    )
+    
+    teamsCreated = []
+    currentStudent = 0
+    currentLeader = 0
+    
+    while (leadersPerTeam == 0 or currentLeader < len(leadersReady)) and len(leadersReady) - currentLeader >= leadersPerTeam:
+        newTeam = []
+        # add specified number of leaders to team
+        for _ in range(leadersPerTeam):
+            newTeam.append(leadersReady[currentLeader])
+            currentLeader += 1
+        
+        # fill in the rest of the spots with students
+        lastPlayer = currentStudent + groupMin - leadersPerTeam
+        if remainder > 0:
+            lastPlayer += 1
+            remainder -= 1
+        newTeam += studentsReady[currentStudent:lastPlayer]
+        currentStudent = lastPlayer
+
+        # if no students left, but there are more leaders left, convert them to students
+        if len(newTeam) < groupMin:
+            lastLeader = currentLeader + groupMin - len(newTeam) - 1
+            newTeam += leadersReady[currentLeader:lastLeader + 1]
+            currentLeader = lastLeader + 1
+
+        teamsCreated.append(newTeam)
+    
+    # delete teams if too many
+    teamsDropped = max(len(teamsCreated) - maxTeamsPerProject,0)
+    teamsCreated = teamsCreated[:maxTeamsPerProject]
+
+    # release last team if not enough members (its people were not taken yet)
+    teamsReleased = 0
+    if teamsCreated and len(teamsCreated[-1]) < minTeamSize:
+        teamsCreated.pop()
+        teamsReleased = 1
+
+    return teamsCreated, teamsDropped, teamsReleased
+
+def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam=1,interestIndex=None,stats=None
+):
+    """
+    INPUT
+    interestIndex: result of makeInterestIndex(preferences), made here if not given
+    stats: optional RunStats, gets the candidateScans, teamsCreated, teamsDropped and teamsReleased counters
     OUTPUT (tuple)
     unluckyProjects: list of projects that do not have any teams working on them
     teamsAssigned: dict that contains all projects, and the teams that will be working on them
@@ -238,77 +933,41 @@ def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeam
     """
 
     # each index in peopleTaken represents person, 1 => person has project
-    peopleTaken = [0] * studentCount
+    peopleTaken = bytearray(studentCount)
     unluckyProjects = []
     teamsAssigned = {}
 
-    minTeamSizeValue = leadersPerTeam * leaderValue + minTeamSize
+    if interestIndex is None:
+        interestIndex = makeInterestIndex(preferences)
+
+    candidateScans = 0
+    teamsDropped = 0
+    teamsReleased = 0
     
     for currentSummaryI in range(len(summary)):
         projectSummary = summary[currentSummaryI]
 
         # no way team can be made if not enough interest (in general)
-        if projectSummary[1] < minTeamSizeValue:
+        if projectSummary[1] < leadersPerTeam or projectSummary[1] + projectSummary[2] < minTeamSize:
             unluckyProjects.append(projectSummary[0])
         else:
-            studentsReady = []
-            leadersReady = []
+            interestedStudents, interestedLeaders = interestIndex[projectSummary[0]]
+            candidateScans += len(interestedStudents) + len(interestedLeaders)
 
             # find all students and leaders interested in project (and are available)
-            for studentIndex in range(len(preferences)):
-                if peopleTaken[studentIndex] == 0:
-                    if preferences[studentIndex][projectSummary[0]] == 1: 
-                        studentsReady.append(studentIndex)
-                    elif preferences[studentIndex][projectSummary[0]] == leaderValue + 1:
-                        leadersReady.append(studentIndex)
+            studentsReady = [studentIndex for studentIndex in interestedStudents if peopleTaken[studentIndex] == 0]
+            leadersReady = [studentIndex for studentIndex in interestedLeaders if peopleTaken[studentIndex] == 0]
 
             # check if there is enough available people to make a team, otherwise project is not happening
             if len(studentsReady) + len(leadersReady) < minTeamSize:
                 unluckyProjects.append(projectSummary[0])
                 continue
 
-            # find best combo
-            groupMin, remainder = findBestSplit(
-                len(studentsReady)+len(leadersReady),
-                minTeamSize,
-                maxTeamSize
+            teamsCreated, dropped, released = makeProjectTeams(
+                studentsReady,leadersReady,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam
             )
-            
-            teamsCreated = []
-            currentStudent = 0
-            currentLeader = 0
-            
-            while (leadersPerTeam == 0 or currentLeader < len(leadersReady)) and len(leadersReady) - currentLeader >= leadersPerTeam:
-                newTeam = []
-                # add specified number of leaders to team
-                for _ in range(leadersPerTeam):
-                    newTeam.append(leadersReady[currentLeader])
-                    currentLeader += 1
-                
-                # fill in the rest of the spots with students
-                lastPlayer = currentStudent + groupMin - leadersPerTeam
-                if remainder > 0:
-                    lastPlayer += 1
-                    remainder -= 1
-                newTeam += studentsReady[currentStudent:lastPlayer]
-                currentStudent = lastPlayer
-
-                # if no students left, but there are more leaders left, convert them to students
-                if len(newTeam) < groupMin:
-                    lastLeader = currentLeader + groupMin - len(newTeam) - 1
-                    newTeam += leadersReady[currentLeader:lastLeader + 1]
-                    currentLeader = lastLeader + 1
-
-                teamsCreated.append(newTeam)
-            
-            # delete teams if too many
-            teamsCreated = teamsCreated[:maxTeamsPerProject]
-
-            # release last team if not enough members
-            if teamsCreated and len(teamsCreated[-1]) < minTeamSize:
-                for studentIndex in teamsCreated[-1]:
-                    peopleTaken[studentIndex] = 0
-                teamsCreated.pop()
+            teamsDropped += dropped
+            teamsReleased += released
 
             # change status of students in project to taken
             for team in teamsCreated:
@@ -324,9 +983,175 @@ def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeam
     for index in range(len(peopleTaken)):
         if peopleTaken[index] == 0:
             sadList.append(index)
+
+    if stats is not None:
+        stats.addCount("candidateScans",candidateScans)
+        stats.addCount("teamsCreated",sum(len(teams) for teams in teamsAssigned.values()))
+        stats.addCount("teamsDropped",teamsDropped)
+        stats.addCount("teamsReleased",teamsReleased)
     
     return unluckyProjects,teamsAssigned,sadPlayerCount,sadList
 
+def makePersonIndex(interestIndex,studentCount):
+    """
+    Inverse of makeInterestIndex(), for every person the projects they picked
+    (same layout as the arrays of SparsePreferences)
+
+    OUTPUT (tuple of arrays)
+    personStarts: person i picked personProjects[personStarts[i]:personStarts[i+1]]
+    personProjects: project indices
+    personValues: MEMBER or LEADER for every entry of personProjects
+    """
+    pickCounts = [0] * (studentCount + 1)
+    for interestedStudents, interestedLeaders in interestIndex:
+        for studentIndex in interestedStudents:
+            pickCounts[studentIndex + 1] += 1
+        for studentIndex in interestedLeaders:
+            pickCounts[studentIndex + 1] += 1
+
+    for studentIndex in range(studentCount):
+        pickCounts[studentIndex + 1] += pickCounts[studentIndex]
+    personStarts = array("q",pickCounts)
+
+    personProjects = array("i",bytes(4 * pickCounts[-1]))
+    personValues = array("b",bytes(pickCounts[-1]))
+    nextSlot = pickCounts[:-1]
+    for projectIndex,(interestedStudents,interestedLeaders) in enumerate(interestIndex):
+        for studentIndex in interestedStudents:
+            personProjects[nextSlot[studentIndex]] = projectIndex
+            personValues[nextSlot[studentIndex]] = MEMBER
+            nextSlot[studentIndex] += 1
+        for studentIndex in interestedLeaders:
+            personProjects[nextSlot[studentIndex]] = projectIndex
+            personValues[nextSlot[studentIndex]] = LEADER
+            nextSlot[studentIndex] += 1
+
+    return personStarts, personProjects, personValues
+
+def assignPlayersToProjectsDynamic(summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam=1,interestIndex=None,stats=None
+):
+    """
+    Same as assignPlayersToProjects() but the next project is always the one that is scarcest right now:
+    the project order uses getSummaryKey() on the number of leaders/members that are still available
+    instead of everyone who picked it. The projects are kept in a heap, when a person is placed every
+    other project they picked gets a new entry with its lower counts (O(log P) each) and outdated
+    entries are skipped when they come up. Ties keep the order of summary
+
+    This order is a heuristic: on generated cohorts it places more people than the summary order about as
+    often as it places fewer, so assignPlayersToProjects() is run too and its result is kept when it is
+    better (fewest unassigned people, then fewest unlucky projects). The result is never worse than the
+    greedy one and costs about one more greedy run
+
+    INPUT/OUTPUT
+    same as assignPlayersToProjects(), teamsAssigned lists the projects in the order they got their teams
+    and a project is unlucky whenever no team could be made for it.
+    stats also gets the heapUpdates counter (of the dynamic order) and greedyKept (1 when the greedy
+    result was better)
+    """
+    if interestIndex is None:
+        interestIndex = makeInterestIndex(preferences)
+
+    if isinstance(preferences,SparsePreferences):
+        personStarts, personProjects, personValues = preferences.rowStarts, preferences.projectIndices, preferences.values
+    else:
+        personStarts, personProjects, personValues = makePersonIndex(interestIndex,studentCount)
+
+    # current number of available leaders/members of every project
+    leadersLeft = [0] * len(interestIndex)
+    membersLeft = [0] * len(interestIndex)
+    summaryPosition = [0] * len(interestIndex)
+    for position,projectSummary in enumerate(summary):
+        leadersLeft[projectSummary[0]] = projectSummary[1]
+        membersLeft[projectSummary[0]] = projectSummary[2]
+        summaryPosition[projectSummary[0]] = position
+
+    # summary is sorted by getSummaryKey() already, so this list is a valid heap
+    heap = [
+        (projectSummary[1],projectSummary[1] + projectSummary[2],position,projectSummary[0])
+        for position,projectSummary in enumerate(summary)
+    ]
+    done = [False] * len(interestIndex)
+
+    peopleTaken = bytearray(studentCount)
+    unluckyProjects = []
+    teamsAssigned = {}
+
+    candidateScans = 0
+    teamsDropped = 0
+    teamsReleased = 0
+    heapUpdates = 0
+
+    while heap:
+        leaderCount, totalCount, _, projectIndex = heapq.heappop(heap)
+        if done[projectIndex] or leaderCount != leadersLeft[projectIndex] or \
+            totalCount != leadersLeft[projectIndex] + membersLeft[projectIndex]:
+            continue
+        done[projectIndex] = True
+
+        # counts are exact, no need to look at the people if they can't make a team
+        if leaderCount < leadersPerTeam or totalCount < minTeamSize:
+            unluckyProjects.append(projectIndex)
+            continue
+
+        interestedStudents, interestedLeaders = interestIndex[projectIndex]
+        candidateScans += len(interestedStudents) + len(interestedLeaders)
+
+        studentsReady = [studentIndex for studentIndex in interestedStudents if peopleTaken[studentIndex] == 0]
+        leadersReady = [studentIndex for studentIndex in interestedLeaders if peopleTaken[studentIndex] == 0]
+
+        teamsCreated, dropped, released = makeProjectTeams(
+            studentsReady,leadersReady,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam
+        )
+        teamsDropped += dropped
+        teamsReleased += released
+
+        if not teamsCreated:
+            unluckyProjects.append(projectIndex)
+            continue
+
+        changedProjects = set()
+        for team in teamsCreated:
+            for person in team:
+                peopleTaken[person] = 1
+                for slot in range(personStarts[person],personStarts[person + 1]):
+                    otherProject = personProjects[slot]
+                    if personValues[slot] == LEADER:
+                        leadersLeft[otherProject] -= 1
+                    else:
+                        membersLeft[otherProject] -= 1
+                    if not done[otherProject]:
+                        changedProjects.add(otherProject)
+
+        for otherProject in changedProjects:
+            heapq.heappush(heap,(
+                leadersLeft[otherProject],leadersLeft[otherProject] + membersLeft[otherProject],
+                summaryPosition[otherProject],otherProject
+            ))
+        heapUpdates += len(changedProjects)
+
+        teamsAssigned[projectIndex] = teamsCreated
+
+    unluckyProjects.sort()
+    sadList = [studentIndex for studentIndex in range(studentCount) if peopleTaken[studentIndex] == 0]
+
+    if stats is not None:
+        stats.addCount("candidateScans",candidateScans)
+        stats.addCount("teamsCreated",sum(len(teams) for teams in teamsAssigned.values()))
+        stats.addCount("teamsDropped",teamsDropped)
+        stats.addCount("teamsReleased",teamsReleased)
+        stats.addCount("heapUpdates",heapUpdates)
+
+    greedyResult = assignPlayersToProjects(
+        summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex
+    )
+    if (greedyResult[2],len(greedyResult[0])) < (len(sadList),len(unluckyProjects)):
+        if stats is not None:
+            stats.addCount("greedyKept")
+        return greedyResult
+
+    return unluckyProjects,teamsAssigned,len(sadList),sadList
+
 def getStudentInfo(fileMatrixWithoutHeaders,studentIndex,headerAssociations,columnsToInclude):
     """
     INPUT
@@ -350,6 +1175,41 @@ def getStudentInfo(fileMatrixWithoutHeaders,studentIndex,headerAssociations,colu
     result = '"' + separator.join(studentDetails) + '"'
     return result
 
+def getStudentRowGetter(headerNameToColumnIndex,columnsToInclude):
+    """
+    OUTPUT
+    function that takes a row of the matrix and returns the values of columnsToInclude as a tuple.
+    Column indices are looked up once instead of once per student like getStudentInfo()
+    """
+    columnIndices = [headerNameToColumnIndex[columnName] for columnName in columnsToInclude]
+
+    if len(columnIndices) == 0:
+        return lambda row: ("",)
+    if len(columnIndices) == 1:
+        columnIndex = columnIndices[0]
+        return lambda row: (row[columnIndex],)
+    return itemgetter(*columnIndices)
+
+def formatStudentRows(rows):
+    """
+    INPUT
+    rows: list of tuples of values from getStudentRowGetter(), all the same length
+
+    OUTPUT (string)
+    rows as csv lines with every value quoted, same as csv.writer with csv.QUOTE_ALL.
+    All rows are joined at once and values are only escaped when the result has quotes
+    that are not added here, which is a lot faster than csv.writer for rows without them
+    """
+    if len(rows) == 0:
+        return ""
+
+    text = '"\n"'.join(['","'.join(row) for row in rows])
+
+    if text.count('"') != len(rows) * 2 * (len(rows[0]) - 1) + 2 * (len(rows) - 1):
+        text = '"\n"'.join(['","'.join([value.replace('"','""') for value in row]) for row in rows])
+
+    return f'"{text}"\n'
+
 def createCSVfile(
     fileName,teamsAssigned,matrixMinusHeader,projectIndexToProjectName,
     headerNameToColumnIndex,columnsToInclude, sadList
@@ -357,81 +1217,413 @@ def createCSVfile(
     """
     INPUT:
     fileName: name of file to create with output
-    teamsAssigned: dict of all projects and the teams working on each
+    teamsAssigned: dict of all projects and the teams working on each, or a TeamAssignment
+    projectIndexToProjectName: dict or list of project names by index
     columnsToInclude: student responses to theses questions will be included in output
 
     OUTPUT: 
-    None: CSV file is created with students listed under their assigned project
+    None: CSV file is created with students listed under their assigned project.
+    Student rows are formatted with formatStudentRows() and written a team at a time
     """
-    with open(fileName,"w") as file:
-        for projectIndex in teamsAssigned.keys():
-            
-            file.write(f"{projectIndexToProjectName.get(projectIndex)}\n")
-            
-            teams = teamsAssigned.get(projectIndex)
+    getStudentRow = getStudentRowGetter(headerNameToColumnIndex,columnsToInclude)
+    if isinstance(teamsAssigned,TeamAssignment):
+        projectTeams = teamsAssigned.getProjectTeams()
+    else:
+        projectTeams = teamsAssigned.items()
 
-            for team in teams:
-                for studentIndex in team:
-                    studentInfo = getStudentInfo(matrixMinusHeader,studentIndex,
-                        headerNameToColumnIndex,columnsToInclude
-                    )
-                    file.write(f"{studentInfo}\n")
+    with open(fileName,"w",buffering=OUTPUT_BUFFER_SIZE) as file:
+        for projectIndex,teams in projectTeams:
+            file.write(f"{projectIndexToProjectName[projectIndex]}\n")
 
+            for team in teams:
+                file.write(formatStudentRows([getStudentRow(matrixMinusHeader[studentIndex]) for studentIndex in team]))
                 file.write("\n")
         
         file.write(f"UNASSIGNED\n")
+        for chunkStart in range(0,len(sadList),OUTPUT_CHUNK_ROWS):
+            file.write(formatStudentRows([
+                getStudentRow(matrixMinusHeader[studentIndex])
+                for studentIndex in sadList[chunkStart:chunkStart + OUTPUT_CHUNK_ROWS]
+            ]))
+        file.write("\n")
 
-        for sadPersonsIndex in sadList:
-            studentInfo = getStudentInfo(matrixMinusHeader,sadPersonsIndex,
-                headerNameToColumnIndex,columnsToInclude
-            )
-            file.write(f"{studentInfo}\n")
+class RunStats:
+    """
+    Opt-in instrumentation of run(): wall time of every stage and counters of the work done in them.
+    Functions that take a stats argument skip all of this when it is None
+    """
+    def __init__(self):
+        self.stageSeconds = {}
+        self.counters = {}
+        self.error = None
+
+    def addSeconds(self,stageName,seconds):
+        self.stageSeconds[stageName] = self.stageSeconds.get(stageName,0) + seconds
+
+    @contextlib.contextmanager
+    def timeStage(self,stageName):
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.addSeconds(stageName,time.perf_counter() - startTime)
+
+    def addCount(self,counterName,amount=1):
+        self.counters[counterName] = self.counters.get(counterName,0) + amount
+
+    def toDict(self):
+        return {
+            "stageSeconds": dict(self.stageSeconds),
+            "totalSeconds": sum(self.stageSeconds.values()),
+            "counters": dict(self.counters),
+            "error": self.error
+        }
+
+    def writeJSON(self,fileName):
+        with open(fileName,"w") as file:
+            json.dump(self.toDict(),file,indent=2)
+
+def timeStage(stats,stageName):
+    """
+    OUTPUT
+    context manager that times stageName into stats, does nothing if stats is None
+    """
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.timeStage(stageName)
 
-        file.write("\n")
+def loadCohort(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,outputColumns,engine="python",
+    stats=None,reader="stream"
+):
+    """
+    Reads and encodes a csv file once so it can be assigned any number of times
 
-def run(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,minTeamSize,maxTeamSize,maxTeamsPerProject,
-    leadersPerTeam,outputFilename,outputColumns,printResults=True):
-    try:
-        inputMatrix = getFileMatrix(inputCSVfilename)
-        inputMatrixMinusHeaders = inputMatrix[1:]
-        LEADER_VALUE = getLeaderValue(inputMatrixMinusHeaders)
+    INPUT
+    engine: "python" builds preferences as nested lists, "numpy" builds them as a numpy array,
+    "sparse" builds them as SparsePreferences
+    stats: optional RunStats, every step is timed and rowsParsed, cellsSplit, projectsFound and
+    preferencesStored are counted
+    reader: "stream" keeps the interest, leader, name and output columns of every row in memory,
+    "mmap" memory-maps the file and only keeps the interest, leader and name columns, output columns
+    are read from the file when the result is written
 
-        headerNameToColumnIndex = getHeaderNameToColumnIndex(inputMatrix)
-        convertToProperCSV(inputMatrixMinusHeaders,headerNameToColumnIndex,interestColumnName,leaderColumnName)
+    OUTPUT
+    cohort: Cohort
+    """
+    if engine == "numpy" and np is None:
+        raise ImportError("numpy engine requested but numpy is not installed")
+
+    with timeStage(stats,"readStudentRecords"):
+        if reader == "mmap":
+            headerNameToColumnIndex, records = readMappedStudentRecords(
+                inputCSVfilename,interestColumnName,leaderColumnName,[nameColumnName]
+            )
+            encodedRecords = records.keptRecords
+            encodedHeaderNameToColumnIndex = records.keptHeaderNameToColumnIndex
+        else:
+            headerNameToColumnIndex, records = readStudentRecords(
+                inputCSVfilename,interestColumnName,leaderColumnName,[nameColumnName] + list(outputColumns),
+                normalize=False
+            )
+            encodedRecords = records
+            encodedHeaderNameToColumnIndex = headerNameToColumnIndex
 
-        allProjectList = findAllProjects(
-            inputMatrixMinusHeaders, headerNameToColumnIndex,interestColumnName,
-            leaderColumnName
+    # replaces convertToProperCSV(), findAllProjects() and addStudents()
+    with timeStage(stats,"encodeStudentRecords"):
+        preferences, studentNames, projectNameToIndex, projectNames = encodeStudentRecords(
+            encodedRecords,encodedHeaderNameToColumnIndex,interestColumnName,leaderColumnName,nameColumnName
         )
 
-        projectAssociations = makeProjectAssociations(allProjectList)
-        projectNamesToProjectIndex = projectAssociations[0]
-        projectIndexToProjectNames = projectAssociations[1]
+    if stats is not None:
+        stats.addCount("rowsParsed",len(records))
+        stats.addCount("cellsSplit",2 * len(records))
+        stats.addCount("projectsFound",len(projectNameToIndex))
+        stats.addCount("preferencesStored",len(preferences.values))
+
+    if engine == "numpy":
+        with timeStage(stats,"toArray"):
+            preferences = preferences.toArray()
+        with timeStage(stats,"summarizePreferences"):
+            summary = summarizePreferencesArray(preferences)
+    else:
+        if engine == "python":
+            with timeStage(stats,"toDense"):
+                preferences = preferences.toDense()
+        with timeStage(stats,"summarizePreferences"):
+            summary = summarizePreferences(preferences)
+
+    with timeStage(stats,"makeInterestIndex"):
+        interestIndex = makeInterestIndex(preferences)
+
+    return Cohort(
+        headerNameToColumnIndex,records,preferences,studentNames,projectNames,projectNameToIndex,summary,interestIndex
+    )
+
+def assignCohort(cohort,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver="greedy",timeLimit=10,
+    restarts=8,seed=0,stats=None,decompose=False
+):
+    """
+    INPUT
+    cohort: result of loadCohort()
+    solver: "greedy" uses assignPlayersToProjects(), "dynamic" uses assignPlayersToProjectsDynamic(),
+    "exact" uses optimize.assignPlayersToProjectsExact()
+    which starts from the greedy result and searches for better assignments for timeLimit seconds,
+    "local" improves the greedy result with optimize.improveAssignment() for up to timeLimit seconds,
+    "restarts" keeps the best of restarts randomized greedy runs (seeds seed, seed + 1, ...) run in parallel
+    stats: optional RunStats, the solver is timed as assignPlayersToProjects (counters are added by the greedy one)
+    decompose: if True, the greedy, dynamic, exact and local solvers assign every group of projects and people that
+    do not share any interest separately and in parallel, see decompose.assignPlayersToProjectsDecomposed()
 
-        preferences, studentNamesToRowIndex = addStudents(
-            inputMatrixMinusHeaders, projectNamesToProjectIndex, headerNameToColumnIndex,
-            LEADER_VALUE,interestColumnName, leaderColumnName, nameColumnName
+    OUTPUT (tuple)
+    assignment: TeamAssignment with the teams and unlucky projects of the solver
+    solverInfo: dict with "sadPlayerBound" for the exact solver, "bestSeed" for restarts, empty otherwise
+    """
+    summary = cohort.summary
+    preferences = cohort.preferences
+    interestIndex = cohort.interestIndex
+    studentCount = cohort.studentCount
+    solverInfo = {}
+    startTime = time.perf_counter()
+
+    if decompose:
+        # imported here since decompose.py imports this file
+        import decompose as D
+
+        if solver == "restarts":
+            raise ValueError("the restarts solver already runs in parallel, it can't be used with decompose")
+
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList, sadPlayerBound = D.assignPlayersToProjectsDecomposed(
+            summary, studentCount, minTeamSize, maxTeamSize,
+            maxTeamsPerProject, leadersPerTeam, interestIndex, solver, timeLimit
         )
+        if sadPlayerBound is not None:
+            solverInfo["sadPlayerBound"] = sadPlayerBound
+    elif solver == "exact":
+        # imported here since optimize.py imports this file
+        import optimize
+
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList, sadPlayerBound = (
+            optimize.assignPlayersToProjectsExact(
+                summary, preferences, studentCount, minTeamSize, maxTeamSize,
+                maxTeamsPerProject, leadersPerTeam, interestIndex, timeLimit
+            )
+        )
+        solverInfo["sadPlayerBound"] = sadPlayerBound
+    elif solver == "restarts":
+        import optimize
 
-        summary = summarizePreferences(preferences)
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList, bestSeed = optimize.runRandomRestarts(
+            summary, studentCount, minTeamSize, maxTeamSize,
+            maxTeamsPerProject, leadersPerTeam, interestIndex, restarts, seed
+        )
+        solverInfo["bestSeed"] = bestSeed
+    elif solver == "dynamic":
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList = assignPlayersToProjectsDynamic(
+            summary, preferences, studentCount, minTeamSize,
+            maxTeamSize, maxTeamsPerProject, leadersPerTeam, interestIndex, stats
+        )
+    else:
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList = assignPlayersToProjects(
+            summary, preferences, studentCount, minTeamSize,
+            maxTeamSize, maxTeamsPerProject, leadersPerTeam, interestIndex, stats
+        )
 
-        unpopular, projectTeams, sadPeople, sadList = assignPlayersToProjects(
-            summary, preferences, len(studentNamesToRowIndex.keys()), minTeamSize,
-            maxTeamSize, maxTeamsPerProject, LEADER_VALUE, leadersPerTeam
+    if solver == "local" and not decompose:
+        import optimize
+
+        # the greedy start counts against the time limit, like in the exact solver
+        unluckyProjects, teamsAssigned, sadPlayerCount, sadList = optimize.improveAssignment(
+            summary, studentCount, minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam,
+            interestIndex, teamsAssigned, sadList, max(0,timeLimit - (time.perf_counter() - startTime))
         )
 
+    assignment = TeamAssignment.fromTeamsAssigned(teamsAssigned,unluckyProjects,studentCount)
+
+    if stats is not None:
+        stats.addSeconds("assignPlayersToProjects",time.perf_counter() - startTime)
+        stats.addCount("sadPlayers",sadPlayerCount)
+
+    return assignment, solverInfo
+
+def makeRunReport(cohort,assignment,solverInfo,stats,inputCSVfilename,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam,solver="greedy",seed=0,decompose=False
+):
+    """
+    Summarizes the result of a run for monitoring, in time linear in the number of leader picks and teams
+
+    INPUT
+    cohort, assignment, solverInfo: results of loadCohort() and assignCohort()
+    stats: RunStats of the run for the stage timings, or None
+
+    OUTPUT
+    dict that can be saved as JSON with:
+    input: size of the csv file, number of people, projects and stated (leader) preferences
+    students: number of assigned and unassigned people
+    leaders: people that picked at least one project as leader, split into the ones leading a team,
+    members of a team of a project they wanted to lead (converted to members), members of another team, unassigned
+    teams: number of teams and how many teams have each size
+    unluckyProjects: name, leaderCount and memberCount of every project without a team
+    stageSeconds, totalSeconds: from stats (empty without stats)
+    """
+    studentCount = cohort.studentCount
+    teamStarts = assignment.teamStarts
+    teamMembers = assignment.teamMembers
+    teamProjects = assignment.teamProjects
+    interestIndex = cohort.interestIndex
+
+    isVolunteer = bytearray(studentCount)
+    statedPreferences = 0
+    leaderPreferences = 0
+    for interestedStudents, interestedLeaders in interestIndex:
+        statedPreferences += len(interestedStudents) + len(interestedLeaders)
+        leaderPreferences += len(interestedLeaders)
+        for studentIndex in interestedLeaders:
+            isVolunteer[studentIndex] = 1
+
+    leaders = {"volunteers": isVolunteer.count(1),"leading": 0,"convertedToMembers": 0,"membersElsewhere": 0}
+    for teamIndex in range(len(teamProjects)):
+        teamStart = teamStarts[teamIndex]
+        teamEnd = teamStarts[teamIndex + 1]
+        # leaders are in the first leadersPerTeam spots of every team
+        leaders["leading"] += min(leadersPerTeam,teamEnd - teamStart)
+
+        interestedLeaders = interestIndex[teamProjects[teamIndex]][1]
+        for studentIndex in teamMembers[teamStart + leadersPerTeam:teamEnd]:
+            if isVolunteer[studentIndex]:
+                # interested leaders are ascending, so a binary search tells if they wanted to lead this project
+                position = bisect_left(interestedLeaders,studentIndex)
+                if position < len(interestedLeaders) and interestedLeaders[position] == studentIndex:
+                    leaders["convertedToMembers"] += 1
+                else:
+                    leaders["membersElsewhere"] += 1
+    leaders["unassigned"] = (
+        leaders["volunteers"] - leaders["leading"] - leaders["convertedToMembers"] - leaders["membersElsewhere"]
+    )
+
+    teamSizes = Counter(end - start for start,end in zip(teamStarts,teamStarts[1:]))
+    unluckyProjects = set(assignment.unluckyProjects)
+    sadPlayerCount = assignment.sadPlayerCount
+    stageSeconds = dict(stats.stageSeconds) if stats is not None else {}
+
+    return {
+        "input": {
+            "fileName": inputCSVfilename,
+            "fileBytes": os.path.getsize(inputCSVfilename) if os.path.exists(inputCSVfilename) else None,
+            "studentCount": studentCount,
+            "projectCount": cohort.projectCount,
+            "statedPreferences": statedPreferences,
+            "leaderPreferences": leaderPreferences
+        },
+        "constraints": {
+            "minTeamSize": minTeamSize,
+            "maxTeamSize": maxTeamSize,
+            "maxTeamsPerProject": maxTeamsPerProject,
+            "leadersPerTeam": leadersPerTeam,
+            "solver": solver,
+            "seed": seed,
+            "decompose": decompose
+        },
+        "solverInfo": solverInfo,
+        "students": {"assigned": studentCount - sadPlayerCount,"unassigned": sadPlayerCount},
+        "leaders": leaders,
+        "teams": {
+            "count": assignment.teamCount,
+            "sizeHistogram": {str(size): teamSizes[size] for size in sorted(teamSizes)}
+        },
+        "unluckyProjects": [
+            {"project": cohort.projectNames[projectSummary[0]],"leaderCount": projectSummary[1],"memberCount": projectSummary[2]}
+            for projectSummary in cohort.summary if projectSummary[0] in unluckyProjects
+        ],
+        "stageSeconds": stageSeconds,
+        "totalSeconds": sum(stageSeconds.values())
+    }
+
+def run(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam,outputFilename,outputColumns,printResults=True,engine="python",solver="greedy",timeLimit=10,
+    restarts=8,seed=0,stats=None,profileFilename=None,cacheDirectory=None,maxCacheBytes=2**30,reader="stream",
+    decompose=False,reportFilename=None,cacheResults=False):
+    """
+    engine, reader: see loadCohort()
+    solver, timeLimit, restarts, seed, decompose: see assignCohort()
+    stats: optional RunStats that gets the time of every stage and the counters, see RunStats.writeJSON()
+    profileFilename: if given, the run is profiled with cProfile and the result saved there (open with pstats)
+    cacheDirectory, maxCacheBytes: if cacheDirectory is given, the parsed csv file is kept there and reused
+    by later runs on the same file, see cache.loadCohortCached() (cached cohorts always use the "sparse" engine)
+    reportFilename: if given, the result of makeRunReport() is saved there as JSON
+    cacheResults: if True (and cacheDirectory is given), the teams are kept in cacheDirectory too and reused by
+    later runs on the same file with the same constraints and solver settings, see cache.assignCohortCached()
+    """
+    if reportFilename is not None and stats is None:
+        # the report needs the stage timings
+        stats = RunStats()
+
+    profiler = cProfile.Profile() if profileFilename is not None else None
+    if profiler is not None:
+        profiler.enable()
+
+    cohort = None
+    try:
+        if cacheDirectory is not None and cacheResults:
+            # imported here since cache.py imports this file
+            import cache
+
+            cohort, assignment, solverInfo = cache.assignCohortCached(
+                inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,minTeamSize,maxTeamSize,
+                maxTeamsPerProject,leadersPerTeam,solver,timeLimit,restarts,seed,decompose,
+                cacheDirectory,maxCacheBytes,stats
+            )
+        else:
+            if cacheDirectory is not None:
+                import cache
+
+                cohort = cache.loadCohortCached(
+                    inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,cacheDirectory,
+                    maxCacheBytes,stats
+                )
+            else:
+                cohort = loadCohort(
+                    inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,outputColumns,engine,stats,reader
+                )
+
+            assignment, solverInfo = assignCohort(
+                cohort, minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam,
+                solver, timeLimit, restarts, seed, stats, decompose
+            )
+
         if printResults:
-            print(f"\nsummary \n {summary}")
-            print(f"\nunpopularProjects: {unpopular}")
-            print(f"results: {projectTeams}")
-            print(f"sadPeople: {sadPeople}")
+            print(f"\nsummary \n {cohort.summary}")
+            print(f"\nunpopularProjects: {assignment.unluckyProjects.tolist()}")
+            print(f"results: {assignment.getTeamsAssigned()}")
+            print(f"sadPeople: {assignment.sadPlayerCount}")
+            if "sadPlayerBound" in solverInfo:
+                print(f"sadPeople lower bound: {solverInfo['sadPlayerBound']}")
+            if "bestSeed" in solverInfo:
+                print(f"best seed: {solverInfo['bestSeed']}")
         
-        createCSVfile(
-            outputFilename,projectTeams,inputMatrixMinusHeaders,
-            projectIndexToProjectNames,headerNameToColumnIndex,outputColumns, sadList
-        )
+        with timeStage(stats,"createCSVfile"):
+            createCSVfile(
+                outputFilename,assignment,cohort.records,
+                cohort.projectNames,cohort.headerNameToColumnIndex,outputColumns,assignment.getSadList()
+            )
+
+        if reportFilename is not None:
+            report = makeRunReport(
+                cohort,assignment,solverInfo,stats,inputCSVfilename,minTeamSize,maxTeamSize,maxTeamsPerProject,
+                leadersPerTeam,solver,seed,decompose
+            )
+            with open(reportFilename,"w") as file:
+                json.dump(report,file,indent=2)
         print("\nGROUPING COMPLETE")
-    except:
-        print("There is an error with the program, double check your inputs")
+    except Exception as error:
+        if stats is not None:
+            stats.error = repr(error)
+        print(f"There is an error with the program, double check your inputs ({error!r})")
+    finally:
+        # memory-mapped records (mmap reader, cache) keep the file open until they are closed
+        if cohort is not None:
+            cohort.close()
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profileFilename)
 
     return
@@ -0,0 +1,246 @@
+"""
+DESCRIPTION
+
+Splits a cohort into groups of projects and people that do not share any interest and assigns
+each group on its own
+
+Students and projects form a graph (a student is linked to every project they picked). Teams
+are only ever made inside one connected component of that graph, so every component can be
+assigned separately, in parallel, and the results merged. With the greedy solver the merged
+result is the same as assigning everyone at once, the exact and local solvers get a smaller
+problem for every component
+
+Components are found with a union-find over the interest index
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import combined as C
+
+# components are grouped into tasks of at least this many people so small ones don't cost a task each
+MIN_TASK_STUDENTS = 2000
+
+def findComponents(interestIndex,studentCount):
+    """
+    OUTPUT
+    list of (projectIndices, studentIndices) for every connected component that has a project,
+    both ascending, largest component first. People that did not pick any project are left out
+    """
+    # union-find over people, everyone interested in a project ends up in the same set
+    parent = list(range(studentCount))
+    size = [1] * studentCount
+
+    for interestedStudents, interestedLeaders in interestIndex:
+        root = -1
+        for students in (interestedStudents,interestedLeaders):
+            for studentIndex in students:
+                # find with path halving
+                while parent[studentIndex] != studentIndex:
+                    parent[studentIndex] = parent[parent[studentIndex]]
+                    studentIndex = parent[studentIndex]
+
+                if root == -1:
+                    root = studentIndex
+                elif studentIndex != root:
+                    # union by size, the larger set keeps its root
+                    if size[studentIndex] > size[root]:
+                        root, studentIndex = studentIndex, root
+                    parent[studentIndex] = root
+                    size[root] += size[studentIndex]
+
+    def find(studentIndex):
+        while parent[studentIndex] != studentIndex:
+            parent[studentIndex] = parent[parent[studentIndex]]
+            studentIndex = parent[studentIndex]
+        return studentIndex
+
+    components = {}
+    for projectIndex,(interestedStudents,interestedLeaders) in enumerate(interestIndex):
+        if len(interestedStudents) > 0:
+            root = find(interestedStudents[0])
+        elif len(interestedLeaders) > 0:
+            root = find(interestedLeaders[0])
+        else:
+            # nobody picked the project, it is a component of its own
+            root = ("project",projectIndex)
+        components.setdefault(root,([],[]))[0].append(projectIndex)
+
+    for studentIndex in range(studentCount):
+        root = find(studentIndex)
+        if root in components:
+            components[root][1].append(studentIndex)
+
+    return sorted(components.values(),key = lambda component: -len(component[1]))
+
+def makeComponentProblems(summary,interestIndex,components,studentCount):
+    """
+    Renumbers the projects and people of every component from 0
+
+    OUTPUT
+    list of (localSummary, localInterestIndex, studentCount) per component: localSummary has the
+    entries of summary for the component's projects in the same order, localInterestIndex uses local indices
+    """
+    # components don't overlap so one list per kind of index is enough for every renumbering
+    localStudentIndex = [0] * studentCount
+    componentOfProject = [0] * len(interestIndex)
+    localProjectIndex = [0] * len(interestIndex)
+    for position,(projectIndices,studentIndices) in enumerate(components):
+        for localIndex,studentIndex in enumerate(studentIndices):
+            localStudentIndex[studentIndex] = localIndex
+        for localIndex,projectIndex in enumerate(projectIndices):
+            componentOfProject[projectIndex] = position
+            localProjectIndex[projectIndex] = localIndex
+
+    localSummaries = [[] for _ in components]
+    for projectSummary in summary:
+        localSummaries[componentOfProject[projectSummary[0]]].append(
+            [localProjectIndex[projectSummary[0]],projectSummary[1],projectSummary[2]]
+        )
+
+    problems = []
+    for (projectIndices,studentIndices),localSummary in zip(components,localSummaries):
+        localInterestIndex = [
+            (
+                [localStudentIndex[studentIndex] for studentIndex in interestIndex[projectIndex][0]],
+                [localStudentIndex[studentIndex] for studentIndex in interestIndex[projectIndex][1]]
+            )
+            for projectIndex in projectIndices
+        ]
+        problems.append((localSummary,localInterestIndex,len(studentIndices)))
+
+    return problems
+
+def solveComponents(problems,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit):
+    """
+    INPUT
+    problems: list of (localSummary, localInterestIndex, studentCount) from makeComponentProblems()
+    solver: "greedy", "dynamic", "exact" or "local"
+    timeLimit: seconds for all the problems together, each one gets a share proportional to its number of people
+
+    OUTPUT
+    list of (assignment, sadPlayerBound) in local indices, one per problem. assignment is a
+    combined.TeamAssignment so results go back to the main process as a few flat arrays
+    """
+    results = []
+    totalStudents = max(sum(problem[2] for problem in problems),1)
+    for localSummary,localInterestIndex,studentCount in problems:
+        componentTimeLimit = timeLimit * studentCount / totalStudents
+        if solver == "exact":
+            import optimize
+
+            unluckyProjects, teamsAssigned, _, sadList, sadPlayerBound = optimize.assignPlayersToProjectsExact(
+                localSummary,None,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+                localInterestIndex,componentTimeLimit
+            )
+        elif solver == "dynamic":
+            unluckyProjects, teamsAssigned, _, sadList = C.assignPlayersToProjectsDynamic(
+                localSummary,None,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+                localInterestIndex
+            )
+            sadPlayerBound = None
+        else:
+            unluckyProjects, teamsAssigned, _, sadList = C.assignPlayersToProjects(
+                localSummary,None,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+                localInterestIndex
+            )
+            if solver == "local":
+                import optimize
+
+                unluckyProjects, teamsAssigned, _, sadList = optimize.improveAssignment(
+                    localSummary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+                    localInterestIndex,teamsAssigned,sadList,componentTimeLimit
+                )
+            sadPlayerBound = None
+
+        results.append((C.TeamAssignment.fromTeamsAssigned(teamsAssigned,unluckyProjects,studentCount),sadPlayerBound))
+    return results
+
+def groupTasks(components,minTaskStudents):
+    """
+    OUTPUT
+    list of lists of component positions, small components are put together until a task
+    has at least minTaskStudents people
+    """
+    tasks = []
+    currentTask = []
+    currentStudents = 0
+    for position,(_,studentIndices) in enumerate(components):
+        currentTask.append(position)
+        currentStudents += len(studentIndices)
+        if currentStudents >= minTaskStudents:
+            tasks.append(currentTask)
+            currentTask = []
+            currentStudents = 0
+    if currentTask:
+        tasks.append(currentTask)
+    return tasks
+
+def assignPlayersToProjectsDecomposed(summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam,interestIndex,solver="greedy",timeLimit=10,workers=None,minTaskStudents=MIN_TASK_STUDENTS
+):
+    """
+    Assigns every component from findComponents() separately and merges the results
+
+    INPUT
+    solver: "greedy", "dynamic", "exact" or "local", see solveComponents()
+    timeLimit: seconds the exact and local solvers get overall, split over the components by size
+    workers: number of processes, None uses every core, 0 solves the components in this process
+
+    OUTPUT (tuple)
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList: same as assignPlayersToProjects(),
+    teamsAssigned lists the projects in summary order like assignPlayersToProjects() does
+    sadPlayerBound: lower bound on sadPlayerCount for the exact solver (sum over the components), None otherwise
+    """
+    components = findComponents(interestIndex,studentCount)
+    problems = makeComponentProblems(summary,interestIndex,components,studentCount)
+    tasks = groupTasks(components,minTaskStudents)
+    serial = workers == 0 or len(tasks) <= 1
+
+    # tasks run workers at a time, so each one gets its part of timeLimit
+    parallelTasks = 1 if serial else (workers or os.cpu_count() or 1)
+    taskTimeLimit = timeLimit * min(parallelTasks / max(len(tasks),1),1)
+    constraints = (minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,taskTimeLimit)
+
+    if serial:
+        taskResults = [solveComponents([problems[position] for position in task],*constraints) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(solveComponents,[problems[position] for position in task],*constraints)
+                for task in tasks
+            ]
+            taskResults = [future.result() for future in futures]
+
+    unluckyProjects = []
+    componentTeams = {}
+    placed = [False] * studentCount
+    sadPlayerBound = 0 if solver == "exact" else None
+
+    for task,results in zip(tasks,taskResults):
+        for position,(localAssignment,localBound) in zip(task,results):
+            projectIndices, studentIndices = components[position]
+
+            unluckyProjects += [projectIndices[localIndex] for localIndex in localAssignment.unluckyProjects]
+            for localIndex,teams in localAssignment.getProjectTeams():
+                componentTeams[projectIndices[localIndex]] = [
+                    [studentIndices[localStudent] for localStudent in team] for team in teams
+                ]
+            for localStudent,teamIndex in enumerate(localAssignment.studentTeams):
+                if teamIndex >= 0:
+                    placed[studentIndices[localStudent]] = True
+
+            if sadPlayerBound is not None:
+                sadPlayerBound += localBound
+
+    teamsAssigned = {
+        projectSummary[0]: componentTeams[projectSummary[0]]
+        for projectSummary in summary if projectSummary[0] in componentTeams
+    }
+    sadList = [studentIndex for studentIndex in range(studentCount) if not placed[studentIndex]]
+
+    if sadPlayerBound is not None:
+        # people without any project are unassigned in every solution
+        sadPlayerBound += studentCount - sum(len(studentIndices) for _,studentIndices in components)
+
+    unluckyProjects.sort()
+    return unluckyProjects, teamsAssigned, len(sadList), sadList, sadPlayerBound
@@ -0,0 +1,193 @@
+"""
+DESCRIPTION
+
+Generates large synthetic cohorts and writes them as csv files in the Google Form layout
+combined.getFileMatrix() and combined.run() read, to load-test the whole pipeline
+
+Project popularity follows a Zipf (power-law) distribution: the project of popularity rank r is
+picked with weight 1 / r ** zipfExponent (ranks are shuffled so popular projects are spread over
+the names). Every person picks preferencesNum different projects. Whether a person wants to lead
+a project they picked is correlated between their picks (some people want to lead everything,
+others nothing) while every pick is a leader pick with probability leaderChance overall
+
+People are generated in chunks of numpy arrays and every chunk is written before the next one is
+made, so memory does not grow with the number of rows. The same seed and chunkSize give the same file
+
+Run from the terminal, for example:
+py ./generate.py cohort.csv --students 1000000 --projects 10000 --zipf 1.1
+py ./generate.py cohort.csv --students 1000 --projects 50 --separator comma
+"""
+
+import argparse, time
+from statistics import NormalDist
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HEADER_NAMES = ["Timestamp","Name","Email","Interested?","Leader?"]
+
+# "semicolon" is the layout of testCSVprocess.csv, "comma" is how Google Forms exports checkbox answers
+SEPARATORS = {"semicolon": ";","comma": ", "}
+
+# people generated (and written) at once
+CHUNK_SIZE = 100000
+
+def getProjectWeights(projectCount,zipfExponent,generator):
+    """
+    OUTPUT
+    numpy array of pick probabilities, Zipf over popularity ranks assigned to projects in random order
+    """
+    rankWeights = 1 / np.arange(1,projectCount + 1,dtype=np.float64) ** zipfExponent
+    weights = rankWeights[generator.permutation(projectCount)]
+    return weights / weights.sum()
+
+def pickProjects(rowCount,preferencesNum,weights,generator):
+    """
+    Weighted sampling without replacement for every row at once: projects are drawn with replacement
+    and the first preferencesNum different ones of each row are kept (the same as drawing them one
+    at a time and skipping repeats). Rows that did not get enough different projects are drawn again
+    with more candidates
+
+    OUTPUT
+    numpy int32 array of shape (rowCount, preferencesNum), the picked projects of every row in pick order
+    """
+    picks = np.empty((rowCount,preferencesNum),dtype=np.int32)
+    rows = np.arange(rowCount)
+    candidateCount = 2 * preferencesNum
+
+    while len(rows) > 0:
+        candidates = generator.choice(len(weights),size=(len(rows),candidateCount),p=weights).astype(np.int32)
+
+        # first occurrence of every value in a row: compare neighbours after a stable sort, then map back
+        order = np.argsort(candidates,axis=1,kind="stable")
+        sortedCandidates = np.take_along_axis(candidates,order,axis=1)
+        isFirstSorted = np.ones_like(sortedCandidates,dtype=bool)
+        isFirstSorted[:,1:] = sortedCandidates[:,1:] != sortedCandidates[:,:-1]
+        isFirst = np.empty_like(isFirstSorted)
+        np.put_along_axis(isFirst,order,isFirstSorted,axis=1)
+
+        keep = isFirst & (np.cumsum(isFirst,axis=1) <= preferencesNum)
+        complete = keep.sum(axis=1) == preferencesNum
+
+        picks[rows[complete]] = candidates[complete][keep[complete]].reshape(-1,preferencesNum)
+        rows = rows[~complete]
+        candidateCount *= 2
+
+    return picks
+
+def pickLeaders(rowCount,preferencesNum,leaderChance,leaderCorrelation,generator):
+    """
+    Every pick is a leader pick when a shared per-person normal value mixed with a per-pick one
+    is above the threshold that makes leaderChance of all picks leader picks (Gaussian copula)
+
+    OUTPUT
+    numpy bool array of shape (rowCount, preferencesNum)
+    """
+    if leaderChance <= 0:
+        return np.zeros((rowCount,preferencesNum),dtype=bool)
+    if leaderChance >= 1:
+        return np.ones((rowCount,preferencesNum),dtype=bool)
+
+    threshold = NormalDist().inv_cdf(1 - leaderChance)
+    personValues = generator.standard_normal((rowCount,1))
+    pickValues = generator.standard_normal((rowCount,preferencesNum))
+    return leaderCorrelation * personValues + (1 - leaderCorrelation ** 2) ** 0.5 * pickValues > threshold
+
+def generateCohortChunks(studentCount,projectCount,preferencesNum,leaderChance,zipfExponent=1.0,
+    leaderCorrelation=0.5,seed=0,chunkSize=CHUNK_SIZE
+):
+    """
+    INPUT
+    preferencesNum: number of different projects every person picks (at most projectCount)
+    leaderChance: share of all picks that are leader picks
+    zipfExponent: 0 makes every project equally popular, larger values make a few projects much more popular
+    leaderCorrelation: 0 makes leader picks independent, close to 1 makes people lead all or none of their picks
+
+    OUTPUT
+    generator of (firstStudentIndex, picks, isLeader) for every chunk of at most chunkSize people,
+    see pickProjects() and pickLeaders()
+    """
+    if np is None:
+        raise ImportError("the cohort generator requires numpy")
+
+    generator = np.random.default_rng(seed)
+    weights = getProjectWeights(projectCount,zipfExponent,generator)
+    preferencesNum = min(preferencesNum,projectCount)
+
+    for firstStudentIndex in range(0,studentCount,chunkSize):
+        rowCount = min(chunkSize,studentCount - firstStudentIndex)
+        picks = pickProjects(rowCount,preferencesNum,weights,generator)
+        isLeader = pickLeaders(rowCount,preferencesNum,leaderChance,leaderCorrelation,generator)
+        yield firstStudentIndex, picks, isLeader
+
+def formatCohortRows(firstStudentIndex,picks,isLeader,projectNames,separator):
+    """
+    OUTPUT (string)
+    csv rows of one chunk with every value quoted, the Interested? cell lists every pick and the
+    Leader? cell the picks the person wants to lead
+    """
+    lines = []
+    for rowIndex,(rowPicks,rowIsLeader) in enumerate(zip(picks.tolist(),isLeader.tolist())):
+        studentIndex = firstStudentIndex + rowIndex
+        interestCell = separator.join([projectNames[projectIndex] for projectIndex in rowPicks])
+        leaderCell = separator.join([
+            projectNames[projectIndex] for projectIndex,leader in zip(rowPicks,rowIsLeader) if leader
+        ])
+        lines.append(
+            f'"2022/11/10 {studentIndex}","Student{studentIndex}","student{studentIndex}@example.com",'
+            f'"{interestCell}","{leaderCell}"\n'
+        )
+    return "".join(lines)
+
+def writeGeneratedCSV(fileName,studentCount,projectCount,preferencesNum,leaderChance,zipfExponent=1.0,
+    leaderCorrelation=0.5,separator="semicolon",seed=0,chunkSize=CHUNK_SIZE
+):
+    """
+    Writes a cohort from generateCohortChunks() to fileName, projects are named Project0, Project1, ...
+
+    INPUT
+    separator: key of SEPARATORS, how the projects inside the Interested?/Leader? cells are separated
+
+    OUTPUT
+    numpy array with the number of picks of every project (leader picks included)
+    """
+    if np is None:
+        raise ImportError("the cohort generator requires numpy")
+
+    projectNames = [f"Project{projectIndex}" for projectIndex in range(projectCount)]
+    pickCounts = np.zeros(projectCount,dtype=np.int64)
+
+    with open(fileName,"w",newline="",buffering=2**20) as file:
+        file.write(",".join(f'"{headerName}"' for headerName in HEADER_NAMES) + "\n")
+
+        for firstStudentIndex,picks,isLeader in generateCohortChunks(
+            studentCount,projectCount,preferencesNum,leaderChance,zipfExponent,leaderCorrelation,seed,chunkSize
+        ):
+            pickCounts += np.bincount(picks.ravel(),minlength=projectCount)
+            file.write(formatCohortRows(firstStudentIndex,picks,isLeader,projectNames,SEPARATORS[separator]))
+
+    return pickCounts
+
+def parseArguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic cohort as a Google Form csv file")
+    parser.add_argument("fileName")
+    parser.add_argument("--students",type=int,default=100000)
+    parser.add_argument("--projects",type=int,default=1000)
+    parser.add_argument("--preferences",type=int,default=5,help="different projects every person picks")
+    parser.add_argument("--leader-chance",type=float,default=0.2,help="share of picks that are leader picks")
+    parser.add_argument("--zipf",type=float,default=1.0,help="popularity exponent, 0 for equally popular projects")
+    parser.add_argument("--leader-correlation",type=float,default=0.5,help="how alike the leader picks of a person are")
+    parser.add_argument("--separator",default="semicolon",choices=list(SEPARATORS))
+    parser.add_argument("--seed",type=int,default=0)
+    return parser.parse_args(arguments)
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    startTime = time.perf_counter()
+    writeGeneratedCSV(
+        arguments.fileName,arguments.students,arguments.projects,arguments.preferences,arguments.leader_chance,
+        arguments.zipf,arguments.leader_correlation,arguments.separator,arguments.seed
+    )
+    print(f"wrote {arguments.students} people to {arguments.fileName} in {time.perf_counter() - startTime:.2f}s")
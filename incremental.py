@@ -0,0 +1,238 @@
+"""
+DESCRIPTION
+
+Adds form responses that arrive after grouping without running everything again
+
+startIncremental() runs the normal pipeline once and keeps its state. addLateRecords()
+(or addLateRowsFromFile() for a re-exported csv with rows appended at the end, which seeks to
+where the last row it read ended so only the new rows are parsed) then
+extends the project/preference structures in place and places only the newcomers:
+first into teams that still have room, then into new teams for projects that have
+no teams yet (or less than maxTeamsPerProject) together with people that were left
+unassigned before. Teams that already exist are never split or reshuffled
+"""
+
+import csv, itertools
+import combined as C
+
+def startIncremental(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,outputColumns,
+    minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam
+):
+    """
+    OUTPUT
+    state: dict with the cohort from combined.loadCohort() (sparse engine) under the key cohort, the greedy
+    assignment under unluckyProjects, teamsAssigned (dict of lists, teams grow in place), sadList and the
+    columnNames and constraints it was made with, the byte offset in the file where the last loaded row ends
+    (fileOffset) and the file column of every kept column (sourceColumnIndices)
+    """
+    cohort = C.loadCohort(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,outputColumns,"sparse")
+
+    assignment, _ = C.assignCohort(cohort,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam)
+
+    # position in the file after the rows that were loaded, rows added later to the file are not counted
+    rows = streamRowsFrom(inputCSVfilename,0,completeRowsOnly=False)
+    headerNames, fileOffset = next(rows)
+    for _,fileOffset in itertools.islice(rows,cohort.studentCount):
+        pass
+
+    sourceHeaderNameToColumnIndex = C.getHeaderNameToColumnIndex([headerNames])
+    sourceColumnIndices = [
+        sourceHeaderNameToColumnIndex[columnName]
+        for columnName in sorted(cohort.headerNameToColumnIndex,key=cohort.headerNameToColumnIndex.get)
+    ]
+
+    return {
+        "cohort": cohort,
+        "unluckyProjects": assignment.unluckyProjects.tolist(),
+        "teamsAssigned": assignment.getTeamsAssigned(),
+        "sadList": assignment.getSadList(),
+        "columnNames": (interestColumnName,leaderColumnName,nameColumnName,list(outputColumns)),
+        "constraints": (minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam),
+        "fileOffset": fileOffset,
+        "sourceColumnIndices": sourceColumnIndices
+    }
+
+def addProject(state,projectName):
+    """
+    Gives a project seen for the first time the next free index (existing indices never change)
+    OUTPUT
+    summary entry of the new project
+    """
+    cohort = state["cohort"]
+    projectIndex = cohort.projectCount
+    cohort.projectNameToIndex[projectName] = projectIndex
+    cohort.projectNames.append(projectName)
+    cohort.preferences.projectCount += 1
+    cohort.interestIndex.append(([],[]))
+    cohort.summary.append([projectIndex,0,0])
+    return cohort.summary[-1]
+
+def addLateRecords(state,newRecords):
+    """
+    INPUT
+    state: result of startIncremental(), updated in place
+    newRecords: new rows with the same kept columns as the records of the cohort (see combined.readStudentRecords())
+
+    OUTPUT
+    list of student indices of the newcomers that were placed in a team
+    """
+    cohort = state["cohort"]
+    minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam = state["constraints"]
+    headerNameToColumnIndex = cohort.headerNameToColumnIndex
+    interestColumnName, leaderColumnName, nameColumnName, _ = state["columnNames"]
+
+    interestColumnIndex = headerNameToColumnIndex[interestColumnName]
+    leaderColumnIndex = headerNameToColumnIndex[leaderColumnName]
+    nameColumnIndex = headerNameToColumnIndex[nameColumnName]
+
+    projectNameToIndex = cohort.projectNameToIndex
+    interestIndex = cohort.interestIndex
+    summaryByProject = {projectSummary[0]: projectSummary for projectSummary in cohort.summary}
+
+    newcomers = []
+    for record in newRecords:
+        studentIndex = len(cohort.records)
+        cohort.records.append(record)
+        cohort.studentNames.append(record[nameColumnIndex])
+
+        interestProjects, leaderProjects = C.splitProjectCells(record[interestColumnIndex],record[leaderColumnIndex])
+
+        projectValues = {}
+        for projectNames,value in ((interestProjects,C.MEMBER),(leaderProjects,C.LEADER)):
+            for projectName in projectNames:
+                if projectName not in projectNameToIndex:
+                    projectSummary = addProject(state,projectName)
+                    summaryByProject[projectSummary[0]] = projectSummary
+                projectValues[projectNameToIndex[projectName]] = value
+
+        cohort.preferences.addRow(projectValues)
+
+        # new students have the largest index so every interestIndex list stays ascending
+        for projectIndex,value in projectValues.items():
+            if value == C.LEADER:
+                interestIndex[projectIndex][1].append(studentIndex)
+                summaryByProject[projectIndex][1] += 1
+            else:
+                interestIndex[projectIndex][0].append(studentIndex)
+                summaryByProject[projectIndex][2] += 1
+
+        newcomers.append(studentIndex)
+
+    # ties keep project index order, same as summarizePreferences()
+    cohort.summary.sort(key = lambda projectSummary: (C.getSummaryKey(projectSummary),projectSummary[0]))
+
+    unassigned = set(state["sadList"])
+
+    # every newcomer that doesn't fit in a team is unassigned before new teams are made, so newcomers of the
+    # same batch can form a team together
+    for studentIndex in newcomers:
+        if not placeInTeamWithRoom(state,studentIndex,maxTeamSize):
+            unassigned.add(studentIndex)
+
+    for studentIndex in newcomers:
+        if studentIndex in unassigned:
+            formTeam(state,studentIndex,unassigned)
+
+    placed = [studentIndex for studentIndex in newcomers if studentIndex not in unassigned]
+    state["sadList"] = sorted(unassigned)
+    state["unluckyProjects"] = sorted(
+        projectIndex for projectIndex in range(cohort.projectCount) if not state["teamsAssigned"].get(projectIndex)
+    )
+    return placed
+
+def placeInTeamWithRoom(state,studentIndex,maxTeamSize):
+    """
+    Adds the student as a member of the first team with room on a project they picked
+    """
+    teamsAssigned = state["teamsAssigned"]
+    for projectIndex,_ in state["cohort"].preferences.getRow(studentIndex):
+        for team in teamsAssigned.get(projectIndex,[]):
+            if len(team) < maxTeamSize:
+                team.append(studentIndex)
+                return True
+    return False
+
+def formTeam(state,studentIndex,unassigned):
+    """
+    Tries to make a new team around the student (who is in unassigned) for one of their projects out of people
+    that are not in a team. Removes the people it uses from unassigned
+    """
+    minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam = state["constraints"]
+    teamsAssigned = state["teamsAssigned"]
+
+    for projectIndex,_ in state["cohort"].preferences.getRow(studentIndex):
+        if len(teamsAssigned.get(projectIndex,[])) >= maxTeamsPerProject:
+            continue
+
+        interestedStudents, interestedLeaders = state["cohort"].interestIndex[projectIndex]
+        freeLeaders = [person for person in interestedLeaders if person in unassigned]
+        freeMembers = [person for person in interestedStudents if person in unassigned]
+
+        if len(freeLeaders) < leadersPerTeam or len(freeLeaders) + len(freeMembers) < minTeamSize:
+            continue
+
+        # the newcomer is always part of the team, the rest are taken in index order
+        newTeam = freeLeaders[:leadersPerTeam]
+        others = [person for person in freeLeaders[leadersPerTeam:] + freeMembers if person != studentIndex]
+        if studentIndex not in newTeam:
+            newTeam.append(studentIndex)
+        newTeam += others[:maxTeamSize - len(newTeam)]
+
+        teamsAssigned.setdefault(projectIndex,[]).append(newTeam)
+        unassigned.difference_update(newTeam)
+        return True
+
+    return False
+
+def streamRowsFrom(fileName,offset,completeRowsOnly=True):
+    """
+    Reads a csv file from byte offset (the start of a row) with newlines translated like combined.streamFileRows()
+
+    OUTPUT (generator)
+    (row, endOffset) for every row, endOffset is the byte offset where the next row starts. With
+    completeRowsOnly, a last row without a line break may still be being written and is left for later
+    """
+    with open(fileName,"rb") as file:
+        file.seek(offset)
+        position = offset
+        lineEnded = True
+
+        def readLines():
+            nonlocal position, lineEnded
+            for line in file:
+                position += len(line)
+                lineEnded = line.endswith(b"\n")
+                yield C.decodeFileLine(line)
+
+        # csv.reader only asks for the lines of one row at a time, so position is where the row ends
+        for row in csv.reader(readLines()):
+            if completeRowsOnly and not lineEnded:
+                return
+            yield row, position
+
+def addLateRowsFromFile(state,inputCSVfilename):
+    """
+    Reads the rows of the csv file after the ones already in state, starting at state["fileOffset"]
+    (rows before it are not read again), and adds them with addLateRecords()
+    """
+    sourceColumnIndices = state["sourceColumnIndices"]
+    newRecords = []
+    fileOffset = state["fileOffset"]
+
+    for row,fileOffset in streamRowsFrom(inputCSVfilename,fileOffset):
+        if row:
+            newRecords.append(tuple(row[columnIndex] for columnIndex in sourceColumnIndices))
+
+    placed = addLateRecords(state,newRecords)
+    state["fileOffset"] = fileOffset
+    return placed
+
+def createIncrementalCSVfile(state,outputFilename):
+    """
+    Writes the current assignment of state with combined.createCSVfile()
+    """
+    cohort = state["cohort"]
+    C.createCSVfile(
+        outputFilename,state["teamsAssigned"],cohort.records,cohort.projectNames,
+        cohort.headerNameToColumnIndex,state["columnNames"][3],state["sadList"]
+    )
@@ -1,4 +1,4 @@
-import combined,test
+import cache,combined,test
 
 # USER INPUT
 
@@ -19,17 +19,72 @@ OUTPUT_FILENAME = "testCSVResult.csv"
 RUN_USER_CODE = True
 PRINT_RESULTS = True
 
+# "python", "sparse" or "numpy" (numpy engine requires numpy to be installed)
+ENGINE = "python"
+
+# "stream" keeps the used columns of the CSV file in memory, "mmap" only keeps the interest, leader and
+# name columns and reads OUTPUT_COLUMNS from the file when writing the result (for very large files)
+READER = "stream"
+
+# "greedy", "dynamic", "exact", "local" or "restarts"
+# dynamic always assigns the project with the fewest people still available next, and keeps the greedy
+# result instead when that one is better (the order alone is not reliably better than greedy)
+# exact and local search for better teams for up to SOLVER_TIME_LIMIT seconds
+# restarts keeps the best of RESTARTS randomized greedy runs, same SEED gives the same result
+SOLVER = "greedy"
+SOLVER_TIME_LIMIT = 10
+RESTARTS = 8
+SEED = 0
+
+# True assigns every group of projects and people that don't share any interest separately and in
+# parallel (same teams as one big run with the greedy solver, faster for large cohorts, not for "restarts")
+DECOMPOSE = False
+
+# set to a directory name to keep parsed csv files there, later runs on the same file skip parsing
+# (least recently used files are removed when the directory holds more than MAX_CACHE_BYTES).
+# Cached files always use the "sparse" ENGINE
+CACHE_DIRECTORY = None
+MAX_CACHE_BYTES = 2**30
+# with CACHE_DIRECTORY set, also keep the teams of every run there. A later run on the same file with the same
+# columns, constraints and solver settings only writes the output csv again (OUTPUT_COLUMNS may change)
+CACHE_RESULTS = False
+# set to True to forget the cached teams of INPUT_CSV_FILENAME before running
+INVALIDATE_CACHED_RESULTS = False
+
+# set to a file name to save the time of every stage and counters of the work done as JSON
+STATS_FILENAME = None
+# set to a file name to save a JSON report of the result (assigned people, leaders, team sizes, unlucky projects, timings)
+REPORT_FILENAME = None
+# set to a file name to save a cProfile profile of the run (open with python -m pstats)
+PROFILE_FILENAME = None
+
 RUN_TESTS = False
+# slower tests that check the time and memory of every stage against the budgets at the top of test.py
+RUN_PERFORMANCE_TESTS = False
 
 
 # DONT CHANGE FOLLOWING CODE
 
-if RUN_USER_CODE:
+# worker processes (SOLVER = "restarts" or DECOMPOSE = True) import this file again, only the main process should run it
+if RUN_USER_CODE and __name__ == "__main__":
+    stats = combined.RunStats() if STATS_FILENAME is not None else None
+
+    if INVALIDATE_CACHED_RESULTS and CACHE_DIRECTORY is not None:
+        cache.invalidateResults(CACHE_DIRECTORY,INPUT_CSV_FILENAME)
+
     combined.run(
         INPUT_CSV_FILENAME,INTEREST_COLUMN_NAME,LEADER_COLUMN_NAME,NAME_COLUMN_NAME,MIN_TEAM_SIZE,
-        MAX_TEAM_SIZE,MAX_TEAMS_PER_PROJECT,LEADERS_PER_TEAM,OUTPUT_FILENAME,OUTPUT_COLUMNS,PRINT_RESULTS
+        MAX_TEAM_SIZE,MAX_TEAMS_PER_PROJECT,LEADERS_PER_TEAM,OUTPUT_FILENAME,OUTPUT_COLUMNS,PRINT_RESULTS,ENGINE,
+        SOLVER,SOLVER_TIME_LIMIT,RESTARTS,SEED,stats,PROFILE_FILENAME,CACHE_DIRECTORY,MAX_CACHE_BYTES,READER,
+        DECOMPOSE,REPORT_FILENAME,CACHE_RESULTS
     )
 
-if RUN_TESTS:
+    if stats is not None:
+        stats.writeJSON(STATS_FILENAME)
+
+if RUN_TESTS and __name__ == "__main__":
     test.runTests()
 
+if RUN_PERFORMANCE_TESTS and __name__ == "__main__":
+    test.runPerformanceTests()
+
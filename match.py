@@ -26,13 +26,14 @@ If there are some other stuff showing up in the console, make
 sure RUN_TESTS is set to False
 """
 
-import math, random
+import random
 
 def generatePreferences(projectCount,studentCount,preferencesNum,leaderChance):
     """
     INPUT
     projectCount,studentCount: self-explanatory
-    preferencesNum: max number of unique preferences student can have
+    preferencesNum: number of unique preferences every student has
+    (for large cohorts with skewed popularity see generate.py)
 
     OUTPUT
     2D list where each row represents a student and each column
@@ -49,19 +50,15 @@ def generatePreferences(projectCount,studentCount,preferencesNum,leaderChance):
     for _ in range(studentCount):
         studentPreferenceList.append([0] * projectCount)
     
-    # add preferences
+    # add preferences, every student picks preferencesNum different projects
     for studentIndex in range(len(studentPreferenceList)):
-        preferncesToAdd = preferencesNum
-        while preferncesToAdd > 0:
-            projectLiked = math.floor(random.random() * projectCount)
+        for projectLiked in random.sample(range(projectCount),min(preferencesNum,projectCount)):
             isLeader = True if random.random() < leaderChance else False
             
             if isLeader:
-                studentPreferenceList[studentIndex][projectLiked] = 1
-            else:
                 studentPreferenceList[studentIndex][projectLiked] = LEADER_VALUE + 1
-                
-            preferncesToAdd -= 1
+            else:
+                studentPreferenceList[studentIndex][projectLiked] = 1
     
     return studentPreferenceList
 
@@ -155,8 +152,8 @@ def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeam
                     elif preferences[studentIndex][projectSummary[0]] == LEADER_VALUE + 1:
                         leadersReady.append(studentIndex)
 
-            # check if there is enough available people to make a team, otherwise project is not happening
-            if len(studentsReady) + len(leadersReady) < minTeamSize % LEADER_VALUE:
+            # check if there is enough available people (and a leader) to make a team, otherwise project is not happening
+            if len(studentsReady) + len(leadersReady) < minTeamSize % LEADER_VALUE or len(leadersReady) == 0:
                 unluckyProjects.append(projectSummary[0])
                 continue
 
@@ -192,7 +189,7 @@ def assignPlayersToProjects(summary,preferences,studentCount,minTeamSize,maxTeam
             teamsCreated = teamsCreated[:maxTeamsPerProject]
 
             # release last team if not enough members
-            if len(teamsCreated[-1]) < minTeamSize % LEADER_VALUE:
+            if teamsCreated and len(teamsCreated[-1]) < minTeamSize % LEADER_VALUE:
                 for studentIndex in teamsCreated[-1]:
                     peopleTaken[studentIndex] = 0
                 teamsCreated.pop()
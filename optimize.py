@@ -0,0 +1,676 @@
+"""
+DESCRIPTION
+
+Assignment engines that try to place more people than the greedy
+assignPlayersToProjects() in combined.py. They take the same inputs and
+return teams in the same format so the rest of the pipeline doesn't change
+
+assignPlayersToProjectsExact() decides how many teams every project gets with
+a branch and bound search. For fixed team counts the best way to fill the teams
+is a max flow problem (people -> leader/member slots of a project -> teams),
+and relaxing the team counts of undecided projects gives an upper bound on how
+many people can still be placed
+
+improveAssignment() is a local search that starts from the greedy result
+
+runRandomRestarts() runs the greedy with many random orders of projects/people
+in a process pool and keeps the best result
+"""
+
+import random, time
+from concurrent.futures import ProcessPoolExecutor
+import combined as C
+
+def checkDeadline(deadline):
+    """
+    Raises TimeoutError once time.perf_counter() passes deadline (None means no deadline)
+    """
+    if deadline is not None and time.perf_counter() > deadline:
+        raise TimeoutError("the time limit ran out")
+
+class FlowNetwork:
+    """
+    Dinic max flow on integer capacities. Edges are stored as [toNode, capacity, reverseEdgePosition]
+    inside adjacency lists so residual capacities can be read back after solving
+    """
+    def __init__(self,nodeCount):
+        self.graph = [[] for _ in range(nodeCount)]
+
+    def addEdge(self,fromNode,toNode,capacity):
+        """
+        OUTPUT
+        forward edge, its capacity after maxFlow() is the unused capacity
+        """
+        forward = [toNode,capacity,len(self.graph[toNode])]
+        backward = [fromNode,0,len(self.graph[fromNode])]
+        self.graph[fromNode].append(forward)
+        self.graph[toNode].append(backward)
+        return forward
+
+    def getLevels(self,source,deadline=None):
+        level = [-1] * len(self.graph)
+        level[source] = 0
+        queue = [source]
+
+        for visited,node in enumerate(queue):
+            if visited % 1024 == 0:
+                checkDeadline(deadline)
+            for toNode,capacity,_ in self.graph[node]:
+                if capacity > 0 and level[toNode] < 0:
+                    level[toNode] = level[node] + 1
+                    queue.append(toNode)
+        return level
+
+    def augment(self,source,sink,level,nextEdge):
+        """
+        Pushes flow along one shortest path of the level graph, returns amount pushed (0 if none left)
+        """
+        nodes = [source]
+        path = []
+
+        while nodes[-1] != sink:
+            node = nodes[-1]
+            edges = self.graph[node]
+
+            while nextEdge[node] < len(edges):
+                edge = edges[nextEdge[node]]
+                if edge[1] > 0 and level[edge[0]] == level[node] + 1:
+                    break
+                nextEdge[node] += 1
+            else:
+                # dead end, never visit this node again in the current phase
+                if node == source:
+                    return 0
+                level[node] = -1
+                nodes.pop()
+                path.pop()
+                nextEdge[nodes[-1]] += 1
+                continue
+
+            nodes.append(edge[0])
+            path.append(edge)
+
+        pushed = min(edge[1] for edge in path)
+        for edge in path:
+            edge[1] -= pushed
+            self.graph[edge[0]][edge[2]][1] += pushed
+        return pushed
+
+    def maxFlow(self,source,sink,deadline=None):
+        """
+        INPUT
+        deadline: see checkDeadline(), checked while building levels and after every augmenting path,
+        a partial flow is not a bound so TimeoutError is raised instead of returning it
+
+        OUTPUT
+        value of the maximum flow
+        """
+        flow = 0
+        while True:
+            level = self.getLevels(source,deadline)
+            if level[sink] < 0:
+                return flow
+
+            nextEdge = [0] * len(self.graph)
+            pushed = self.augment(source,sink,level,nextEdge)
+            while pushed > 0:
+                checkDeadline(deadline)
+                flow += pushed
+                pushed = self.augment(source,sink,level,nextEdge)
+
+def solveBoundedFlow(nodeCount,edges,source,sink,deadline=None):
+    """
+    INPUT
+    edges: list of (fromNode, toNode, lowerBound, upperBound)
+    deadline: see checkDeadline(), also checked while the network is built
+
+    OUTPUT (tuple)
+    flowValue: largest source -> sink flow that respects every lower bound, None if there is no such flow
+    edgeRefs: forward edge of every input edge, flow on edge i = edges[i][3] - edgeRefs[i][1]
+    """
+    network = FlowNetwork(nodeCount + 2)
+    superSource = nodeCount
+    superSink = nodeCount + 1
+    excess = [0] * nodeCount
+    edgeRefs = []
+
+    for edgePosition,(fromNode,toNode,lowerBound,upperBound) in enumerate(edges):
+        if edgePosition % 4096 == 0:
+            checkDeadline(deadline)
+        edgeRefs.append(network.addEdge(fromNode,toNode,upperBound - lowerBound))
+        excess[toNode] += lowerBound
+        excess[fromNode] -= lowerBound
+
+    requiredFlow = 0
+    for node,nodeExcess in enumerate(excess):
+        if node % 4096 == 0:
+            checkDeadline(deadline)
+        if nodeExcess > 0:
+            network.addEdge(superSource,node,nodeExcess)
+            requiredFlow += nodeExcess
+        elif nodeExcess < 0:
+            network.addEdge(node,superSink,-nodeExcess)
+
+    # lower bounds are moved onto the super source/sink, a sink -> source edge closes the circulation
+    returnEdge = network.addEdge(sink,source,sum(edge[3] for edge in edges))
+    returnCapacity = returnEdge[1]
+
+    if network.maxFlow(superSource,superSink,deadline) < requiredFlow:
+        return None, edgeRefs
+
+    flowValue = returnCapacity - returnEdge[1]
+    returnEdge[1] = 0
+    network.graph[source][returnEdge[2]][1] = 0
+
+    flowValue += network.maxFlow(source,sink,deadline)
+    return flowValue, edgeRefs
+
+def getMaxTeams(leaderCount,interestedCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam):
+    """
+    OUTPUT
+    most teams a project could ever have given how many leaders/people are interested in it
+    """
+    if interestedCount < minTeamSize or maxTeamSize < leadersPerTeam:
+        return 0
+    if leadersPerTeam == 0:
+        return min(maxTeamsPerProject,interestedCount // minTeamSize) if minTeamSize > 0 else maxTeamsPerProject
+    return min(maxTeamsPerProject,leaderCount // leadersPerTeam,interestedCount // max(minTeamSize,1))
+
+def makeAssignmentFlow(studentCount,candidateProjects,interestIndex,teamCounts,maxTeams,
+    minTeamSize,maxTeamSize,leadersPerTeam,deadline=None
+):
+    """
+    INPUT
+    candidateProjects: projects that could get at least one team
+    teamCounts: fixed number of teams for the first len(teamCounts) candidate projects, the rest are relaxed
+    to anything between 0 and maxTeams[projectIndex] teams without minimum sizes
+    deadline: see checkDeadline(), checked once per project
+
+    OUTPUT (tuple)
+    (nodeCount, edges, personEdges): network for solveBoundedFlow(), personEdges holds
+    (edgePosition, studentIndex, projectIndex, isLeaderSlot) for every person -> project edge
+    """
+    source = 0
+    sink = 1
+    nodeCount = 2 + studentCount
+    edges = [(source,2 + studentIndex,0,1) for studentIndex in range(studentCount)]
+    personEdges = []
+
+    for position,projectIndex in enumerate(candidateProjects):
+        checkDeadline(deadline)
+        leaderNode = nodeCount
+        memberNode = nodeCount + 1
+        nodeCount += 2
+
+        if position < len(teamCounts):
+            teams = teamCounts[position]
+            leaderBounds = (teams * leadersPerTeam,teams * leadersPerTeam)
+            memberBounds = (teams * max(0,minTeamSize - leadersPerTeam),teams * (maxTeamSize - leadersPerTeam))
+        else:
+            teams = maxTeams[projectIndex]
+            leaderBounds = (0,teams * leadersPerTeam)
+            memberBounds = (0,teams * (maxTeamSize - leadersPerTeam))
+
+        edges.append((leaderNode,sink) + leaderBounds)
+        edges.append((memberNode,sink) + memberBounds)
+
+        interestedStudents, interestedLeaders = interestIndex[projectIndex]
+
+        # leaders can fill either slot, the same way the greedy converts extra leaders to members
+        if leadersPerTeam > 0:
+            for studentIndex in interestedLeaders:
+                personEdges.append((len(edges),studentIndex,projectIndex,True))
+                edges.append((2 + studentIndex,leaderNode,0,1))
+        for studentIndex in interestedStudents + interestedLeaders:
+            personEdges.append((len(edges),studentIndex,projectIndex,False))
+            edges.append((2 + studentIndex,memberNode,0,1))
+
+    return nodeCount, edges, personEdges
+
+def makeTeams(teams,leaders,members,leadersPerTeam):
+    """
+    Splits the people a project received into the given number of teams, leaders first in every team
+    and members spread so team sizes differ by at most 1
+    """
+    leaders.sort()
+    members.sort()
+    baseSize, extra = divmod(len(members),teams)
+
+    teamsCreated = []
+    currentMember = 0
+    for teamNumber in range(teams):
+        newTeam = leaders[teamNumber * leadersPerTeam:(teamNumber + 1) * leadersPerTeam]
+        lastMember = currentMember + baseSize + (1 if teamNumber < extra else 0)
+        newTeam += members[currentMember:lastMember]
+        currentMember = lastMember
+        teamsCreated.append(newTeam)
+    return teamsCreated
+
+def assignPlayersToProjectsExact(summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam=1,interestIndex=None,timeLimit=10
+):
+    """
+    Same inputs as assignPlayersToProjects() plus
+    timeLimit: seconds to search before returning the best solution found
+
+    OUTPUT (tuple)
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList: same as assignPlayersToProjects()
+    sadPlayerBound: proven lower bound on sadPlayerCount, equal to sadPlayerCount if the search finished
+    The greedy solution is used as a starting point, so the result is never worse than it. The time limit
+    is also checked inside the max flows, so a search node that is still being solved doesn't overrun it
+    """
+    deadline = time.perf_counter() + timeLimit
+
+    if interestIndex is None:
+        interestIndex = C.makeInterestIndex(preferences)
+
+    greedyResult = C.assignPlayersToProjects(
+        summary,preferences,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex
+    )
+    bestAssigned = studentCount - greedyResult[2]
+    bestResult = greedyResult
+
+    maxTeams = {}
+    candidateProjects = []
+    for projectIndex,leaderCount,memberCount in summary:
+        maxTeams[projectIndex] = getMaxTeams(
+            leaderCount,leaderCount + memberCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam
+        )
+        if maxTeams[projectIndex] > 0:
+            candidateProjects.append(projectIndex)
+
+    def getBound(teamCounts):
+        nodeCount, edges, personEdges = makeAssignmentFlow(
+            studentCount,candidateProjects,interestIndex,teamCounts,maxTeams,minTeamSize,maxTeamSize,leadersPerTeam,
+            deadline
+        )
+        flowValue, edgeRefs = solveBoundedFlow(nodeCount,edges,0,1,deadline)
+        return flowValue, edges, edgeRefs, personEdges
+
+    # every stack entry holds the bound of its parent, its own bound is computed when it is visited
+    stack = [((),studentCount)]
+    timedOut = False
+
+    while stack:
+        if time.perf_counter() > deadline:
+            timedOut = True
+            break
+
+        teamCounts, parentBound = stack.pop()
+        if parentBound <= bestAssigned:
+            continue
+
+        try:
+            bound, edges, edgeRefs, personEdges = getBound(teamCounts)
+        except TimeoutError:
+            # the node stays open with the bound of its parent
+            stack.append((teamCounts,parentBound))
+            timedOut = True
+            break
+        if bound is None or bound <= bestAssigned:
+            continue
+
+        if len(teamCounts) == len(candidateProjects):
+            # every team count is fixed so the bound is an actual assignment
+            bestAssigned = bound
+            bestResult = extractResult(
+                summary,studentCount,candidateProjects,teamCounts,edges,edgeRefs,personEdges,leadersPerTeam
+            )
+            continue
+
+        # most teams are popped first so good solutions are found early
+        projectIndex = candidateProjects[len(teamCounts)]
+        for teams in range(maxTeams[projectIndex] + 1):
+            stack.append((teamCounts + (teams,),bound))
+
+    if timedOut:
+        openBound = max([bound for _,bound in stack] + [bestAssigned])
+    else:
+        openBound = bestAssigned
+
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList = bestResult
+    return unluckyProjects, teamsAssigned, sadPlayerCount, sadList, studentCount - openBound
+
+def extractResult(summary,studentCount,candidateProjects,teamCounts,edges,edgeRefs,personEdges,leadersPerTeam):
+    """
+    Turns the flow of a fully fixed search node into the output format of assignPlayersToProjects()
+    """
+    peopleTaken = [0] * studentCount
+    projectLeaders = {projectIndex: [] for projectIndex in candidateProjects}
+    projectMembers = {projectIndex: [] for projectIndex in candidateProjects}
+
+    for edgePosition,studentIndex,projectIndex,isLeaderSlot in personEdges:
+        if edges[edgePosition][3] - edgeRefs[edgePosition][1] > 0:
+            peopleTaken[studentIndex] = 1
+            if isLeaderSlot:
+                projectLeaders[projectIndex].append(studentIndex)
+            else:
+                projectMembers[projectIndex].append(studentIndex)
+
+    projectTeamCounts = dict(zip(candidateProjects,teamCounts))
+    unluckyProjects = []
+    teamsAssigned = {}
+
+    for projectSummary in summary:
+        projectIndex = projectSummary[0]
+        teams = projectTeamCounts.get(projectIndex,0)
+
+        if teams == 0:
+            unluckyProjects.append(projectIndex)
+        else:
+            teamsAssigned[projectIndex] = makeTeams(
+                teams,projectLeaders[projectIndex],projectMembers[projectIndex],leadersPerTeam
+            )
+
+    unluckyProjects.sort()
+    sadList = [studentIndex for studentIndex in range(studentCount) if peopleTaken[studentIndex] == 0]
+    return unluckyProjects, teamsAssigned, len(sadList), sadList
+
+def improveAssignment(summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+    interestIndex,teamsAssigned,sadList,timeLimit=2,iterationLimit=1000,seed=0
+):
+    """
+    Local search that starts from an assignment (usually the greedy one) and tries to place unassigned people.
+    Moves:
+    insert: unassigned person joins a team with room on a project they are interested in
+    shift: unassigned person takes the spot of a member who moves to another team with room
+    form: a new team is made for a project from unassigned people, plus members that teams above
+    minTeamSize can spare
+    swap: two members trade teams, doesn't change the score but lets the search leave dead ends
+    Teams keep their leaders in the first leadersPerTeam spots
+
+    The teams with room of every project and the number of unassigned leaders and members interested in
+    every project are kept up to date with every move, with p projects picked per person, t =
+    maxTeamsPerProject and m = maxTeamSize: insert is O(p) per unassigned person, checking whether one member
+    can make room is O(p) so shift is O(p * t * m * p) per unassigned person, form is O(1) per project unless
+    the counts show it can place someone (the interest lists of the project are only scanned then) and a swap
+    is O(p * t * m). The time limit is checked after every person, project and swap
+
+    INPUT
+    interestIndex: result of combined.makeInterestIndex()
+    teamsAssigned, sadList: starting assignment, same format as assignPlayersToProjects() (not modified)
+    timeLimit, iterationLimit: search stops when either runs out or everyone is assigned
+    seed: seed for the random order moves are tried in
+
+    OUTPUT (tuple)
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList: same format as assignPlayersToProjects()
+    """
+    startTime = time.perf_counter()
+    generator = random.Random(seed)
+
+    # personProjects[studentIndex] maps every project the person picked to MEMBER/LEADER
+    personProjects = [{} for _ in range(studentCount)]
+    for projectIndex,(interestedStudents,interestedLeaders) in enumerate(interestIndex):
+        for studentIndex in interestedStudents:
+            personProjects[studentIndex][projectIndex] = C.MEMBER
+        for studentIndex in interestedLeaders:
+            personProjects[studentIndex][projectIndex] = C.LEADER
+
+    # teams[teamId] = [projectIndex, people], personTeam[studentIndex] = teamId or -1 if unassigned
+    teams = []
+    projectTeams = {projectSummary[0]: [] for projectSummary in summary}
+    personTeam = [-1] * studentCount
+
+    for projectIndex,projectTeamList in teamsAssigned.items():
+        for team in projectTeamList:
+            for studentIndex in team:
+                personTeam[studentIndex] = len(teams)
+            projectTeams[projectIndex].append(len(teams))
+            teams.append([projectIndex,list(team)])
+
+    unassigned = set(sadList)
+
+    # openTeams[projectIndex] = ids of the teams of the project with room
+    openTeams = {projectIndex: set() for projectIndex in projectTeams}
+    for teamId,(projectIndex,people) in enumerate(teams):
+        if len(people) < maxTeamSize:
+            openTeams[projectIndex].add(teamId)
+
+    # unassigned people interested in every project as a leader / as a member
+    freeLeaderCounts = dict.fromkeys(projectTeams,0)
+    freeMemberCounts = dict.fromkeys(projectTeams,0)
+    for studentIndex in unassigned:
+        for projectIndex,cellValue in personProjects[studentIndex].items():
+            if cellValue == C.LEADER:
+                freeLeaderCounts[projectIndex] += 1
+            else:
+                freeMemberCounts[projectIndex] += 1
+
+    def updateRoom(teamId):
+        projectIndex, people = teams[teamId]
+        if len(people) < maxTeamSize:
+            openTeams[projectIndex].add(teamId)
+        else:
+            openTeams[projectIndex].discard(teamId)
+
+    def markAssigned(studentIndex):
+        if studentIndex in unassigned:
+            unassigned.discard(studentIndex)
+            for projectIndex,cellValue in personProjects[studentIndex].items():
+                if cellValue == C.LEADER:
+                    freeLeaderCounts[projectIndex] -= 1
+                else:
+                    freeMemberCounts[projectIndex] -= 1
+
+    def addToTeam(studentIndex,teamId):
+        teams[teamId][1].append(studentIndex)
+        personTeam[studentIndex] = teamId
+        markAssigned(studentIndex)
+        updateRoom(teamId)
+
+    def getOpenTeam(projectIndex):
+        # the first team of the project with room, like scanning projectTeams in order
+        return min(openTeams[projectIndex]) if openTeams[projectIndex] else -1
+
+    def tryInsert(studentIndex):
+        for projectIndex in personProjects[studentIndex]:
+            teamId = getOpenTeam(projectIndex)
+            if teamId >= 0:
+                addToTeam(studentIndex,teamId)
+                return True
+        return False
+
+    def tryShift(studentIndex):
+        # called after tryInsert() failed, so every team of the person's projects is full
+        for projectIndex in personProjects[studentIndex]:
+            for teamId in projectTeams[projectIndex]:
+                people = teams[teamId][1]
+                for position in range(leadersPerTeam,len(people)):
+                    memberIndex = people[position]
+                    for otherProject in personProjects[memberIndex]:
+                        otherTeamId = getOpenTeam(otherProject)
+                        if otherTeamId >= 0 and otherTeamId != teamId:
+                            people[position] = studentIndex
+                            personTeam[studentIndex] = teamId
+                            markAssigned(studentIndex)
+                            addToTeam(memberIndex,otherTeamId)
+                            return True
+        return False
+
+    def tryForm(projectIndex):
+        if len(projectTeams[projectIndex]) >= maxTeamsPerProject:
+            return False
+
+        # only worth it if the new team places someone who is unassigned
+        freeLeaderCount = freeLeaderCounts[projectIndex]
+        if freeLeaderCount < leadersPerTeam or freeLeaderCount + freeMemberCounts[projectIndex] == 0:
+            return False
+
+        interestedStudents, interestedLeaders = interestIndex[projectIndex]
+        freeLeaders = [studentIndex for studentIndex in interestedLeaders if studentIndex in unassigned]
+        freeMembers = [studentIndex for studentIndex in interestedStudents if studentIndex in unassigned]
+
+        newTeam = freeLeaders[:leadersPerTeam]
+        candidates = freeLeaders[leadersPerTeam:] + freeMembers
+        newTeam += candidates[:maxTeamSize - len(newTeam)]
+
+        # borrow members from teams that can spare them
+        borrowed = []
+        if len(newTeam) < minTeamSize:
+            spare = {}
+            for studentIndex in interestedStudents + interestedLeaders:
+                teamId = personTeam[studentIndex]
+                if teamId < 0 or teams[teamId][1].index(studentIndex) < leadersPerTeam:
+                    continue
+                spare.setdefault(teamId,len(teams[teamId][1]) - minTeamSize)
+                if spare[teamId] > 0:
+                    spare[teamId] -= 1
+                    borrowed.append(studentIndex)
+                    if len(newTeam) + len(borrowed) == minTeamSize:
+                        break
+
+        if len(newTeam) + len(borrowed) < minTeamSize:
+            return False
+
+        for studentIndex in borrowed:
+            teams[personTeam[studentIndex]][1].remove(studentIndex)
+            updateRoom(personTeam[studentIndex])
+
+        projectTeams[projectIndex].append(len(teams))
+        teams.append([projectIndex,[]])
+        for studentIndex in newTeam + borrowed:
+            addToTeam(studentIndex,len(teams) - 1)
+        return True
+
+    def randomSwap():
+        if len(teams) < 2:
+            return
+        teamId = generator.randrange(len(teams))
+        people = teams[teamId][1]
+        if len(people) <= leadersPerTeam:
+            return
+
+        position = generator.randrange(leadersPerTeam,len(people))
+        memberIndex = people[position]
+        for otherProject in personProjects[memberIndex]:
+            for otherTeamId in projectTeams[otherProject]:
+                if otherTeamId == teamId:
+                    continue
+                otherPeople = teams[otherTeamId][1]
+                for otherPosition in range(leadersPerTeam,len(otherPeople)):
+                    otherMember = otherPeople[otherPosition]
+                    if teams[teamId][0] in personProjects[otherMember]:
+                        people[position], otherPeople[otherPosition] = otherMember, memberIndex
+                        personTeam[memberIndex] = otherTeamId
+                        personTeam[otherMember] = teamId
+                        return
+
+    deadline = startTime + timeLimit
+    iteration = 0
+    while unassigned and iteration < iterationLimit and time.perf_counter() < deadline:
+        iteration += 1
+        improved = False
+
+        order = sorted(unassigned)
+        generator.shuffle(order)
+        for studentIndex in order:
+            if time.perf_counter() > deadline:
+                break
+            if tryInsert(studentIndex) or tryShift(studentIndex):
+                improved = True
+
+        for projectIndex in projectTeams:
+            if time.perf_counter() > deadline:
+                break
+            if tryForm(projectIndex):
+                improved = True
+
+        if not improved:
+            for _ in range(len(teams)):
+                if time.perf_counter() > deadline:
+                    break
+                randomSwap()
+
+    teamsAssigned = {}
+    for projectSummary in summary:
+        projectIndex = projectSummary[0]
+        if projectTeams[projectIndex]:
+            teamsAssigned[projectIndex] = [teams[teamId][1] for teamId in projectTeams[projectIndex]]
+
+    unluckyProjects = sorted(projectIndex for projectIndex in projectTeams if not projectTeams[projectIndex])
+    sadList = sorted(unassigned)
+    return unluckyProjects, teamsAssigned, len(sadList), sadList
+
+# cohort shared with the worker processes of runRandomRestarts(), set once per worker by setWorkerCohort()
+workerCohort = {}
+
+def setWorkerCohort(summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex):
+    workerCohort["arguments"] = (
+        summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex
+    )
+
+def runWorkerRestart(seed):
+    return assignPlayersToProjectsRandomized(*workerCohort["arguments"],seed)
+
+def assignPlayersToProjectsRandomized(summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,
+    leadersPerTeam,interestIndex,seed
+):
+    """
+    Greedy assignPlayersToProjects() with a random order of the people and random tie breaking
+    between projects with the same summary key. The same seed always gives the same result
+
+    OUTPUT
+    same tuple as assignPlayersToProjects()
+    """
+    generator = random.Random(seed)
+
+    tieBreaks = [generator.random() for _ in summary]
+    order = sorted(
+        range(len(summary)),key = lambda position: (C.getSummaryKey(summary[position]),tieBreaks[position])
+    )
+    shuffledSummary = [summary[position] for position in order]
+
+    personRank = list(range(studentCount))
+    generator.shuffle(personRank)
+    shuffledIndex = [
+        (sorted(interestedStudents,key = personRank.__getitem__),sorted(interestedLeaders,key = personRank.__getitem__))
+        for interestedStudents,interestedLeaders in interestIndex
+    ]
+
+    return C.assignPlayersToProjects(
+        shuffledSummary,None,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,shuffledIndex
+    )
+
+def getResultRank(result):
+    """
+    Sort key for results, fewest unassigned people first, then fewest unlucky projects
+    """
+    unluckyProjects, _, sadPlayerCount, _ = result
+    return (sadPlayerCount,len(unluckyProjects))
+
+def runRandomRestarts(summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,
+    interestIndex,restarts,seed=0,workers=None
+):
+    """
+    Runs assignPlayersToProjectsRandomized() with seeds seed, seed + 1, ..., seed + restarts - 1 in a process pool.
+    The cohort is sent to each worker once when it starts, tasks only carry their seed
+
+    INPUT
+    workers: number of processes, None uses every core, 0 runs the restarts in this process
+
+    OUTPUT (tuple)
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList: best result, plain greedy result included
+    bestSeed: seed that gave the best result, None if the plain greedy was best
+    """
+    arguments = (summary,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex)
+    seeds = list(range(seed,seed + restarts))
+
+    if workers == 0:
+        results = [assignPlayersToProjectsRandomized(*arguments,restartSeed) for restartSeed in seeds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers,initializer=setWorkerCohort,initargs=arguments) as executor:
+            results = list(executor.map(runWorkerRestart,seeds,chunksize=max(1,restarts // 32)))
+
+    bestSeed = None
+    bestResult = C.assignPlayersToProjects(
+        summary,None,studentCount,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,interestIndex
+    )
+
+    # results are compared in seed order so ties always resolve the same way
+    for restartSeed,result in zip(seeds,results):
+        if getResultRank(result) < getResultRank(bestResult):
+            bestSeed = restartSeed
+            bestResult = result
+
+    unluckyProjects, teamsAssigned, sadPlayerCount, sadList = bestResult
+    return unluckyProjects, teamsAssigned, sadPlayerCount, sadList, bestSeed
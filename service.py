@@ -0,0 +1,424 @@
+"""
+DESCRIPTION
+
+Local HTTP service that keeps parsed cohorts in memory so repeated groupings only pay for the assignment
+
+A csv file is loaded once (by path or uploaded in the request body) and kept under a cohort id, the
+maxCohorts most recently used cohorts stay in memory. Assignments with any constraints then reuse the
+loaded cohort. Cohorts are loaded through the cache of cache.py, so the cohort id is the name of a cache
+file: solving runs in a process pool (like optimize.runRandomRestarts()) and every worker process maps the
+cache file of a cohort the first time it solves it and keeps it (the maxCohorts it used last), so a solve
+only sends the cohort id and the settings. Loading, hashing and writing files are I/O bound and run in a
+thread pool. Both keep the server answering other requests
+
+Paths in requests (path, outputFilename) are relative to dataDirectory, anything that resolves to a file
+outside of it is refused
+
+Endpoints (JSON in and out):
+POST   /cohorts                    {"path": "file.csv", "interestColumnName": ..., "leaderColumnName": ...,
+                                   "nameColumnName": ...} or the csv file itself as the body (text/csv, the
+                                   column names then go in the query string)
+                                   -> {"cohortId", "studentCount", "projectCount"}
+GET    /cohorts                    -> list of loaded cohorts
+POST   /cohorts/<cohortId>/assign  {"minTeamSize", "maxTeamSize", "maxTeamsPerProject", "leadersPerTeam",
+                                   "solver", "timeLimit", "restarts", "seed", "outputFilename", "outputColumns"}
+                                   (all optional) -> teams and unassigned people by name
+DELETE /cohorts/<cohortId>
+
+Run from the terminal, for example:
+py ./service.py --port 8765
+py ./service.py --unix-socket /tmp/grouping.sock
+"""
+
+import argparse, asyncio, hashlib, json, os, time
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+import combined as C, cache
+
+ASSIGN_DEFAULTS = {
+    "minTeamSize": 2,
+    "maxTeamSize": 3,
+    "maxTeamsPerProject": 1,
+    "leadersPerTeam": 1,
+    "solver": "greedy",
+    "timeLimit": 10,
+    "restarts": 8,
+    "seed": 0
+}
+
+STATUS_TEXT = {
+    200: "OK", 400: "Bad Request", 403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed",
+    500: "Internal Server Error"
+}
+
+class RequestError(Exception):
+    def __init__(self,status,message):
+        super().__init__(message)
+        self.status = status
+
+# cohorts of a solve worker process, set up by setWorkerCohorts()
+workerCohorts = {}
+
+def setWorkerCohorts(cacheDirectory,maxCohorts):
+    workerCohorts["cacheDirectory"] = cacheDirectory
+    workerCohorts["maxCohorts"] = maxCohorts
+    workerCohorts["cohorts"] = OrderedDict()
+
+def assignInWorker(cohortId,assignArguments):
+    """
+    Runs combined.assignCohort() in a solve worker on the cohort mapped from the cache file cohortId, the
+    file is mapped the first time this worker sees the cohort and unmapped when it is the least recently
+    used of more than maxCohorts
+
+    OUTPUT (tuple)
+    assignment, solverInfo: see combined.assignCohort()
+    """
+    cohorts = workerCohorts["cohorts"]
+    if cohortId not in cohorts:
+        cohorts[cohortId] = cache.readCohortCache(
+            os.path.join(workerCohorts["cacheDirectory"],cohortId + cache.CACHE_SUFFIX)
+        )
+        while len(cohorts) > workerCohorts["maxCohorts"]:
+            cohorts.popitem(last=False)[1].close()
+
+    cohorts.move_to_end(cohortId)
+    return C.assignCohort(cohorts[cohortId],*assignArguments)
+
+class GroupingService:
+    """
+    INPUT
+    maxCohorts: number of loaded cohorts kept in memory (by the server and by every solve worker), the least
+    recently used one is dropped first
+    workers: processes used to assign cohorts (None lets ProcessPoolExecutor choose)
+    uploadDirectory: where csv files sent in a request body are saved, inside dataDirectory
+    loadWorkers: threads used to load cohorts and read and write files (None lets ThreadPoolExecutor choose)
+    dataDirectory: paths in requests are relative to it, files outside of it can't be read or written
+    cacheDirectory, maxCacheBytes: where the loaded cohorts are kept for the solve workers, see
+    cache.loadCohortCached()
+    """
+    def __init__(self,maxCohorts=8,workers=None,uploadDirectory="uploads",loadWorkers=None,dataDirectory=".",
+        cacheDirectory="cohortCache",maxCacheBytes=2**30
+    ):
+        self.maxCohorts = maxCohorts
+        self.dataDirectory = os.path.realpath(dataDirectory)
+        self.uploadDirectory = uploadDirectory
+        self.cacheDirectory = os.path.abspath(cacheDirectory)
+        self.maxCacheBytes = maxCacheBytes
+        os.makedirs(self.cacheDirectory,exist_ok=True)
+        self.solveExecutor = ProcessPoolExecutor(
+            max_workers=workers,initializer=setWorkerCohorts,initargs=(self.cacheDirectory,maxCohorts)
+        )
+        self.loadExecutor = ThreadPoolExecutor(max_workers=loadWorkers)
+        # cohortId -> (cohort, info), only touched from the event loop
+        self.cohorts = OrderedDict()
+        # cohortId -> task loading it, so the same file requested twice is only loaded once
+        self.loading = {}
+        # number of running assignments of every cohort, a dropped cohort is closed when its last one finishes
+        self.cohortUsers = Counter()
+        self.droppedCohorts = set()
+
+    async def runInExecutor(self,function,*args):
+        return await asyncio.get_running_loop().run_in_executor(self.loadExecutor,function,*args)
+
+    async def runInProcess(self,function,*args):
+        return await asyncio.get_running_loop().run_in_executor(self.solveExecutor,function,*args)
+
+    def close(self):
+        for cohort,_,_ in self.cohorts.values():
+            self.dropCohort(cohort)
+        self.cohorts.clear()
+        self.solveExecutor.shutdown()
+        self.loadExecutor.shutdown()
+
+    def dropCohort(self,cohort):
+        """
+        Closes the memory-mapped file of a cohort that is no longer kept, after the assignments using it finish
+        """
+        if self.cohortUsers[cohort] > 0:
+            self.droppedCohorts.add(cohort)
+        else:
+            cohort.close()
+
+    def getDataPath(self,fileName):
+        """
+        OUTPUT
+        fileName resolved against dataDirectory (symbolic links and .. included), RequestError if it is outside
+        """
+        path = os.path.realpath(os.path.join(self.dataDirectory,fileName))
+        if os.path.commonpath([path,self.dataDirectory]) != self.dataDirectory:
+            raise RequestError(403,f"{fileName} is outside of the data directory")
+        return path
+
+    def saveUpload(self,body):
+        """
+        OUTPUT
+        path of the saved file relative to dataDirectory
+        """
+        fileName = os.path.join(self.uploadDirectory,hashlib.blake2b(body,digest_size=16).hexdigest() + ".csv")
+        path = self.getDataPath(fileName)
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        if not os.path.exists(path):
+            with open(path,"wb") as file:
+                file.write(body)
+        return fileName
+
+    def loadCohortFile(self,path,interestColumnName,leaderColumnName,nameColumnName):
+        # every column is in the cache file, so any output column can be written later
+        return cache.loadCohortCached(
+            path,interestColumnName,leaderColumnName,nameColumnName,self.cacheDirectory,self.maxCacheBytes
+        )
+
+    async def addCohort(self,inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName):
+        """
+        Loads the csv file (through the cache, see cache.loadCohortCached()) unless it is already loaded
+        with the same columns
+
+        OUTPUT
+        info: dict with cohortId, inputCSVfilename, studentCount, projectCount
+        """
+        path = self.getDataPath(inputCSVfilename)
+        if not os.path.isfile(path):
+            raise RequestError(404,f"no file {inputCSVfilename}")
+
+        fileHash = await self.runInExecutor(cache.getCachedFileHash,self.cacheDirectory,path)
+        cohortId = cache.getCacheKey(fileHash,interestColumnName,leaderColumnName,nameColumnName)
+
+        if cohortId in self.cohorts:
+            self.cohorts.move_to_end(cohortId)
+            return self.cohorts[cohortId][1]
+
+        if cohortId not in self.loading:
+            self.loading[cohortId] = asyncio.ensure_future(self.runInExecutor(
+                self.loadCohortFile,path,interestColumnName,leaderColumnName,nameColumnName
+            ))
+
+        try:
+            cohort = await self.loading[cohortId]
+        except KeyError as error:
+            raise RequestError(400,f"no column {error} in {inputCSVfilename}")
+        finally:
+            self.loading.pop(cohortId,None)
+
+        # the solve workers map the cache file by its name, which changes if the file changed since it was hashed
+        cohortId = os.path.basename(cohort.records.sectionFile.fileName)[:-len(cache.CACHE_SUFFIX)]
+
+        info = {
+            "cohortId": cohortId,
+            "inputCSVfilename": inputCSVfilename,
+            "studentCount": cohort.studentCount,
+            "projectCount": cohort.projectCount
+        }
+        self.cohorts[cohortId] = (cohort,info,(path,interestColumnName,leaderColumnName,nameColumnName))
+        self.cohorts.move_to_end(cohortId)
+        while len(self.cohorts) > self.maxCohorts:
+            _, (droppedCohort, _, _) = self.cohorts.popitem(last=False)
+            self.dropCohort(droppedCohort)
+
+        return info
+
+    def getCohort(self,cohortId):
+        """
+        OUTPUT (tuple)
+        cohort: the loaded combined.Cohort
+        source: path and column names it was loaded from
+        """
+        if cohortId not in self.cohorts:
+            raise RequestError(404,f"no cohort {cohortId}, load it again with POST /cohorts")
+        self.cohorts.move_to_end(cohortId)
+        cohort, _, source = self.cohorts[cohortId]
+        return cohort, source
+
+    async def assign(self,cohortId,options):
+        """
+        INPUT
+        options: keys of ASSIGN_DEFAULTS, plus outputFilename and outputColumns to also write the result file
+
+        OUTPUT
+        dict with sadPlayerCount, unluckyProjects, teams (project name -> list of teams of names),
+        unassigned (names), solverInfo and the seconds the assignment took
+        """
+        cohort, source = self.getCohort(cohortId)
+        self.cohortUsers[cohort] += 1
+        try:
+            return await self.assignLoaded(cohortId,cohort,source,options)
+        finally:
+            self.cohortUsers[cohort] -= 1
+            if self.cohortUsers[cohort] == 0:
+                del self.cohortUsers[cohort]
+                if cohort in self.droppedCohorts:
+                    self.droppedCohorts.discard(cohort)
+                    cohort.close()
+
+    async def assignLoaded(self,cohortId,cohort,source,options):
+        unknownOptions = set(options) - set(ASSIGN_DEFAULTS) - {"outputFilename","outputColumns"}
+        if unknownOptions:
+            raise RequestError(400,f"unknown options {sorted(unknownOptions)}")
+
+        settings = dict(ASSIGN_DEFAULTS)
+        settings.update(options)
+        outputFilename = self.getDataPath(settings["outputFilename"]) if "outputFilename" in settings else None
+
+        # only the cohort id and these settings are sent to the solve worker
+        assignArguments = (
+            settings["minTeamSize"],settings["maxTeamSize"],settings["maxTeamsPerProject"],settings["leadersPerTeam"],
+            settings["solver"],settings["timeLimit"],settings["restarts"],settings["seed"]
+        )
+        startTime = time.perf_counter()
+        try:
+            assignment, solverInfo = await self.runInProcess(assignInWorker,cohortId,assignArguments)
+        except FileNotFoundError:
+            # the cache file was evicted before this worker mapped it, write it again
+            reloadedCohort = await self.runInExecutor(self.loadCohortFile,*source)
+            reloadedCohort.close()
+            assignment, solverInfo = await self.runInProcess(assignInWorker,cohortId,assignArguments)
+        seconds = time.perf_counter() - startTime
+
+        if outputFilename is not None:
+            await self.runInExecutor(
+                C.createCSVfile,outputFilename,assignment,cohort.records,
+                cohort.projectNames,cohort.headerNameToColumnIndex,
+                settings.get("outputColumns",["Name"]),assignment.getSadList()
+            )
+
+        names = cohort.studentNames
+        projectNames = cohort.projectNames
+        return {
+            "sadPlayerCount": assignment.sadPlayerCount,
+            "unluckyProjects": [projectNames[projectIndex] for projectIndex in assignment.unluckyProjects],
+            "teams": {
+                projectNames[projectIndex]: [[names[studentIndex] for studentIndex in team] for team in teams]
+                for projectIndex,teams in assignment.getProjectTeams()
+            },
+            "unassigned": [names[studentIndex] for studentIndex in assignment.getSadList()],
+            "solverInfo": solverInfo,
+            "seconds": seconds
+        }
+
+    async def handleRequest(self,method,target,body=b"",contentType="application/json"):
+        """
+        OUTPUT (tuple)
+        status: HTTP status code
+        payload: JSON-serializable response, {"error": message} if the request failed
+        """
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = dict(parse_qsl(url.query))
+
+        try:
+            if parts == ["cohorts"] and method == "GET":
+                return 200, [info for _,info,_ in self.cohorts.values()]
+
+            if parts == ["cohorts"] and method == "POST":
+                if contentType.startswith("text/csv"):
+                    request = query
+                    request["path"] = await self.runInExecutor(self.saveUpload,body)
+                else:
+                    request = parseJSON(body)
+                if "path" not in request:
+                    raise RequestError(400,"give the path of the csv file or send it as text/csv")
+
+                return 200, await self.addCohort(
+                    request["path"],request.get("interestColumnName","Interested?"),
+                    request.get("leaderColumnName","Leader?"),request.get("nameColumnName","Name")
+                )
+
+            if len(parts) == 2 and parts[0] == "cohorts" and method == "DELETE":
+                self.dropCohort(self.getCohort(parts[1]))
+                del self.cohorts[parts[1]]
+                return 200, {"deleted": parts[1]}
+
+            if len(parts) == 3 and parts[0] == "cohorts" and parts[2] == "assign" and method == "POST":
+                return 200, await self.assign(parts[1],parseJSON(body))
+
+            if parts and parts[0] == "cohorts":
+                raise RequestError(405,f"{method} is not supported on {url.path}")
+            raise RequestError(404,f"unknown path {url.path}")
+        except RequestError as error:
+            return error.status, {"error": str(error)}
+        except Exception as error:
+            return 500, {"error": repr(error)}
+
+    async def handleConnection(self,reader,writer):
+        """
+        Reads one HTTP/1.1 request from the connection, answers it and closes the connection
+        """
+        try:
+            requestLine = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            body = await reader.readexactly(int(headers.get("content-length","0")))
+
+            if len(requestLine) < 2:
+                status, payload = 400, {"error": "malformed request line"}
+            else:
+                status, payload = await self.handleRequest(
+                    requestLine[0].upper(),requestLine[1],body,headers.get("content-type","application/json")
+                )
+
+            responseBody = json.dumps(payload).encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status,'')}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(responseBody)}\r\nConnection: close\r\n\r\n".encode("latin-1") + responseBody
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError,ConnectionError,ValueError):
+            pass
+        finally:
+            writer.close()
+
+def parseJSON(body):
+    if not body:
+        return {}
+    try:
+        request = json.loads(body)
+    except ValueError:
+        raise RequestError(400,"body is not valid JSON")
+    if not isinstance(request,dict):
+        raise RequestError(400,"body must be a JSON object")
+    return request
+
+async def serve(host="127.0.0.1",port=8765,unixSocketPath=None,maxCohorts=8,workers=None,loadWorkers=None,
+    dataDirectory=".",cacheDirectory="cohortCache"
+):
+    service = GroupingService(
+        maxCohorts,workers,loadWorkers=loadWorkers,dataDirectory=dataDirectory,cacheDirectory=cacheDirectory
+    )
+
+    if unixSocketPath is not None:
+        server = await asyncio.start_unix_server(service.handleConnection,unixSocketPath)
+        print(f"grouping service listening on {unixSocketPath}")
+    else:
+        server = await asyncio.start_server(service.handleConnection,host,port)
+        print(f"grouping service listening on http://{host}:{port}")
+
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+def parseArguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Local grouping service keeping loaded cohorts in memory")
+    parser.add_argument("--host",default="127.0.0.1")
+    parser.add_argument("--port",type=int,default=8765)
+    parser.add_argument("--unix-socket",default=None,help="listen on this Unix socket instead of host/port")
+    parser.add_argument("--max-cohorts",type=int,default=8,help="loaded cohorts kept in memory")
+    parser.add_argument("--workers",type=int,default=None,help="processes used to assign cohorts")
+    parser.add_argument("--load-workers",type=int,default=None,help="threads used to load cohorts and write files")
+    parser.add_argument("--data-directory",default=".",help="paths in requests are relative to it and stay inside it")
+    parser.add_argument("--cache-directory",default="cohortCache",help="cache files the solve workers map")
+    return parser.parse_args(arguments)
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    asyncio.run(serve(
+        arguments.host,arguments.port,arguments.unix_socket,arguments.max_cohorts,arguments.workers,
+        arguments.load_workers,arguments.data_directory,arguments.cache_directory
+    ))
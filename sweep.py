@@ -0,0 +1,172 @@
+"""
+DESCRIPTION
+
+Tries many team constraints on one cohort to help pick MIN_TEAM_SIZE, MAX_TEAM_SIZE,
+MAX_TEAMS_PER_PROJECT and LEADERS_PER_TEAM
+
+The csv file is read and encoded once with combined.loadCohort(), then every combination
+of the given constraints is assigned with combined.assignCohort() (in a process pool if
+workers is not 0) and the results are returned as a table
+
+Run from the terminal, for example:
+py ./sweep.py testCSVprocess.csv --min 2 3 --max 3 4 --teams 1 2 --leaders 1
+"""
+
+import argparse, itertools, time
+from concurrent.futures import ProcessPoolExecutor
+import combined as C
+
+SWEEP_COLUMNS = [
+    "minTeamSize","maxTeamSize","maxTeamsPerProject","leadersPerTeam",
+    "sadPlayerCount","unluckyProjectCount","seconds"
+]
+
+workerCohort = {}
+
+def setWorkerCohort(cohort,solver,timeLimit):
+    workerCohort["cohort"] = cohort
+    workerCohort["solver"] = (solver,timeLimit)
+
+def runWorkerConstraints(constraints):
+    return evaluateConstraints(workerCohort["cohort"],constraints,*workerCohort["solver"])
+
+def getConstraintGrid(minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues):
+    """
+    OUTPUT
+    list of every (minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam) combination,
+    skipping the ones where minTeamSize > maxTeamSize or leadersPerTeam > maxTeamSize
+    """
+    return [
+        (minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam)
+        for minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam in itertools.product(
+            minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues
+        )
+        if minTeamSize <= maxTeamSize and leadersPerTeam <= maxTeamSize
+    ]
+
+def evaluateConstraints(cohort,constraints,solver="greedy",timeLimit=10):
+    """
+    OUTPUT
+    dict with the constraints, sadPlayerCount, unluckyProjectCount and the seconds the assignment took
+    (keys are SWEEP_COLUMNS)
+    """
+    minTeamSize, maxTeamSize, maxTeamsPerProject, leadersPerTeam = constraints
+
+    startTime = time.perf_counter()
+    assignment, _ = C.assignCohort(cohort,minTeamSize,maxTeamSize,maxTeamsPerProject,leadersPerTeam,solver,timeLimit)
+
+    return {
+        "minTeamSize": minTeamSize,
+        "maxTeamSize": maxTeamSize,
+        "maxTeamsPerProject": maxTeamsPerProject,
+        "leadersPerTeam": leadersPerTeam,
+        "sadPlayerCount": assignment.sadPlayerCount,
+        "unluckyProjectCount": len(assignment.unluckyProjects),
+        "seconds": time.perf_counter() - startTime
+    }
+
+def sweepConstraints(cohort,minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues,
+    solver="greedy",timeLimit=10,workers=0
+):
+    """
+    INPUT
+    cohort: result of combined.loadCohort()
+    minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues: values to try for each constraint
+    solver, timeLimit: see combined.assignCohort() ("restarts" already uses a process pool, keep workers at 0)
+    workers: number of processes, None uses every core, 0 evaluates everything in this process
+
+    OUTPUT
+    list of results of evaluateConstraints(), one per combination from getConstraintGrid()
+    """
+    grid = getConstraintGrid(minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues)
+
+    if workers == 0:
+        return [evaluateConstraints(cohort,constraints,solver,timeLimit) for constraints in grid]
+
+    # workers only need what assignCohort() reads, the records stay in this process
+    sharedCohort = C.Cohort(
+        None,None,None,cohort.studentNames,cohort.projectNames,cohort.projectNameToIndex,
+        cohort.summary,cohort.interestIndex
+    )
+
+    with ProcessPoolExecutor(
+        max_workers=workers,initializer=setWorkerCohort,initargs=(sharedCohort,solver,timeLimit)
+    ) as executor:
+        return list(executor.map(runWorkerConstraints,grid))
+
+def sortSweepResults(results):
+    """
+    OUTPUT
+    results ordered from best to worst: fewest unassigned people, then fewest unlucky projects
+    """
+    return sorted(results,key = lambda result: (result["sadPlayerCount"],result["unluckyProjectCount"]))
+
+def formatSweepTable(results):
+    """
+    OUTPUT (string)
+    results as a table with one row per combination and the columns of SWEEP_COLUMNS
+    """
+    rows = [SWEEP_COLUMNS] + [
+        [str(result[column]) if column != "seconds" else f"{result[column]:.3f}" for column in SWEEP_COLUMNS]
+        for result in results
+    ]
+    columnWidths = [max(len(row[columnIndex]) for row in rows) for columnIndex in range(len(SWEEP_COLUMNS))]
+
+    return "\n".join(
+        "  ".join(value.rjust(width) for value,width in zip(row,columnWidths)) for row in rows
+    )
+
+def writeSweepCSV(fileName,results):
+    with open(fileName,"w",newline="") as file:
+        file.write(",".join(SWEEP_COLUMNS) + "\n")
+        for result in results:
+            file.write(",".join(str(result[column]) for column in SWEEP_COLUMNS) + "\n")
+
+def runSweep(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,minTeamSizes,maxTeamSizes,
+    maxTeamsPerProjectValues,leadersPerTeamValues,engine="sparse",solver="greedy",timeLimit=10,workers=0,
+    outputFilename=None
+):
+    """
+    Loads the cohort once, sweeps the constraints and prints the results from best to worst
+
+    OUTPUT
+    results of sweepConstraints() ordered with sortSweepResults(), also written to outputFilename if given
+    """
+    startTime = time.perf_counter()
+    cohort = C.loadCohort(inputCSVfilename,interestColumnName,leaderColumnName,nameColumnName,[],engine)
+    print(f"loaded {cohort.studentCount} people in {time.perf_counter() - startTime:.3f}s")
+
+    results = sortSweepResults(sweepConstraints(
+        cohort,minTeamSizes,maxTeamSizes,maxTeamsPerProjectValues,leadersPerTeamValues,solver,timeLimit,workers
+    ))
+    print(formatSweepTable(results))
+
+    if outputFilename is not None:
+        writeSweepCSV(outputFilename,results)
+
+    return results
+
+def parseArguments(arguments=None):
+    parser = argparse.ArgumentParser(description="Assign one cohort with every combination of team constraints")
+    parser.add_argument("inputCSVfilename")
+    parser.add_argument("--interest",default="Interested?",help="name of the interest column")
+    parser.add_argument("--leader",default="Leader?",help="name of the leader column")
+    parser.add_argument("--name",default="Name",help="name of the name column")
+    parser.add_argument("--min",type=int,nargs="+",default=[2],help="MIN_TEAM_SIZE values")
+    parser.add_argument("--max",type=int,nargs="+",default=[3],help="MAX_TEAM_SIZE values")
+    parser.add_argument("--teams",type=int,nargs="+",default=[1],help="MAX_TEAMS_PER_PROJECT values")
+    parser.add_argument("--leaders",type=int,nargs="+",default=[1],help="LEADERS_PER_TEAM values")
+    parser.add_argument("--engine",default="sparse",choices=["python","sparse","numpy"])
+    parser.add_argument("--solver",default="greedy",choices=["greedy","dynamic","exact","local","restarts"])
+    parser.add_argument("--time-limit",type=float,default=10,help="seconds for the exact and local solvers")
+    parser.add_argument("--workers",type=int,default=0,help="processes to use, 0 runs in this process")
+    parser.add_argument("--output",default=None,help="csv file to save the table to")
+    return parser.parse_args(arguments)
+
+if __name__ == "__main__":
+    arguments = parseArguments()
+    runSweep(
+        arguments.inputCSVfilename,arguments.interest,arguments.leader,arguments.name,arguments.min,arguments.max,
+        arguments.teams,arguments.leaders,arguments.engine,arguments.solver,arguments.time_limit,
+        arguments.workers,arguments.output
+    )
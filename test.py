@@ -1,4 +1,168 @@
-import combined as C, os 
+import combined as C, optimize as O, incremental as I, benchmark as B, sweep as S, cache as K, batch as BA, service as SV, decompose as D, generate as G, asyncio, json, math, os, pickle, shutil, time, tracemalloc 
+
+# PERFORMANCE BUDGETS (runPerformanceTests)
+
+# (students, projects) of the generated cohorts, every person picks PERFORMANCE_PREFERENCES_NUM projects
+PERFORMANCE_COHORT_SIZES = [(5000,250),(20000,1000),(80000,4000)]
+PERFORMANCE_PREFERENCES_NUM = 5
+# best of this many runs is used for the wall time of every stage
+PERFORMANCE_REPEATS = 3
+
+# microseconds per stated preference on the largest cohort, about 5x what was recorded on a laptop
+# (recorded: parse 0.6, encode 2.3, summary 0.13, interestIndex 0.65, assignment 0.43, csvWrite 0.22, run 2.5)
+MICROSECONDS_PER_PREFERENCE = {
+    "parse": 3,"encode": 12,"summary": 1,"interestIndex": 3.5,"assignment": 2.5,"csvWrite": 1.5,"run": 15
+}
+# peak traced bytes per stated preference on the largest cohort, about 1.5x what was recorded
+# (recorded: parse 70, encode 17, summary 2.1, interestIndex 17, assignment 7.7, csvWrite 3.2, run 107)
+BYTES_PER_PREFERENCE = {
+    "parse": 105,"encode": 26,"summary": 4,"interestIndex": 26,"assignment": 12,"csvWrite": 6,"run": 160
+}
+# highest allowed exponent k of time ~ preferences ** k (every stage should be near-linear, a scan over
+# every person for every project makes assignment about 2) and of peak memory and work counters.
+# Memory gets more room since Python caches small ints, so the smallest cohort needs less per project
+MAX_TIME_EXPONENT = 1.5
+MAX_MEMORY_EXPONENT = 1.4
+MAX_COUNTER_EXPONENT = 1.1
+
+# (students, projects) of the cohort the time limited solvers run on, the time limit they get in seconds
+# and how much longer they may take (the last search node is dropped and its structures freed)
+SOLVER_COHORT_SIZE = (50000,5000)
+SOLVER_TIME_LIMIT = 1
+SOLVER_TIME_SLACK = 0.25
+TIME_LIMITED_SOLVERS = ["exact","local"]
+
+def getScalingExponent(sizes,values):
+    """
+    OUTPUT
+    slope of the least squares line through (log size, log value), k when values grow like sizes ** k
+    """
+    logSizes = [math.log(size) for size in sizes]
+    logValues = [math.log(max(value,1e-9)) for value in values]
+    meanSize = sum(logSizes) / len(logSizes)
+    meanValue = sum(logValues) / len(logValues)
+
+    return (
+        sum((logSize - meanSize) * (logValue - meanValue) for logSize,logValue in zip(logSizes,logValues)) /
+        sum((logSize - meanSize) ** 2 for logSize in logSizes)
+    )
+
+def measurePerformance(studentCount,projectCount):
+    """
+    Runs the stages of combined.run() (with benchmark.runPipelineStages()) and combined.run() itself
+    on a fixed-seed generated cohort
+
+    OUTPUT
+    dict of stage name ("run" for the whole of combined.run()) to {"seconds", "peakBytes"}, and
+    the counters of the RunStats of combined.run()
+    """
+    inputFileName = f"testPerformance{studentCount}.csv"
+    outputFileName = f"testPerformanceResult{studentCount}.csv"
+    outputColumns = ["Name","Email"]
+    runArguments = (
+        inputFileName,"Interested?","Leader?","Name",4,6,2,1,outputFileName,outputColumns,False,"sparse"
+    )
+    B.writeCohortCSV(inputFileName,studentCount,projectCount,PERFORMANCE_PREFERENCES_NUM,0.2)
+    measurements = {}
+
+    try:
+        for _ in range(PERFORMANCE_REPEATS):
+            stages = {}
+            B.runPipelineStages(stages,inputFileName,outputFileName,outputColumns,4,6,2,1,"sparse")
+            stages["run"] = {}
+            stats = C.RunStats()
+            B.measureStage(stages,"run",C.run,*runArguments,"greedy",10,8,0,stats)
+
+            for stageName,stage in stages.items():
+                bestSeconds = measurements.setdefault(stageName,{}).get("seconds",stage["seconds"])
+                measurements[stageName]["seconds"] = min(bestSeconds,stage["seconds"])
+
+        tracemalloc.start()
+        try:
+            stages = {}
+            B.runPipelineStages(stages,inputFileName,outputFileName,outputColumns,4,6,2,1,"sparse")
+            B.measureStage(stages,"run",C.run,*runArguments)
+        finally:
+            tracemalloc.stop()
+
+        for stageName,stage in stages.items():
+            measurements[stageName]["peakBytes"] = stage["peakBytes"]
+    finally:
+        for fileName in (inputFileName,outputFileName):
+            if os.path.exists(fileName):
+                os.remove(fileName)
+
+    return measurements, stats.counters
+
+def measureSolverSeconds():
+    """
+    OUTPUT
+    dict of solver name to the seconds combined.assignCohort() took with SOLVER_TIME_LIMIT
+    """
+    studentCount, projectCount = SOLVER_COHORT_SIZE
+    inputFileName = f"testSolver{studentCount}.csv"
+    B.writeCohortCSV(inputFileName,studentCount,projectCount,PERFORMANCE_PREFERENCES_NUM,0.2)
+
+    try:
+        cohort = C.loadCohort(inputFileName,"Interested?","Leader?","Name",[],"sparse")
+    finally:
+        os.remove(inputFileName)
+
+    solverSeconds = {}
+    for solver in TIME_LIMITED_SOLVERS:
+        startTime = time.perf_counter()
+        C.assignCohort(cohort,4,6,2,1,solver,SOLVER_TIME_LIMIT)
+        solverSeconds[solver] = time.perf_counter() - startTime
+    return solverSeconds
+
+def runPerformanceTests():
+    """
+    Slower tier of tests (about a minute) that checks the time and memory of every stage against the
+    budgets above, that they still grow near-linearly with the number of stated preferences and that the
+    time limited solvers stop close to their time limit
+    """
+    preferenceCounts = []
+    results = []
+    counters = []
+
+    for studentCount,projectCount in PERFORMANCE_COHORT_SIZES:
+        measurements, runCounters = measurePerformance(studentCount,projectCount)
+        preferenceCounts.append(studentCount * PERFORMANCE_PREFERENCES_NUM)
+        results.append(measurements)
+        counters.append(runCounters)
+        print(f"{studentCount} students, {projectCount} projects: {measurements['run']['seconds']:.2f}s")
+
+    largestPreferenceCount = preferenceCounts[-1]
+    for stageName in MICROSECONDS_PER_PREFERENCE:
+        microseconds = results[-1][stageName]["seconds"] / largestPreferenceCount * 10**6
+        bytesPerPreference = results[-1][stageName]["peakBytes"] / largestPreferenceCount
+        timeExponent = getScalingExponent(
+            preferenceCounts,[measurements[stageName]["seconds"] for measurements in results]
+        )
+        memoryExponent = getScalingExponent(
+            preferenceCounts,[measurements[stageName]["peakBytes"] for measurements in results]
+        )
+        print(
+            f"{stageName}: {microseconds:.2f}us and {bytesPerPreference:.1f} bytes per preference, "
+            f"time ~ n^{timeExponent:.2f}, memory ~ n^{memoryExponent:.2f}"
+        )
+
+        assert microseconds <= MICROSECONDS_PER_PREFERENCE[stageName], f"{stageName} is over its time budget"
+        assert bytesPerPreference <= BYTES_PER_PREFERENCE[stageName], f"{stageName} is over its memory budget"
+        assert timeExponent <= MAX_TIME_EXPONENT, f"{stageName} time grows faster than linear"
+        assert memoryExponent <= MAX_MEMORY_EXPONENT, f"{stageName} memory grows faster than linear"
+
+    # the work done does not depend on the machine, so its growth is checked more strictly
+    for counterName in ("rowsParsed","preferencesStored","candidateScans"):
+        counterExponent = getScalingExponent(preferenceCounts,[runCounters[counterName] for runCounters in counters])
+        assert counterExponent <= MAX_COUNTER_EXPONENT, f"{counterName} grows faster than linear"
+
+    for solver,seconds in measureSolverSeconds().items():
+        print(f"{solver} solver: {seconds:.2f}s with a {SOLVER_TIME_LIMIT}s time limit")
+        assert seconds <= SOLVER_TIME_LIMIT + SOLVER_TIME_SLACK, f"{solver} solver overran its time limit"
+
+    print("performance tests passed")
+    return
 
 def runTests():
     testCsvFileName = "testCSVprocess.csv"
@@ -22,8 +186,6 @@ def runTests():
     testInputMatrix = C.getFileMatrix(testCsvFileName)
     testInputMatrixMinusHeaders = testInputMatrix[1:]
 
-    testLeaderValue = C.getLeaderValue(testInputMatrixMinusHeaders)
-
     testHeaderNameToColumnIndex = C.getHeaderNameToColumnIndex(testInputMatrix)
     assert(len(testHeaderNameToColumnIndex) == 5)
     assert(testHeaderNameToColumnIndex[testNameColumnName] == 1)
@@ -52,14 +214,14 @@ def runTests():
     assert(testProjectIndexToProjectNames.get(3) == "Yel")
 
     testPreferences, testStudentNamesToRowIndex = C.addStudents(
-        testInputMatrixMinusHeaders,testProjectNamesToProjectIndex,testHeaderNameToColumnIndex,testLeaderValue,
+        testInputMatrixMinusHeaders,testProjectNamesToProjectIndex,testHeaderNameToColumnIndex,
         testInterestColumnName,testLeaderColumnName,testNameColumnName
     )
 
     assert(testPreferences == [
-        [1,                 0,                  testLeaderValue+1,  0           ],
-        [testLeaderValue+1, testLeaderValue+1,  0,                  0           ],
-        [testLeaderValue+1, 1,                  testLeaderValue+1,  testLeaderValue+1]
+        [C.MEMBER,  0,          C.LEADER,   0       ],
+        [C.LEADER,  C.LEADER,   0,          0       ],
+        [C.LEADER,  C.MEMBER,   C.LEADER,   C.LEADER]
     ])
 
     assert(len(testStudentNamesToRowIndex.keys()) == 3)
@@ -69,15 +231,15 @@ def runTests():
 
     testSummary = C.summarizePreferences(testPreferences)
     assert(testSummary == [
-        [3,testLeaderValue + 1],
-        [1,testLeaderValue + 1 + 1],
-        [2,2*(testLeaderValue + 1)],
-        [0,2*(testLeaderValue + 1) + 1]
+        [3, 1, 0],
+        [1, 1, 1],
+        [2, 2, 0],
+        [0, 2, 1]
     ])
 
     testUnpopular, testProjectTeams, testSadPeople, testSadList = C.assignPlayersToProjects(
         testSummary, testPreferences, len(testStudentNamesToRowIndex.keys()), testMinTeamSize, 
-        testMaxTeamSize, testMaxTeamsPerProject, testLeaderValue
+        testMaxTeamSize, testMaxTeamsPerProject
     )
 
     assert(testUnpopular == [0,2,3])
@@ -101,6 +263,13 @@ def runTests():
         testSadList
     )
 
+    assert(C.getStudentRowGetter(testHeaderNameToColumnIndex,testOutputColumns)(testInputMatrixMinusHeaders[0]) == (
+        "Breach","2022/11/10 5:45:46 PM PST"
+    ))
+    assert(C.formatStudentRows([("Breach","Yes"),("Raze","No")]) == '"Breach","Yes"\n"Raze","No"\n')
+    assert(C.formatStudentRows([('Say "hi"',"a,b")]) == '"Say ""hi""","a,b"\n')
+    assert(C.formatStudentRows([]) == "")
+
     testResult = C.getFileMatrix(testOutputFilename)
     assert(testResult[0] == ["Gre"])
     assert(testResult[1] == ["Cypher","2022/11/10 5:45:49 PM PST"])
@@ -133,6 +302,91 @@ def runTests():
         ["red;blu", "red;blu"]
     ])
 
+    # testing streaming ingest
+
+    testStreamFileName = "testCSVstream.csv"
+    with open(testStreamFileName,"w") as file:
+        file.write('Timestamp,Name,Random Question?,Interested?,Leader?\n')
+        file.write('5:45:46 PM,Breach,Yes,"Blu, Red",Red\n')
+        file.write('5:45:49 PM,Cypher,Yes,Blu;Gre,Blu;Gre\n')
+        file.write('5:45:52 PM,Raze,No,"Red, Gre, Yel",\n')
+
+    testHeaderNameToColumnIndex, testRecords = C.readStudentRecords(
+        testStreamFileName,"Interested?","Leader?",["Name","Timestamp","Name"]
+    )
+    os.remove(testStreamFileName)
+
+    assert(testHeaderNameToColumnIndex == {"Interested?":0,"Leader?":1,"Name":2,"Timestamp":3})
+    assert(testRecords == [
+        ("Blu;Red","Red","Breach","5:45:46 PM"),
+        ("Blu;Gre","Blu;Gre","Cypher","5:45:49 PM"),
+        ("Red;Gre;Yel","","Raze","5:45:52 PM")
+    ])
+    assert(C.getStudentInfo(testRecords,1,testHeaderNameToColumnIndex,["Name","Timestamp"]) == '"Cypher","5:45:49 PM"')
+
+    # testing memory-mapped reader
+
+    with open(testStreamFileName,"w",newline="") as file:
+        file.write('Timestamp,Name,Comment,Interested?,Leader?\n')
+        file.write('5:45:46 PM,Breach,"long, ""quoted""\ncomment",Blu;Red,Red\n')
+        file.write('5:45:49 PM,Cypher,,"Blu, Gre",Blu\n')
+
+    testHeaderNameToColumnIndex, testMappedRecords = C.readMappedStudentRecords(
+        testStreamFileName,"Interested?","Leader?",["Name"]
+    )
+
+    assert(testHeaderNameToColumnIndex == {"Timestamp":0,"Name":1,"Comment":2,"Interested?":3,"Leader?":4})
+    assert(testMappedRecords.keptRecords == [("Blu;Red","Red","Breach"),("Blu, Gre","Blu","Cypher")])
+    assert(testMappedRecords.keptHeaderNameToColumnIndex == {"Interested?":0,"Leader?":1,"Name":2})
+    assert(testMappedRecords[0][2] == 'long, "quoted"\ncomment')
+    assert(testMappedRecords[1][0] == "5:45:49 PM")
+    assert(C.getStudentRowGetter(testHeaderNameToColumnIndex,["Name","Comment"])(testMappedRecords[1]) == ("Cypher",""))
+
+    testMappedRecords.close()
+    assert(testMappedRecords.mappedFile.closed)
+
+    with C.loadCohort(testStreamFileName,"Interested?","Leader?","Name",["Comment"],"sparse",reader="mmap") as testCohort:
+        assert(testCohort.summary == C.loadCohort(testStreamFileName,"Interested?","Leader?","Name",[],"sparse").summary)
+    assert(testCohort.records.mappedFile.closed)
+
+    # CRLF export with a quoted value over two lines, both readers give the same values
+    with open(testStreamFileName,"w",newline="") as file:
+        file.write('Timestamp,Name,Comment,Interested?,Leader?\r\n')
+        file.write('5:45:46 PM,Breach,"multi\r\nline, ""q""",Blu;Red,Red\r\n')
+        file.write('5:45:49 PM,Cypher,"kept\r\nline","Blu, Gre",Blu\r\n')
+
+    _, testStreamedRecords = C.readStudentRecords(testStreamFileName,"Interested?","Leader?",["Name","Comment"])
+    _, testMappedRecords = C.readMappedStudentRecords(testStreamFileName,"Interested?","Leader?",["Name"])
+    testMappedKeptRecords = C.readMappedStudentRecords(testStreamFileName,"Interested?","Leader?",["Comment"])[1]
+    assert(testStreamedRecords[0][3] == 'multi\nline, "q"' and testStreamedRecords[1][3] == "kept\nline")
+    # Comment is parsed from the file again in the first case, kept while reading in the second
+    assert(testMappedRecords[0][2] == testStreamedRecords[0][3])
+    assert(testMappedKeptRecords[1][2] == testStreamedRecords[1][3])
+    assert(testMappedRecords[1][0] == "5:45:49 PM" and testMappedRecords[1][1] == "Cypher")
+    testMappedRecords.close()
+    testMappedKeptRecords.close()
+    os.remove(testStreamFileName)
+
+    # testing single pass encoding
+
+    assert(C.splitProjectCells("Blu;Red","Red") == (["Blu","Red"],["Red"]))
+    assert(C.splitProjectCells("Blu; Red","Red;Gre") == (["Blu","Red"],["Red","Gre"]))
+    assert(C.splitProjectCells("Blu, Red","") == (["Blu","Red"],[]))
+
+    testInputMatrix = C.getFileMatrix(testCsvFileName)
+    testEncodedPreferences, testEncodedNames, testEncodedNameToIndex, testEncodedIndexToName = C.encodeStudentRecords(
+        testInputMatrix[1:],C.getHeaderNameToColumnIndex(testInputMatrix),"Interested?","Leader?",testNameColumnName
+    )
+
+    assert(testEncodedNameToIndex == testProjectNamesToProjectIndex)
+    assert(dict(enumerate(testEncodedIndexToName)) == testProjectIndexToProjectNames)
+    assert(dict(enumerate(testEncodedNames)) == testStudentNamesToRowIndex)
+    assert(testEncodedPreferences.toDense() == [
+        [C.MEMBER,  0,          C.LEADER,   0       ],
+        [C.LEADER,  C.LEADER,   0,          0       ],
+        [C.LEADER,  C.MEMBER,   C.LEADER,   C.LEADER]
+    ])
+
     # testing best splits
 
     assert(C.findBestSplit(21,5,7) == (7,0))
@@ -143,56 +397,528 @@ def runTests():
     # testing team assignment
 
     testPreferences = [
-        [10001, 0,      0],
-        [1,     0,      0],
-        [0,     0,  10001],
-        [10001, 0,      0],
-        [0,     0,      1],
-        [0,     10001,  0],
-        [0,     10001,  0],
-        [0,     0,  10001],
-        [1,     0,      1],
-        [0,     10001,  1]
+        [2, 0, 0],
+        [1, 0, 0],
+        [0, 0, 2],
+        [2, 0, 0],
+        [0, 0, 1],
+        [0, 2, 0],
+        [0, 2, 0],
+        [0, 0, 2],
+        [1, 0, 1],
+        [0, 2, 1]
     ]
 
     testSummary = C.summarizePreferences(testPreferences)
-    assert(testSummary == [[0,20004],[2,20005],[1,30003]])
+    assert(testSummary == [[0,2,2],[2,2,3],[1,3,0]])
 
     testNumberOfLeaders = 2
     testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
-        testSummary,testPreferences,len(testPreferences),3,4,1,10000,testNumberOfLeaders
+        testSummary,testPreferences,len(testPreferences),3,4,1,testNumberOfLeaders
     )
 
     for projectNumber, teams in testTeamsAssigned.items():
         for team in teams:
             for i in range(testNumberOfLeaders):
-                assert(testPreferences[team[i]][projectNumber] > 1)
+                assert(testPreferences[team[i]][projectNumber] == C.LEADER)
 
     testNumberOfLeaders = 3
     testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
-        testSummary,testPreferences,len(testPreferences),3,4,1,10000,testNumberOfLeaders
+        testSummary,testPreferences,len(testPreferences),3,4,1,testNumberOfLeaders
     )
 
     for projectNumber, teams in testTeamsAssigned.items():
         for team in teams:
             for i in range(testNumberOfLeaders):
-                assert(testPreferences[team[i]][projectNumber] > 1)
+                assert(testPreferences[team[i]][projectNumber] == C.LEADER)
+
+    # testing interest index
+
+    testInterestIndex = C.makeInterestIndex(testPreferences)
+    assert(testInterestIndex == [
+        ([1,8],[0,3]),
+        ([],[5,6,9]),
+        ([4,8,9],[2,7])
+    ])
+
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
+        testSummary,testPreferences,len(testPreferences),3,4,1,2,testInterestIndex
+    )
+    assert((testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList) == C.assignPlayersToProjects(
+        testSummary,testPreferences,len(testPreferences),3,4,1,2
+    ))
+
+    # testing dynamic project order
+
+    # after project 1 takes persons 1 and 2, project 2 only has leader 3 and member 4 left and has to go next
+    testDynamicPreferences = [
+        [1, 0, 0],
+        [0, 2, 2],
+        [0, 1, 2],
+        [2, 0, 2],
+        [0, 1, 1],
+        [2, 0, 0]
+    ]
+    testDynamicSummary = C.summarizePreferences(testDynamicPreferences)
+    assert(testDynamicSummary == [[1,1,2],[0,2,1],[2,3,1]])
+    assert(C.assignPlayersToProjects(testDynamicSummary,testDynamicPreferences,6,2,2,1,1)[2] == 2)
+
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjectsDynamic(
+        testDynamicSummary,testDynamicPreferences,6,2,2,1,1
+    )
+    assert(testUnluckyProjects == [] and testSadCount == 0 and testSadList == [])
+    assert(list(testTeamsAssigned.items()) == [(1,[[1,2]]),(2,[[3,4]]),(0,[[5,0]])])
+
+    testDynamicIndex = C.makeInterestIndex(testDynamicPreferences)
+    testPersonIndex = C.makePersonIndex(testDynamicIndex,6)
+    testSparseDynamic = C.SparsePreferences(3)
+    for testRow in testDynamicPreferences:
+        testSparseDynamic.addRow({projectIndex: value for projectIndex,value in enumerate(testRow)})
+    assert(testPersonIndex == (testSparseDynamic.rowStarts,testSparseDynamic.projectIndices,testSparseDynamic.values))
+
+    testStats = C.RunStats()
+    assert(C.assignPlayersToProjectsDynamic(
+        testDynamicSummary,testSparseDynamic,6,2,2,1,1,testDynamicIndex,testStats
+    ) == (testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList))
+    assert(testStats.counters["heapUpdates"] > 0 and testStats.counters["teamsCreated"] == 3)
+
+    # testing team assignment model
+
+    testAssignment = C.TeamAssignment.fromTeamsAssigned({2: [[3,4,5],[0,1]], 0: [], 1: [[7,6]]},[0,3],9)
+    assert(testAssignment.teamProjects.tolist() == [2,2,1])
+    assert(testAssignment.teamStarts.tolist() == [0,3,5,7])
+    assert(testAssignment.teamMembers.tolist() == [3,4,5,0,1,7,6])
+    assert(testAssignment.studentTeams.tolist() == [1,1,-1,0,0,0,2,2,-1])
+    assert(testAssignment.getTeam(2) == [7,6] and testAssignment.teamCount == 3)
+    assert(list(testAssignment.getProjectTeams()) == [(2,[[3,4,5],[0,1]]),(0,[]),(1,[[7,6]])])
+    assert(testAssignment.getSadList() == [2,8] and testAssignment.sadPlayerCount == 2)
+    assert(pickle.loads(pickle.dumps(testAssignment)) == testAssignment)
+
+    # testing exact assignment
+
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
+        testSummary,testPreferences,len(testPreferences),3,4,1,1
+    )
+    assert(testSadCount == 2)
+
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList, testSadBound = O.assignPlayersToProjectsExact(
+        testSummary,testPreferences,len(testPreferences),3,4,1,1
+    )
+    assert(testUnluckyProjects == [])
+    assert(testSadCount == 0 and testSadList == [] and testSadBound == 0)
+    assert(testTeamsAssigned == {0: [[0,1,3,8]], 2: [[2,4,7]], 1: [[5,6,9]]})
+
+    # testing local search improvement
+
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
+        testSummary,testPreferences,len(testPreferences),3,4,1,1
+    )
+    testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = O.improveAssignment(
+        testSummary,len(testPreferences),3,4,1,1,C.makeInterestIndex(testPreferences),testTeamsAssigned,testSadList
+    )
+    assert(testUnluckyProjects == [] and testSadCount == 0 and testSadList == [])
+    assert(testTeamsAssigned == {0: [[0,1,8,3]], 2: [[2,4,7]], 1: [[5,6,9]]})
+
+    for projectNumber, teams in testTeamsAssigned.items():
+        for team in teams:
+            assert(3 <= len(team) <= 4)
+            assert(testPreferences[team[0]][projectNumber] == C.LEADER)
+            for person in team:
+                assert(testPreferences[person][projectNumber] > 0)
+
+    # testing randomized restarts
+
+    testInterestIndex = C.makeInterestIndex(testPreferences)
+    testRestartResult = O.runRandomRestarts(testSummary,len(testPreferences),3,4,1,1,testInterestIndex,6,0,workers=0)
+    assert(testRestartResult[2] <= 2)
+    assert(testRestartResult == O.runRandomRestarts(testSummary,len(testPreferences),3,4,1,1,testInterestIndex,6,0,workers=0))
+
+    if testRestartResult[4] is not None:
+        assert(testRestartResult[:4] == O.assignPlayersToProjectsRandomized(
+            testSummary,len(testPreferences),3,4,1,1,testInterestIndex,testRestartResult[4]
+        ))
+
+    testNodeCount = 4
+    testFlowValue, _ = O.solveBoundedFlow(testNodeCount,[(0,2,0,3),(2,1,2,2),(0,3,0,1),(3,1,0,1)],0,1)
+    assert(testFlowValue == 3)
+    testFlowValue, _ = O.solveBoundedFlow(testNodeCount,[(0,2,0,1),(2,1,2,2)],0,1)
+    assert(testFlowValue is None)
+
+    # testing decomposition into components
+
+    # projects 0 and 1 share person 1, project 2 only has persons 3 and 4, person 5 picked nothing
+    testComponentIndex = [([1],[0]),([2],[1]),([3],[4]),([],[])]
+    testComponents = D.findComponents(testComponentIndex,6)
+    assert(testComponents == [([0,1],[0,1,2]),([2],[3,4]),([3],[])])
+
+    testComponentSummary = [[3,0,0],[2,1,1],[0,1,1],[1,1,1]]
+    testProblems = D.makeComponentProblems(testComponentSummary,testComponentIndex,testComponents,6)
+    assert(testProblems[0] == ([[0,1,1],[1,1,1]],[([1],[0]),([2],[1])],3))
+    assert(testProblems[1] == ([[0,1,1]],[([0],[1])],2))
+    assert(D.groupTasks(testComponents,3) == [[0],[1,2]])
+
+    for testSolver in ["greedy","exact","local"]:
+        testDecomposedResult = D.assignPlayersToProjectsDecomposed(
+            testSummary,len(testPreferences),2,3,1,1,testInterestIndex,testSolver,1,workers=0
+        )
+        testSolverResult, _ = C.assignCohort(
+            C.Cohort(None,None,testPreferences,list(range(len(testPreferences))),[],{},testSummary,testInterestIndex),
+            2,3,1,1,testSolver,1
+        )
+        if testSolver == "greedy":
+            assert(testDecomposedResult[0] == testSolverResult.unluckyProjects.tolist())
+            assert(list(testDecomposedResult[1].items()) == list(testSolverResult.getProjectTeams()))
+            assert(testDecomposedResult[3] == testSolverResult.getSadList())
+        if testSolver == "exact":
+            assert(testDecomposedResult[4] <= testDecomposedResult[2] <= testSolverResult.sadPlayerCount)
+        assert(testDecomposedResult[2] == len(testDecomposedResult[3]))
+
+    # 4 groups of 10 projects, every person picks 2 neighbouring projects of their group
+    testClusteredPreferences = C.SparsePreferences(40)
+    for studentIndex in range(400):
+        testClusterStart = (studentIndex % 4) * 10
+        testClusteredPreferences.addRow({
+            testClusterStart + (studentIndex // 4) % 10: C.MEMBER,
+            testClusterStart + (studentIndex // 4 + 1) % 10: C.LEADER if studentIndex % 3 == 0 else C.MEMBER
+        })
+    testClusteredSummary = C.summarizePreferences(testClusteredPreferences)
+    testClusteredIndex = C.makeInterestIndex(testClusteredPreferences)
+    assert(len(D.findComponents(testClusteredIndex,400)) == 4)
+
+    testDecomposedResult = D.assignPlayersToProjectsDecomposed(
+        testClusteredSummary,400,2,4,2,1,testClusteredIndex,workers=2,minTaskStudents=100
+    )
+    testSolverResult = C.assignPlayersToProjects(
+        testClusteredSummary,testClusteredPreferences,400,2,4,2,1,testClusteredIndex
+    )
+    assert(testDecomposedResult[:4] == testSolverResult)
+    assert(list(testDecomposedResult[1]) == list(testSolverResult[1]))
+
+    # testing incremental additions
+
+    testIncrementalFileName = "testCSVincremental.csv"
+    with open(testIncrementalFileName,"w") as file:
+        file.write('Timestamp,Name,Interested?,Leader?\n')
+        file.write('5:45:46 PM,Breach,Blu,Blu\n')
+        file.write('5:45:49 PM,Cypher,Blu,\n')
+        file.write('5:45:52 PM,Raze,Red,Red\n')
+
+    testState = I.startIncremental(testIncrementalFileName,"Interested?","Leader?","Name",["Name"],2,3,1,1)
+    assert(testState["teamsAssigned"] == {0: [[0,1]]})
+    assert(testState["sadList"] == [2])
+
+    with open(testIncrementalFileName,"a") as file:
+        file.write('5:45:55 PM,Sage,Blu,\n')
+        file.write('5:45:58 PM,Jett,Red,\n')
+        file.write('5:46:01 PM,Sova,Gre,Gre\n')
+
+    assert(I.addLateRowsFromFile(testState,testIncrementalFileName) == [3,4])
+    assert(testState["fileOffset"] == os.path.getsize(testIncrementalFileName))
+    assert(testState["teamsAssigned"] == {0: [[0,1,3]], 1: [[2,4]]})
+    assert(testState["sadList"] == [5])
+    assert(testState["unluckyProjects"] == [2])
+    assert(testState["cohort"].projectNames[2] == "Gre")
+    assert(testState["cohort"].studentNames[5] == "Sova")
+
+    # rows that were read are not parsed again: renaming the header in place would break a re-read
+    with open(testIncrementalFileName,"r+b") as file:
+        file.write(b"Timestamp,Nxme")
+    with open(testIncrementalFileName,"a") as file:
+        file.write('5:46:04 PM,Omen,Red,\n')
+        file.write('5:46:07 PM,Neon,Gre')
+
+    assert(I.addLateRowsFromFile(testState,testIncrementalFileName) == [6])
+    assert(testState["fileOffset"] < os.path.getsize(testIncrementalFileName))
+    with open(testIncrementalFileName,"a") as file:
+        file.write(',\n')
+    assert(I.addLateRowsFromFile(testState,testIncrementalFileName) == [7])
+    assert(testState["fileOffset"] == os.path.getsize(testIncrementalFileName))
+    os.remove(testIncrementalFileName)
+
+    assert(testState["teamsAssigned"] == {0: [[0,1,3]], 1: [[2,4,6]], 2: [[5,7]]})
+    assert(testState["sadList"] == [])
+
+    # two newcomers of the same batch that only make a team together
+    assert(I.addLateRecords(testState,[("Pur","","Fade"),("Pur","Pur","Kayo")]) == [8,9])
+    assert(testState["teamsAssigned"][3] == [[9,8]])
+    assert(testState["sadList"] == [] and testState["unluckyProjects"] == [])
+    assert(testState["cohort"].summary == C.summarizePreferences(testState["cohort"].preferences))
+    assert(testState["cohort"].interestIndex == C.makeInterestIndex(testState["cohort"].preferences))
+
+    # testing run instrumentation
+
+    testStats = C.RunStats()
+    C.run(
+        testCsvFileName,"Interested?","Leader?","Name",2,3,1,1,testOutputFilename,testOutputColumns,False,"sparse",
+        stats=testStats
+    )
+    assert(list(testStats.stageSeconds) == [
+        "readStudentRecords","encodeStudentRecords","summarizePreferences","makeInterestIndex",
+        "assignPlayersToProjects","createCSVfile"
+    ])
+    assert(testStats.counters == {
+        "rowsParsed": 3, "cellsSplit": 6, "projectsFound": 4, "preferencesStored": 8, "candidateScans": 7,
+        "teamsCreated": 1, "teamsDropped": 0, "teamsReleased": 0, "sadPlayers": 1
+    })
+    assert(testStats.toDict()["error"] is None)
+
+    testStats = C.RunStats()
+    C.run(
+        "missingFile.csv","Interested?","Leader?","Name",2,3,1,1,testOutputFilename,testOutputColumns,False,
+        stats=testStats
+    )
+    assert("FileNotFoundError" in testStats.error)
+
+    # testing run report
+
+    C.run(
+        testCsvFileName,"Interested?","Leader?","Name",2,3,1,1,testOutputFilename,testOutputColumns,False,"sparse",
+        reportFilename="testReport.json"
+    )
+    with open("testReport.json") as testFile:
+        testReport = json.load(testFile)
+    os.remove("testReport.json")
+
+    assert(testReport["input"]["studentCount"] == 3 and testReport["input"]["statedPreferences"] == 8)
+    assert(testReport["students"] == {"assigned": 2,"unassigned": 1})
+    # Cypher leads Gre, Raze wanted to lead other projects and joins as a member
+    assert(testReport["leaders"] == {
+        "volunteers": 3,"leading": 1,"convertedToMembers": 0,"membersElsewhere": 1,"unassigned": 1
+    })
+    assert(testReport["teams"] == {"count": 1,"sizeHistogram": {"2": 1}})
+    assert(testReport["unluckyProjects"] == [
+        {"project": "Yel","leaderCount": 1,"memberCount": 0},
+        {"project": "Red","leaderCount": 2,"memberCount": 0},
+        {"project": "Blu","leaderCount": 2,"memberCount": 1}
+    ])
+    assert(list(testReport["stageSeconds"])[-1] == "createCSVfile")
+
+    # Breach leads Red and Raze, who also wanted to lead it, is converted to a member
+    testCohort = C.loadCohort(testCsvFileName,"Interested?","Leader?","Name",[],"sparse")
+    testAssignment = C.TeamAssignment.fromTeamsAssigned({2: [[0, 2]]},[3,1,0],3)
+    testReport = C.makeRunReport(testCohort,testAssignment,{},None,testCsvFileName,2,3,1,1)
+    assert(testReport["leaders"] == {
+        "volunteers": 3,"leading": 1,"convertedToMembers": 1,"membersElsewhere": 0,"unassigned": 1
+    })
+    assert(testReport["stageSeconds"] == {} and testReport["totalSeconds"] == 0)
+
+    # testing cohort cache
+
+    testCacheDirectory = "testCohortCache"
+    testCohort = C.loadCohort(testCsvFileName,"Interested?","Leader?","Name",testOutputColumns,"sparse")
+    testCachedCohort = K.loadCohortCached(testCsvFileName,"Interested?","Leader?","Name",testCacheDirectory)
+    testCacheFiles = [fileName for fileName in os.listdir(testCacheDirectory) if fileName.endswith(K.CACHE_SUFFIX)]
+    assert(len(testCacheFiles) == 1)
+
+    with K.loadCohortCached(testCsvFileName,"Interested?","Leader?","Name",testCacheDirectory) as testHitCohort:
+        assert(testHitCohort.summary == testCohort.summary)
+        # the preferences stay a view of the cache file, they are never made dense
+        assert(type(testHitCohort.preferences) is C.SparsePreferences)
+    assert(testHitCohort.records.sectionFile.mappedFile.closed)
+    assert(testCachedCohort.summary == testCohort.summary)
+    assert(testCachedCohort.interestIndex == testCohort.interestIndex)
+    assert(testCachedCohort.projectNames == testCohort.projectNames)
+    assert(testCachedCohort.projectNameToIndex == testCohort.projectNameToIndex)
+    assert(testCachedCohort.preferences.toDense() == testCohort.preferences.toDense())
+    assert(testCachedCohort.studentNames[2] == "Raze" and testCachedCohort.studentCount == 3)
+    assert(testCachedCohort.records[1][testCachedCohort.headerNameToColumnIndex["Timestamp"]] ==
+        "2022/11/10 5:45:49 PM PST")
+    assert(C.assignCohort(testCachedCohort,2,3,1,1) == C.assignCohort(testCohort,2,3,1,1))
+    testCachedCohort.close()
+
+    K.evictCache(testCacheDirectory,0)
+    assert(not any(fileName.endswith(K.CACHE_SUFFIX) for fileName in os.listdir(testCacheDirectory)))
+    shutil.rmtree(testCacheDirectory)
+
+    # testing result cache
+
+    testCacheDirectory = "testResultCache"
+    testRunArguments = (testCsvFileName,"Interested?","Leader?","Name",2,3,1,1,"testCachedResult.csv")
+    C.run(*testRunArguments,["Name","Random Question?"],False,"sparse")
+    with open("testCachedResult.csv") as testFile:
+        testExpectedOutput = testFile.read()
+
+    for testExpectedCounter in ("resultCacheMisses","resultCacheHits"):
+        testStats = C.RunStats()
+        C.run(
+            *testRunArguments,["Name","Random Question?"],False,"sparse",stats=testStats,
+            cacheDirectory=testCacheDirectory,cacheResults=True
+        )
+        assert(testStats.counters[testExpectedCounter] == 1)
+        # a hit is not parsed or assigned again
+        assert(("assignPlayersToProjects" in testStats.stageSeconds) == (testExpectedCounter == "resultCacheMisses"))
+        with open("testCachedResult.csv") as testFile:
+            assert(testFile.read() == testExpectedOutput)
+
+    # other output columns use the same result, other constraints don't
+    testStats = C.RunStats()
+    C.run(
+        *testRunArguments,["Name","Timestamp"],False,"sparse",stats=testStats,
+        cacheDirectory=testCacheDirectory,cacheResults=True
+    )
+    assert(testStats.counters["resultCacheHits"] == 1)
+    testStats = C.RunStats()
+    C.run(
+        *testRunArguments[:4],2,3,2,1,"testCachedResult.csv",["Name"],False,"sparse",stats=testStats,
+        cacheDirectory=testCacheDirectory,cacheResults=True
+    )
+    assert(testStats.counters["resultCacheMisses"] == 1)
+
+    testCohort, testAssignment, _ = K.assignCohortCached(
+        testCsvFileName,"Interested?","Leader?","Name",2,3,1,1,cacheDirectory=testCacheDirectory
+    )
+    testCohort = C.loadCohort(testCsvFileName,"Interested?","Leader?","Name",[],"sparse")
+    assert(testAssignment == C.assignCohort(testCohort,2,3,1,1)[0])
+    assert(testAssignment.getSadList() == [0])
+
+    assert(K.invalidateResults(testCacheDirectory,testCsvFileName) == 2)
+    assert(K.invalidateResults(testCacheDirectory) == 0)
+    K.assignCohortCached(testCsvFileName,"Interested?","Leader?","Name",2,3,1,1,cacheDirectory=testCacheDirectory)
+    K.evictCache(testCacheDirectory,0)
+    assert(not any(fileName.endswith((K.CACHE_SUFFIX,K.RESULT_SUFFIX)) for fileName in os.listdir(testCacheDirectory)))
+    shutil.rmtree(testCacheDirectory)
+    os.remove("testCachedResult.csv")
+
+    # testing constraint sweep
+
+    assert(S.getConstraintGrid([2,4],[3],[1,2],[1]) == [(2,3,1,1),(2,3,2,1)])
+
+    testCohort = C.loadCohort(testCsvFileName,"Interested?","Leader?","Name",[],"sparse")
+    testSweepResults = S.sweepConstraints(testCohort,[2,3],[3],[1],[1])
+    assert([(result["minTeamSize"],result["sadPlayerCount"]) for result in testSweepResults] == [(2,1),(3,0)])
+    assert(S.sortSweepResults(testSweepResults)[0]["minTeamSize"] == 3)
+    assert(S.formatSweepTable(testSweepResults).splitlines()[0].split() == S.SWEEP_COLUMNS)
+
+    # testing batch mode
+
+    testJobs = [
+        BA.makeBatchJob({"inputCSVfilename": testCsvFileName,"outputFilename": testOutputFilename},{"maxTeamSize": 3}),
+        BA.makeBatchJob({"inputCSVfilename": "missingFile.csv"})
+    ]
+    assert(testJobs[0]["name"] == "testCSVprocess" and testJobs[0]["minTeamSize"] == 2)
+    assert(testJobs[1]["outputFilename"] == "missingFileResult.csv")
+
+    testBatchResults = BA.runBatch(testJobs,workers=0)
+    assert([result["status"] for result in testBatchResults] == ["ok","error"])
+    assert(testBatchResults[0]["sadPlayerCount"] == 1 and testBatchResults[0]["studentCount"] == 3)
+    assert("FileNotFoundError" in testBatchResults[1]["error"])
+
+    testBatchSummary = BA.summarizeBatch(testBatchResults,0)
+    assert(testBatchSummary["failedCount"] == 1 and testBatchSummary["sadPlayerCount"] == 1)
+
+    # testing grouping service
+
+    async def testService():
+        service = SV.GroupingService(
+            maxCohorts=1,workers=2,uploadDirectory="testUploads",cacheDirectory="testServiceCache"
+        )
+
+        status, info = await service.handleRequest("POST","/cohorts",b'{"path": "testCSVprocess.csv"}')
+        assert(status == 200 and info["studentCount"] == 3 and info["projectCount"] == 4)
+
+        # the workers write the cache file again if it was evicted before they mapped it
+        os.remove(os.path.join("testServiceCache",info["cohortId"] + K.CACHE_SUFFIX))
+        status, result = await service.handleRequest("POST",f"/cohorts/{info['cohortId']}/assign",b'{"maxTeamSize": 3}')
+        assert(status == 200 and result["teams"] == {"Gre": [["Cypher","Raze"]]} and result["unassigned"] == ["Breach"])
+
+        testFirstCohort, _ = service.getCohort(info["cohortId"])
+
+        # paths outside of the data directory are refused
+        for testRequest in [b'{"path": "../testCSVprocess.csv"}',json.dumps({"path": os.path.abspath(os.sep)}).encode()]:
+            status, _ = await service.handleRequest("POST","/cohorts",testRequest)
+            assert(status == 403)
+        status, _ = await service.handleRequest(
+            "POST",f"/cohorts/{info['cohortId']}/assign",b'{"outputFilename": "../testServiceResult.csv"}'
+        )
+        assert(status == 403 and not os.path.exists(os.path.join("..","testServiceResult.csv")))
+
+        with open(testCsvFileName,"rb") as file:
+            testUpload = file.read().rstrip(b"\r\n") + b"\n2022/11/10 8:45:46 PM PST,Jett,Yes,Blu,Blu\n"
+        status, uploadInfo = await service.handleRequest("POST","/cohorts?nameColumnName=Name",testUpload,"text/csv")
+        assert(status == 200 and uploadInfo["studentCount"] == 4)
+        testUploadCohort, _ = service.getCohort(uploadInfo["cohortId"])
+
+        # only 1 cohort is kept, the first one was dropped and its file closed
+        assert(testFirstCohort.records.sectionFile.mappedFile.closed)
+        status, _ = await service.handleRequest("POST",f"/cohorts/{info['cohortId']}/assign",b"{}")
+        assert(status == 404)
+        status, _ = await service.handleRequest("POST","/cohorts",b'{"path": "missingFile.csv"}')
+        assert(status == 404)
+        status, _ = await service.handleRequest("POST",f"/cohorts/{uploadInfo['cohortId']}/assign",b'{"size": 3}')
+        assert(status == 400)
+
+        service.close()
+        assert(testUploadCohort.records.sectionFile.mappedFile.closed)
+
+    asyncio.run(testService())
+    shutil.rmtree("testUploads")
+    shutil.rmtree("testServiceCache")
+
+    # testing scaling benchmark
+
+    testBenchmarkResult = B.runPipelineBenchmark(200,20,3,0.3,2,4,2,1)
+    assert(list(testBenchmarkResult["stages"]) == ["parse","encode","summary","interestIndex","assignment","csvWrite"])
+    for testStage in testBenchmarkResult["stages"].values():
+        assert(testStage["seconds"] >= 0 and testStage["peakBytes"] >= 0)
+    assert(not os.path.exists("benchmarkInput200x20.csv"))
+
+    # testing cohort generator (only when numpy is installed)
+
+    if G.np is not None:
+        testGeneratedCohorts = []
+        for testSeparator in G.SEPARATORS:
+            testPickCounts = G.writeGeneratedCSV("testGenerated.csv",500,30,4,0.3,1.2,0.5,testSeparator,7,200)
+            testGeneratedCohorts.append(C.loadCohort("testGenerated.csv","Interested?","Leader?","Name",[],"sparse"))
+        os.remove("testGenerated.csv")
+
+        # both layouts give the same cohort, every person picked 4 different projects
+        assert(testGeneratedCohorts[0].summary == testGeneratedCohorts[1].summary)
+        assert(testGeneratedCohorts[0].interestIndex == testGeneratedCohorts[1].interestIndex)
+        testRowStarts = testGeneratedCohorts[0].preferences.rowStarts
+        assert(all(testRowStarts[i + 1] - testRowStarts[i] == 4 for i in range(500)))
+        for testProjectSummary in testGeneratedCohorts[0].summary:
+            testProjectName = testGeneratedCohorts[0].projectNames[testProjectSummary[0]]
+            assert(testProjectSummary[1] + testProjectSummary[2] == testPickCounts[int(testProjectName[7:])])
+
+        # same seed gives the same picks, popularity is skewed
+        testChunks = list(G.generateCohortChunks(500,30,4,0.3,1.2,0.5,7,200))
+        testChunksAgain = list(G.generateCohortChunks(500,30,4,0.3,1.2,0.5,7,200))
+        assert(all((a[1] == b[1]).all() and (a[2] == b[2]).all() for a,b in zip(testChunks,testChunksAgain)))
+        assert(testPickCounts.max() > 5 * testPickCounts.min())
+
+        # the dynamic order places 21 fewer people than the greedy one on this cohort, the greedy result is kept
+        G.writeGeneratedCSV("testGenerated.csv",300,40,3,0.2,1.0,seed=0)
+        testGeneratedCohort = C.loadCohort("testGenerated.csv","Interested?","Leader?","Name",[],"sparse")
+        os.remove("testGenerated.csv")
+        testGreedyResult = C.assignPlayersToProjects(
+            testGeneratedCohort.summary,testGeneratedCohort.preferences,300,4,6,3,1,testGeneratedCohort.interestIndex
+        )
+        testStats = C.RunStats()
+        assert(C.assignPlayersToProjectsDynamic(
+            testGeneratedCohort.summary,testGeneratedCohort.preferences,300,4,6,3,1,testGeneratedCohort.interestIndex,
+            testStats
+        ) == testGreedyResult)
+        assert(testGreedyResult[2] == 6 and testStats.counters["greedyKept"] == 1)
+
+        # every project is picked when preferencesNum equals projectCount
+        testPicks = G.pickProjects(50,6,G.getProjectWeights(6,2.0,G.np.random.default_rng(0)),G.np.random.default_rng(1))
+        assert((G.np.sort(testPicks,axis=1) == G.np.arange(6)).all())
 
     # testing team assignment bug
 
     testPreferences = [
-        [10001, 0],
-        [1,     0],
-        [10001, 0],
-        [10001, 0]
+        [2, 0],
+        [1, 0],
+        [2, 0],
+        [2, 0]
     ]
 
     testSummary = C.summarizePreferences(testPreferences)
-    assert(testSummary == [[1,0],[0,30004]])
+    assert(testSummary == [[1,0,0],[0,3,1]])
 
     testNumberOfLeaders = 2
     testUnluckyProjects, testTeamsAssigned, testSadCount, testSadList = C.assignPlayersToProjects(
-        testSummary,testPreferences,len(testPreferences),3,3,1,10000,testNumberOfLeaders
+        testSummary,testPreferences,len(testPreferences),3,3,1,testNumberOfLeaders
     )
 
     assert(len(testSadList) == 1 and testSadList[0] == 3)
@@ -200,17 +926,76 @@ def runTests():
     for projectNumber, teams in testTeamsAssigned.items():
         for team in teams:
             for i in range(testNumberOfLeaders):
-                assert(testPreferences[team[i]][projectNumber] > 1)
+                assert(testPreferences[team[i]][projectNumber] == C.LEADER)
 
-    # testing leaderValue generation
+    # testing sparse preferences
 
-    testInputMatrixMinusHeaders = []
+    testInputMatrix = C.getFileMatrix(testCsvFileName)
+    testInputMatrixMinusHeaders = testInputMatrix[1:]
+    testHeaderNameToColumnIndex = C.getHeaderNameToColumnIndex(testInputMatrix)
+
+    testListPreferences, _ = C.addStudents(
+        testInputMatrixMinusHeaders,testProjectNamesToProjectIndex,testHeaderNameToColumnIndex,
+        "Interested?","Leader?",testNameColumnName
+    )
+    testSparsePreferences, testSparseStudentNames = C.addStudentsSparse(
+        testInputMatrixMinusHeaders,testProjectNamesToProjectIndex,testHeaderNameToColumnIndex,
+        "Interested?","Leader?",testNameColumnName
+    )
 
-    for _ in range(259):
-        testInputMatrixMinusHeaders.append([])
+    assert(len(testSparsePreferences) == 3)
+    assert(len(testSparsePreferences.projectIndices) == 8)
+    assert(testSparsePreferences.toDense() == testListPreferences)
+    assert(testSparsePreferences.getRow(0) == [(0,1),(2,C.LEADER)])
+    assert(testSparsePreferences[1][1] == C.LEADER)
+    assert(testSparsePreferences[1][3] == 0)
+    assert(testSparseStudentNames.get(1) == "Cypher")
+    assert(C.summarizePreferences(testSparsePreferences) == C.summarizePreferences(testListPreferences))
+
+    testPreferences = [
+        [2, 0, 0],
+        [1, 0, 0],
+        [0, 0, 2],
+        [2, 0, 0],
+        [0, 0, 1],
+        [0, 2, 0],
+        [0, 2, 0],
+        [0, 0, 2],
+        [1, 0, 1],
+        [0, 2, 1]
+    ]
+    testSparsePreferences = C.SparsePreferences(3)
+    for row in testPreferences:
+        testSparsePreferences.addRow(dict(enumerate(row)))
+
+    testSummary = C.summarizePreferences(testSparsePreferences)
+    assert(testSummary == C.summarizePreferences(testPreferences))
+    assert(
+        C.assignPlayersToProjects(testSummary,testSparsePreferences,len(testPreferences),3,4,1,2) ==
+        C.assignPlayersToProjects(testSummary,testPreferences,len(testPreferences),3,4,1,2)
+    )
 
-    testLeaderValue = C.getLeaderValue(testInputMatrixMinusHeaders)
-    assert(testLeaderValue == 1000)
+    # testing numpy engine (only when numpy is installed)
+
+    if C.np is not None:
+        testArrayPreferences, testArrayStudentNames = C.addStudentsArray(
+            testInputMatrixMinusHeaders,testProjectNamesToProjectIndex,testHeaderNameToColumnIndex,
+            "Interested?","Leader?",testNameColumnName
+        )
+
+        assert(testArrayPreferences.tolist() == testListPreferences)
+        assert(testArrayStudentNames.get(2) == "Raze")
+        assert(C.summarizePreferencesArray(testArrayPreferences) == C.summarizePreferences(testListPreferences))
+
+        testPreferences = [
+            [2, 0, 0],
+            [1, 0, 0],
+            [0, 0, 2],
+            [2, 0, 0],
+            [0, 2, 1],
+            [0, 0, 0]
+        ]
+        assert(C.summarizePreferencesArray(C.np.array(testPreferences)) == C.summarizePreferences(testPreferences))
 
     print("tests passed")
     return
\ No newline at end of file